@@ -0,0 +1,102 @@
+"""
+事件列表微基准
+
+1. 对比原实现(list + heapq, 删除时线性查找并heapify)与HeapEventList在大量待处理事件下
+   取消+重新调度、以及出队的单次耗时
+2. hold模型：每次取出最早事件并以Car.get_duration同分布的间隔重新加入，
+   对比HeapEventList与CalendarEventList的单次耗时
+
+运行方式::
+
+    export PYTHONPATH=/extend/school/projects/highwaysim:$PYTHONPATH
+    python benchmarks/event_list.py
+"""
+
+import heapq
+import random
+import time
+
+from highway_sim.mySalabim.event_list import HeapEventList, CalendarEventList
+
+SIZES = [100_000, 300_000, 1_000_000]
+# 原实现每次取消为O(n),操作次数取少一些,结果按单次耗时比较
+LEGACY_OPS = 20
+OPS = 100_000
+
+
+class _Dummy:
+    __slots__ = ()
+
+
+def bench_legacy(n: int) -> float:
+    rnd = random.Random(n)
+    components = [_Dummy() for _ in range(n)]
+    event_list = [(rnd.random() * 1e6, 0, seq, c, None) for seq, c in enumerate(components)]
+    heapq.heapify(event_list)
+    seq = n
+    start = time.perf_counter()
+    for _ in range(LEGACY_OPS):
+        c = components[rnd.randrange(n)]
+        for i in range(len(event_list)):
+            if event_list[i][3] == c:
+                event_list[i] = event_list[0]
+                event_list.pop(0)
+                heapq.heapify(event_list)
+                break
+        seq += 1
+        heapq.heappush(event_list, (rnd.random() * 1e6, 0, seq, c, None))
+    return (time.perf_counter() - start) / LEGACY_OPS
+
+
+def bench_heap(n: int) -> tuple:
+    rnd = random.Random(n)
+    event_list = HeapEventList()
+    entries = [event_list.push(rnd.random() * 1e6, 0, seq, _Dummy(), None) for seq in range(n)]
+    seq = n
+    start = time.perf_counter()
+    for _ in range(OPS):
+        i = rnd.randrange(n)
+        entry = entries[i]
+        component = entry[3]
+        event_list.remove(entry)
+        seq += 1
+        entries[i] = event_list.push(rnd.random() * 1e6, 0, seq, component, None)
+    reschedule = (time.perf_counter() - start) / OPS
+
+    start = time.perf_counter()
+    for _ in range(OPS):
+        event_list.pop()
+    pop = (time.perf_counter() - start) / OPS
+    return reschedule, pop
+
+
+def bench_hold(event_list_class: type, n: int) -> float:
+    rnd = random.Random(n)
+    event_list = event_list_class()
+    for seq in range(n):
+        event_list.push(rnd.gammavariate(2.0, 2.0) * 75_000, 0, seq, _Dummy(), None)
+    seq = n
+    start = time.perf_counter()
+    for _ in range(OPS):
+        t, priority, _, component, _ = event_list.pop()
+        seq += 1
+        event_list.push(t + rnd.gammavariate(2.0, 2.0) * 75_000, priority, seq, component, None)
+    return (time.perf_counter() - start) / OPS
+
+
+def main() -> None:
+    print(f"{'pending':>10} {'legacy cancel us':>18} {'heap cancel us':>16} {'heap pop us':>13} {'speedup':>9}")
+    for n in SIZES:
+        legacy = bench_legacy(n)
+        reschedule, pop = bench_heap(n)
+        print(
+            f"{n:>10} {legacy * 1e6:>18.1f} {reschedule * 1e6:>16.2f} {pop * 1e6:>13.2f} {legacy / reschedule:>9.0f}x"
+        )
+    print()
+    print(f"{'pending':>10} {'heap hold us':>14} {'calendar hold us':>18}")
+    for n in SIZES:
+        print(f"{n:>10} {bench_hold(HeapEventList, n) * 1e6:>14.2f} {bench_hold(CalendarEventList, n) * 1e6:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
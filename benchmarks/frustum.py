@@ -0,0 +1,188 @@
+"""
+3D视锥剔除微基准
+
+在1k/10k/50k个Animate3dBox(位置与Car.draw相同，为随时间插值的lambda)上，对比每帧的剔除耗时：
+1. centers  : 计算所有对象中心(调用x(t)/y(t)等动态属性)，两种实现共有的部分
+2. per-object: 原实现，每个对象构造一个4维向量并与Projection_dot_view_matrix做一次numpy.dot
+3. matmul   : frustum_mask，所有中心组成(N, 4)数组，一次矩阵乘法得到可见性掩码
+4. cull     : cull_frustum整体(中心 + 掩码 + 写回_in_frustum)
+5. batch    : 同样的车辆放在一个Animate3dBoxBatch中，向量化计算全部位置并剔除(不含GL调用)
+同时给出可见比例，即剔除后每帧实际调用draw_box3d的对象比例(不剔除时为100%)
+
+并对比剔除与不剔除时整帧绘制循环(与Environment中3D帧循环相同：cull_frustum后逐个调用draw)的耗时，
+逐个Animate3dBox与Animate3dBoxBatch各测一次。OpenGL调用替换为直接返回的NullGL，
+帧耗时只包含Python侧组织与提交绘制调用的开销，不含驱动与GPU的耗时
+
+运行方式::
+
+    export PYTHONPATH=/extend/school/projects/highwaysim:$PYTHONPATH
+    python benchmarks/frustum.py
+"""
+
+import math
+import random
+import time
+
+import numpy as np
+
+import highway_sim.mySalabim.d3_performance_enhanced as sim
+from highway_sim.mySalabim import box_batch
+
+SIZES = [1_000, 10_000, 50_000]
+FRAMES = 5
+# 场景范围与Car.draw中lon2x/lat2y的分辨率一致
+EXTENT = 10_000
+
+
+def perspective(fov_y: float, aspect: float, near: float, far: float) -> np.ndarray:
+    f = 1 / math.tan(math.radians(fov_y) / 2)
+    return np.array([
+        [f / aspect, 0, 0, 0],
+        [0, f, 0, 0],
+        [0, 0, (far + near) / (near - far), 2 * far * near / (near - far)],
+        [0, 0, -1, 0],
+    ])
+
+
+def look_at(eye: np.ndarray, center: np.ndarray, up: np.ndarray) -> np.ndarray:
+    forward = (center - eye) / np.linalg.norm(center - eye)
+    side = np.cross(forward, up)
+    side /= np.linalg.norm(side)
+    up = np.cross(side, forward)
+    view = np.identity(4)
+    view[0, :3], view[1, :3], view[2, :3] = side, up, -forward
+    view[:3, 3] = -view[:3, :3] @ eye
+    return view
+
+
+class NullGL:
+    """
+    不做任何事的OpenGL替身，GL_常量为0，函数调用直接返回
+    """
+
+    def __getattr__(self, name: str):
+        if name.startswith("GL_"):
+            return 0
+        if name == "glGenBuffers":
+            return lambda n: list(range(1, n + 1))
+        return _null_call
+
+
+def _null_call(*args) -> None:
+    return None
+
+
+def legacy_in_frustum(x_c: float, y_c: float, z_c: float) -> bool:
+    clip = np.dot(box_batch.Projection_dot_view_matrix, np.array([x_c, y_c, z_c, 1.0]))
+    x_w, y_w, z_w = clip[:3] / clip[3]
+    return -1 <= x_w <= 1 and -1 <= y_w <= 1 and -1 <= z_w <= 1
+
+
+def make_boxes(n: int) -> tuple:
+    rnd = random.Random(n)
+    boxes = []
+    batch = sim.Animate3dBoxBatch(x_len=20, y_len=20, z_len=5, z=0.5, capacity=n)
+    for _ in range(n):
+        x0, y0 = rnd.uniform(0, EXTENT), rnd.uniform(0, EXTENT)
+        x1, y1 = x0 + rnd.uniform(-200, 200), y0 + rnd.uniform(-200, 200)
+        t0 = rnd.uniform(0, 100)
+        t1 = t0 + rnd.uniform(50, 500)
+        batch.add(x0, y0, x1, y1, t0, t1)
+        boxes.append(sim.Animate3dBox(
+            x=lambda t, x0=x0, x1=x1, t0=t0, t1=t1: sim.interpolate(t, t0, t1, x0, x1),
+            y=lambda t, y0=y0, y1=y1, t0=t0, t1=t1: sim.interpolate(t, t0, t1, y0, y1),
+            z=0.5,
+            x_len=20,
+            y_len=20,
+            z_len=5,
+        ))
+    return boxes, batch
+
+
+def bench_batch(batch: sim.Animate3dBoxBatch, t: float) -> int:
+    return len(batch.visible_positions(t))
+
+
+def draw_frame(objects: list, t: float, cull: bool) -> None:
+    if cull:
+        sim.cull_frustum(objects, t)
+    for an in objects:
+        an.draw(t)
+
+
+def bench_frames(objects: list, times: list, cull: bool) -> float:
+    for an in objects:
+        an._in_frustum = True
+    box_batch.Enable_frustum_culling = cull
+    start = time.perf_counter()
+    for t in times:
+        draw_frame(objects, t, cull)
+    elapsed = (time.perf_counter() - start) / FRAMES
+    box_batch.Enable_frustum_culling = True
+    return elapsed
+
+
+def bench(n: int) -> tuple:
+    env = sim.Environment(trace=False)
+    boxes, batch = make_boxes(n)
+    times = [100 + 10 * i for i in range(FRAMES)]
+
+    start = time.perf_counter()
+    frames = [[an.frustum_center(t) for an in boxes] for t in times]
+    centers = (time.perf_counter() - start) / FRAMES
+
+    start = time.perf_counter()
+    legacy_visible = sum(legacy_in_frustum(*c) for frame in frames for c in frame)
+    legacy = (time.perf_counter() - start) / FRAMES
+
+    start = time.perf_counter()
+    visible = sum(int(box_batch.frustum_mask(np.array(frame)).sum()) for frame in frames)
+    matmul = (time.perf_counter() - start) / FRAMES
+
+    start = time.perf_counter()
+    for t in times:
+        sim.cull_frustum(boxes, t)
+    cull = (time.perf_counter() - start) / FRAMES
+
+    start = time.perf_counter()
+    batch_visible = sum(bench_batch(batch, t) for t in times)
+    batched = (time.perf_counter() - start) / FRAMES
+
+    assert visible == legacy_visible == batch_visible
+
+    frames = (
+        bench_frames(boxes, times, False),
+        bench_frames(boxes, times, True),
+        bench_frames([batch], times, False),
+        bench_frames([batch], times, True),
+    )
+    env.an_objects3d.clear()
+    return (centers, legacy, matmul, cull, batched, visible / (n * FRAMES)), frames
+
+
+def main():
+    sim.has_numpy()
+    sim.gl = box_batch.gl = NullGL()
+    # 俯视场景中部,约三分之一的对象可见
+    eye = np.array([EXTENT / 2, EXTENT / 4, EXTENT / 4])
+    view = look_at(eye, np.array([EXTENT / 2, EXTENT / 2, 0.0]), np.array([0.0, 0.0, 1.0]))
+    box_batch.set_projection_dot_view_matrix(perspective(45, 16 / 10, 1, 4 * EXTENT) @ view)
+
+    results = {n: bench(n) for n in SIZES}
+
+    print(f"{'objects':>8} {'centers ms':>11} {'per-object ms':>14} {'matmul ms':>10} {'speedup':>8} "
+          f"{'cull ms':>8} {'batch ms':>9} {'visible':>8}")
+    for n, ((centers, legacy, matmul, cull, batched, visible), _) in results.items():
+        print(f"{n:>8} {centers * 1e3:>11.2f} {legacy * 1e3:>14.2f} {matmul * 1e3:>10.2f} "
+              f"{legacy / matmul:>7.1f}x {cull * 1e3:>8.2f} {batched * 1e3:>9.2f} {visible:>8.1%}")
+
+    print()
+    print(f"{'objects':>8} {'frame ms':>9} {'culled ms':>10} {'speedup':>8} "
+          f"{'batch frame ms':>15} {'batch culled ms':>16} {'speedup':>8}")
+    for n, (_, (frame, culled, batch_frame, batch_culled)) in results.items():
+        print(f"{n:>8} {frame * 1e3:>9.2f} {culled * 1e3:>10.2f} {frame / culled:>7.1f}x "
+              f"{batch_frame * 1e3:>15.2f} {batch_culled * 1e3:>16.2f} {batch_frame / batch_culled:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+数据解析基准
+
+对每个源文件分别给出：
+1. 原实现的逐行方式(读入全部列为字符串, iterrows后按iloc取值)的吞吐量
+2. 当前列式解析(只读需要的列, 按列转换类型, 并构建门架/收费站/上下游关系)的吞吐量
+
+不使用路网解析缓存
+
+运行方式::
+
+    export PYTHONPATH=/extend/school/projects/highwaysim:$PYTHONPATH
+    cd highway_sim
+    python ../benchmarks/parser.py
+"""
+
+import time
+
+import pandas as pd
+
+from highway_sim.data_parser.road_network import RoadNetwork, Parser as RoadNetworkParser
+from highway_sim.data_parser.traffic import Traffic, Parser as TrafficParser
+
+
+def bench_iterrows(path: str) -> float:
+    reader = pd.read_excel if path.endswith((".xlsx", ".xls")) else pd.read_csv
+    start = time.perf_counter()
+    df = reader(path, dtype=str, na_filter=False)
+    for row in [x[1] for x in df.iterrows()]:
+        for i in range(len(row)):
+            row.iloc[i]
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    rnp = RoadNetworkParser(RoadNetwork(), use_cache=False)
+    rnp.parse()
+    tp = TrafficParser(Traffic())
+    tp.parse()
+
+    print(f"{'file':<60} {'rows':>8} {'iterrows rows/s':>16} {'columnar rows/s':>16} {'speedup':>8}")
+    for path, (rows, seconds) in {**rnp.timings, **tp.timings}.items():
+        legacy = bench_iterrows(path)
+        print(
+            f"{path:<60} {rows:>8} {rows / legacy:>16.0f} {rows / seconds:>16.0f} {legacy / seconds:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -8,21 +8,38 @@
     - components/      : 核心组件模块（车辆实体、车辆生成器等）
         - car.py         : 车辆行为模拟组件
         - car_generator.py: 车辆生成器组件
+        - environment.py : 持有统计收集器的仿真环境
+        - lod.py         : 2D动画的细节层次(路段密度热力条/视口内车辆图形)
     - config/          : 配置管理模块
         - args.py        : 命令行参数解析
         - resources.py   : 资源路径配置
+    - headless.py      : 无界面批量运行入口（不导入tkinter/PIL/OpenGL）
+    - replication.py   : 多进程独立重复实验与置信区间
+    - sweep.py         : fitting_data参数扫描与标定
     - data_parser/     : 数据解析模块
         - road_network.py: 路网数据解析器
+        - cache.py       : 路网解析结果缓存
         - traffic.py     : 交通流量数据解析器
+    - engine/          : 仿真引擎模块
+        - vectorized.py  : 向量化行程采样引擎
     - entity/          : 实体定义模块
         - location.py    : 位置实体（收费站/门架）定义
+        - graph.py       : 路网的CSR数组化图表示
     - mySalabim/       : 可视化增强模块
         - d2_interface_enhanced.py : 2D可视化增强
         - d3_performance_enhanced.py: 3D可视化增强
+        - box_batch.py   : 两个分支共用的3D方块批量绘制(VBO)与视锥剔除
     - stats/           : 统计模块
-        - default.py     : 默认统计指标收集
+        - default.py     : 默认统计指标收集（StatsCollector，由环境持有）
+        - sink.py        : 统计事件接收器
+        - streaming.py   : 内存固定、可合并的流式统计(直方图、均值方差、分位数草图)
+        - trace.py       : 逐段行程的列式追踪(npy/Arrow/Parquet)
+        - results.py     : 统计结果的读写(.npz结果文件、二进制追踪、文本日志)，供verify.py使用
+        - flow.py        : 分位置、分时间段的流量与路段占用矩阵
+        - od.py          : 出入口(OD)矩阵，稠密或稀疏存储
     - util/            : 工具模块
         - distribution.py: 概率分布工具
+        - spatial.py     : 均匀网格空间索引(门架、路段与行驶中车辆的视口查询)
 
 运行方式::
 
@@ -30,11 +47,32 @@
     cd hiway_sim
     python main.py
 
+    # 服务器等无显示环境下批量运行
+    python headless.py --log
+
+    # 多进程独立重复实验，输出各指标的置信区间
+    python replication.py --log --replications 8 --workers 4 --seed 2024
+
+    # 参数扫描，结果表输出到../log/sweep.csv
+    python sweep.py --log --engine vectorized --seed 2024 --sweep-lhs 64
+
 关键启动参数说明:
     - --log        : 启用日志记录（默认输出到../log/statistics.log）
     - --log-level  : 设置日志级别（DEBUG/INFO/WARNING/ERROR/CRITICAL）
     - --d2         : 启用2D可视化
     - --d3         : 启用3D可视化
+    - --lod/--lod-zoom/--lod-max-sprites : 2D细节层次、显示车辆图形的最小缩放倍数与最大数量
+    - --event-list : 未来事件列表实现（heap/calendar）
+    - --engine     : 仿真引擎（des/vectorized）
+    - --no-cache   : 不使用路网解析缓存
+    - --streaming-stats : 只保留流式统计，不保存逐个样本
+    - --trace-file : 统计事件的二进制追踪文件(stats/sink.py的read_trace读取)
+    - --hop-trace/--hop-trace-format : 逐段行程追踪的输出路径与格式(stats/trace.py的read_hops读取)
+    - --results-file : 统计结果的.npz文件，可用verify.py绘图
+    - --flow-file/--flow-bin-minutes : 分位置流量与占用矩阵的.npz文件、时间段长度
+    - --od-file/--od-sparse : 出入口矩阵的.npz文件、是否稀疏存储
+    - --replications/--workers/--seed : 重复实验次数、进程数、根种子
+    - --sweep-grid/--sweep-lhs/--sweep-output : 参数网格、拉丁超立方采样点数、结果表路径
 
 典型工作流程:
     1. 解析路网数据和交通流量数据
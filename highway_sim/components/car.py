@@ -15,12 +15,26 @@ Car类作为仿真核心组件，控制单个车辆从入口到出口的全生
         - 2D/3D同步渲染：通过sim.interpolate实现经纬度到画布坐标的实时映射
         - 动态位置计算：time2x/time2y lambda函数实现平滑移动插值
         - 资源管理：remove_animation方法确保组件释放
-
-    3. 统计指标体系：
+        - 3D批量绘制：环境持有Animate3dBoxBatch(self.env.boxes)时，每段行程只在批量图层中占用一个槽位，
+          所有车辆的3D方块每帧一次绘制，不再逐辆创建Animate3dBox
+        - 空间索引：环境持有车辆网格索引(self.env.vehicles)时，每段行程开始时把车辆移动到所在路段的外接矩形，
+          驶离时删除，供细节层次(LOD)查询视口内的车辆
+        - 细节层次：环境启用LOD(self.env.lod)时不直接创建2D图形，由LevelOfDetail决定显示热力条还是车辆图形
+
+    3. 行程计划快速路径：
+        - 未启用动画时，车辆在进入时一次性采样完整路径与各段行驶时间（TripPlan）
+        - 只调度一次离开事件，门架统计在离开时按计划补记（延迟记录）
+        - 持有行程计划的车辆登记在self.env.trip_plans中，仿真结束时仍在途的车辆由flush_trip_plans
+          按sequence_number顺序补记已开始路段的统计，与事件表的实现无关
+        - 启用逐段行程追踪或分位置流量(self.env.stats.track_hops)时，每一段的出发位置、进入与离开时间
+          通过hop_info记录，与逐段行驶一致只记录已结束的路段
+
+    4. 统计指标体系(记录到self.env.stats)：
         - 门架通行时间（gantry_time_info）
         - 总行程时间（total_time_info）
         - 出入口时段分布（entry/exit_hour_info）
         - 路径节点计数（num_passed_info）
+        - 出入口矩阵（od_info）
 
 
 使用示例::
@@ -30,21 +44,47 @@ Car类作为仿真核心组件，控制单个车辆从入口到出口的全生
 
 import logging
 import random
+from dataclasses import dataclass, field
+from typing import List
 
 import highway_sim.mySalabim.d2_interface_enhanced as sim
 
+from highway_sim.components.environment import HighwayEnvironment
 from highway_sim.config import common
 from highway_sim.config import fitting_data as fit
 from highway_sim.data_parser.road_network import RoadNetwork
 from highway_sim.data_parser.traffic import Traffic
 from highway_sim.entity.location import TollPlaza, Location
-from highway_sim.stats import default as stats_default
 from highway_sim.util.distribution import gamma_distribution
 import highway_sim.config.args as args
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class TripPlan:
+    """
+    车辆的完整行程计划，第i段为locations[i] -> locations[i + 1]，
+    从starts[i]开始，耗时durations[i]毫秒
+    """
+    locations: List[Location] = field(default_factory=list)
+    starts: List[float] = field(default_factory=list)
+    durations: List[int] = field(default_factory=list)
+    # 第i段是否计入门架通行时间(从收费站出发的第一段不计入)
+    is_gantry: List[bool] = field(default_factory=list)
+    # 已补记门架统计的路段数
+    recorded: int = 0
+    # 已记录逐段行程的路段数
+    hops: int = 0
+
+    @property
+    def end_ms(self) -> float:
+        """
+        离开高速公路的时间
+        """
+        return self.starts[-1] + self.durations[-1]
+
+
 class Car(sim.Component):
     """
     Car类用于模拟高速公路上的车辆行为，继承自Salabim的Component类。
@@ -71,9 +111,11 @@ class Car(sim.Component):
         self.rn: RoadNetwork = road_network
         self.traffic: Traffic = traffic
         self.location: Location = entrance
+        self.entrance: Location = entrance
         self.gantry_num: int = 1
         self.start_time: float = self.env.now()
         self.prev_location: Location = None
+        self.plan: TripPlan = None
 
     def get_next_location(self) -> Location:
         """
@@ -112,23 +154,18 @@ class Car(sim.Component):
         Returns:
 
         """
-        time2x = lambda t: sim.interpolate(
-            t,
-            self.start_time,
-            self.start_time + duration,
-            self.rn.lon2x(self.prev_location.longitude, 10000),
-            self.rn.lon2x(self.location.longitude, 10000),
-        )
-        time2y = lambda t: sim.interpolate(
-            t,
-            self.start_time,
-            self.start_time + duration,
-            self.rn.lat2y(self.prev_location.latitude, 10000),
-            self.rn.lat2y(self.location.latitude, 10000),
-        )
+        x0 = self.rn.lon2x(self.prev_location.longitude, 10000)
+        x1 = self.rn.lon2x(self.location.longitude, 10000)
+        y0 = self.rn.lat2y(self.prev_location.latitude, 10000)
+        y1 = self.rn.lat2y(self.location.latitude, 10000)
+        time2x = lambda t: sim.interpolate(t, self.start_time, self.start_time + duration, x0, x1)
+        time2y = lambda t: sim.interpolate(t, self.start_time, self.start_time + duration, y0, y1)
+        vehicles = self.env.vehicles
+        if vehicles is not None:
+            vehicles.move(self, x0, y0, x1, y1)
 
         if args.ENABLE_2D:
-            self.animate = sim.AnimateRectangle(
+            make_sprite = lambda: sim.AnimateRectangle(
                 x=time2x,
                 y=time2y,
                 spec=(
@@ -140,7 +177,14 @@ class Car(sim.Component):
                 linewidth=0,
                 fillcolor="black",
             )
-        if args.ENABLE_3D:
+            lod = self.env.lod
+            if lod is None:
+                self.animate = make_sprite()
+            else:
+                lod.enter(self, (self.prev_location.index, self.location.index), (x0, y0, x1, y1), make_sprite)
+        if args.ENABLE_3D and self.env.boxes is not None:
+            self.box_slot = self.env.boxes.add(x0, y0, x1, y1, self.start_time, self.start_time + duration)
+        elif args.ENABLE_3D:
             self.animate3d = sim.Animate3dBox(
                 x=time2x,
                 y=time2y,
@@ -163,24 +207,94 @@ class Car(sim.Component):
 
         """
         if enable_2d:
-            self.animate.remove()
+            if self.env.lod is None:
+                self.animate.remove()
+            else:
+                self.env.lod.leave(self)
         if enable_3d:
-            self.animate3d.remove()
+            if self.env.boxes is None:
+                self.animate3d.remove()
+            else:
+                self.env.boxes.remove_box(self.box_slot)
+
+    def make_trip_plan(self) -> TripPlan:
+        """
+        从当前位置和当前时间出发，采样完整路径与各段行驶时间
+
+        Returns:
+            TripPlan: 行程计划
+        """
+        plan = TripPlan()
+        location = self.location
+        start = self.env.now()
+        is_gantry = not isinstance(location, TollPlaza)
+        while True:
+            duration = self.get_duration(is_gantry=is_gantry)
+            plan.locations.append(location)
+            plan.starts.append(start)
+            plan.durations.append(duration)
+            plan.is_gantry.append(is_gantry)
+            location = location.get_next_location(True)
+            start += duration
+            is_gantry = True
+            if len(location.downstream) == 0:
+                break
+        plan.locations.append(location)
+        return plan
+
+    def record_trip_plan(self) -> None:
+        """
+        补记行程计划中已开始(开始时间不晚于当前时间)但尚未记录的路段统计，
+        逐段行程只记录已结束(离开时间不晚于当前时间)的路段
+
+        Returns:
+
+        """
+        plan = self.plan
+        now = self.env.now()
+        stats = self.env.stats
+        track_hops = stats.track_hops
+        while plan.recorded < len(plan.durations) and plan.starts[plan.recorded] <= now:
+            i = plan.recorded
+            if plan.is_gantry[i]:
+                stats.gantry_time_info(plan.durations[i])
+            plan.recorded += 1
+        if not track_hops:
+            return
+        while plan.hops < len(plan.durations) and plan.starts[plan.hops] + plan.durations[plan.hops] <= now:
+            i = plan.hops
+            stats.hop_info(self.sequence_number(), plan.locations[i].index, plan.starts[i],
+                           plan.starts[i] + plan.durations[i])
+            plan.hops += 1
 
     def process(self) -> None:
         """
         模拟车辆行驶过程，包括路径选择、动画渲染、数据统计
-        
+        未启用动画时使用行程计划，每辆车只调度一次离开事件
+
         Returns:
 
         """
-        stats_default.entry_hour_info(self.env.now(), logger)
+        self.env.stats.entry_hour_info(self.env.now())
+        if not (args.ENABLE_2D or args.ENABLE_3D):
+            self.plan = self.make_trip_plan()
+            self.env.trip_plans.add(self)
+            self.hold(self.plan.end_ms - self.env.now())
+            self.record_trip_plan()
+            self.location = self.plan.locations[-1]
+            self.prev_location = self.plan.locations[-2]
+            self.gantry_num = len(self.plan.durations)
+            # 与逐段行驶保持一致,start_time为最后一段的开始时间
+            self.start_time = self.plan.starts[-1]
+            self.record_exit()
+            return
+
         duration = 0
         if isinstance(self.location, TollPlaza):
             duration = self.get_duration(is_gantry=False)
         else:
             duration = self.get_duration(is_gantry=True)
-            stats_default.gantry_time_info(duration, logger)
+            self.env.stats.gantry_time_info(duration)
         self.prev_location = self.location
         self.location = self.get_next_location()
         self.start_time = self.env.now()
@@ -188,10 +302,11 @@ class Car(sim.Component):
         self.draw(duration, args.ENABLE_2D, args.ENABLE_3D)
         self.hold(duration)
         self.remove_animation(args.ENABLE_2D, args.ENABLE_3D)
+        self.record_hop()
         while len(self.location.downstream) > 0:
             self.gantry_num += 1
             duration = self.get_duration(is_gantry=True)
-            stats_default.gantry_time_info(duration, logger)
+            self.env.stats.gantry_time_info(duration)
             self.prev_location = self.location
             self.location = self.get_next_location()
 
@@ -199,9 +314,50 @@ class Car(sim.Component):
             self.draw(duration, args.ENABLE_2D, args.ENABLE_3D)
             self.hold(duration)
             self.remove_animation(args.ENABLE_2D, args.ENABLE_3D)
+            self.record_hop()
 
+        if self.env.vehicles is not None:
+            self.env.vehicles.remove(self)
+        self.record_exit()
+
+    def record_hop(self) -> None:
+        """
+        逐段行驶时，在到达下一位置后记录刚结束的一段行程
+
+        Returns:
+
+        """
+        stats = self.env.stats
+        if stats.track_hops:
+            stats.hop_info(self.sequence_number(), self.prev_location.index, self.start_time, self.env.now())
+
+    def record_exit(self) -> None:
+        """
+        记录车辆离开高速公路时的统计信息
+
+        Returns:
+
+        """
         now = self.env.now()
-        stats_default.num_passed_info(self.gantry_num, logger)
-        stats_default.total_time_info(now, self.start_time, logger)
-        stats_default.exit_hour_info(now, logger)
-        stats_default.exit_hex_info(self.location.hex_code, logger)
+        stats = self.env.stats
+        self.env.trip_plans.discard(self)
+        stats.num_passed_info(self.gantry_num)
+        stats.total_time_info(now, self.start_time)
+        stats.exit_hour_info(now)
+        stats.exit_hex_info(self.location.hex_code)
+        stats.od_info(self.entrance.index, self.location.index)
+
+
+def flush_trip_plans(env: HighwayEnvironment) -> None:
+    """
+    仿真结束后，按sequence_number顺序为仍在途的车辆补记已开始路段的统计，使结果与逐段行驶一致，
+    且不同事件表实现的补记顺序相同
+
+    Args:
+        env (HighwayEnvironment): 仿真环境
+
+    Returns:
+
+    """
+    for car in sorted(env.trip_plans, key=lambda car: car.sequence_number()):
+        car.record_trip_plan()
@@ -19,14 +19,14 @@ CarGenerator类继承salabim.Component，实现离散事件驱动的车辆生成
 
 import logging
 import random
+from typing import List
 
 import highway_sim.mySalabim.d2_interface_enhanced as sim
 
-from highway_sim.stats import default as stats_default
 from highway_sim.components.car import Car
 from highway_sim.config import common
 from highway_sim.config import fitting_data as fit
-from highway_sim.entity.location import Location
+from highway_sim.entity.location import Location, TollPlaza
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +53,7 @@ class CarGenerator(sim.Component):
     def get_entrance(self) -> Location:
         """
         考虑交通流量和省界入口的比例, 随机选择一个入口位置
+        收费站入口使用路网预先构建的别名表抽样，耗时与入口数量无关
 
         Returns:
 
@@ -60,14 +61,43 @@ class CarGenerator(sim.Component):
         pe = self.rn.province_entrances
         if random.random() < fit.PROVINCE_ENTRANCE_RATION:
             return random.choice(pe)
-        prob = random.random()
-        cnt = 0
-        for k, v in self.rn.entrances_with_prob:
-            cnt += v
-            if cnt > prob:
-                stats_default.entry_hex_info(k.hex_code, logger)
-                return k
-        return random.choice(pe)
+        if self.rn.entrance_table is None:
+            self.rn.build_entrance_table()
+        if self.rn.entrance_table is None:
+            # 没有带流量的收费站入口时与原逐个扫描一致,退回省界入口
+            return random.choice(pe)
+        entrance = self.rn.entrances_with_prob[self.rn.entrance_table.sample()][0]
+        self.env.stats.entry_hex_info(entrance.hex_code)
+        return entrance
+
+    def get_entrances(self, n: int) -> List[Location]:
+        """
+        批量选择n个入口位置，分布与逐个调用get_entrance相同
+
+        Args:
+            n (int): 入口数量
+
+        Returns:
+            List[Location]: 入口位置列表
+        """
+        pe = self.rn.province_entrances
+        is_province = [random.random() < fit.PROVINCE_ENTRANCE_RATION for _ in range(n)]
+        n_province = sum(is_province)
+        if self.rn.entrance_table is None:
+            self.rn.build_entrance_table()
+        province = iter(random.choices(pe, k=n_province))
+        if self.rn.entrance_table is None:
+            # 没有带流量的收费站入口时退回省界入口,与get_entrance一致
+            entrances = iter(random.choices(pe, k=n - n_province))
+        else:
+            entrances = iter(
+                [self.rn.entrances_with_prob[i][0] for i in self.rn.entrance_table.sample_n(n - n_province)]
+            )
+        result = [next(province) if x else next(entrances) for x in is_province]
+        for entrance in result:
+            if isinstance(entrance, TollPlaza):
+                self.env.stats.entry_hex_info(entrance.hex_code)
+        return result
 
     def gen_interval_ms(self) -> int:
         """
@@ -0,0 +1,65 @@
+"""
+高速公路仿真环境模块
+
+HighwayEnvironment在salabim环境的基础上持有本次仿真的统计收集器，
+Car与CarGenerator通过self.env.stats记录统计信息，不同环境的统计结果互不影响；
+使用行程计划的车辆在进入时登记到self.env.trip_plans，离开时删除，仿真结束后由flush_trip_plans补记；
+启用2D动画时还可持有行驶中车辆的网格索引(self.env.vehicles)，由Car在每段行程开始时更新，
+以及细节层次控制(self.env.lod)，每帧绘制前更新；启用3D动画时持有所有车辆共用的3D方块批量图层(self.env.boxes)
+
+使用示例::
+
+    env = HighwayEnvironment(random_seed="*", time_unit="milliseconds", stats=StatsCollector())
+    CarGenerator(road_network=rn, traffic=tf)
+    env.run(duration)
+    env.stats.record(logger)
+"""
+
+from typing import TYPE_CHECKING, Optional, Set
+
+import highway_sim.mySalabim.d2_interface_enhanced as sim
+
+from highway_sim.stats.default import StatsCollector
+from highway_sim.util.spatial import GridIndex
+
+if TYPE_CHECKING:
+    from highway_sim.components.car import Car
+    from highway_sim.components.lod import LevelOfDetail
+
+
+class HighwayEnvironment(sim.Environment):
+    """
+    持有统计收集器的仿真环境
+    """
+
+    def setup(self, stats: Optional[StatsCollector] = None, vehicles: Optional[GridIndex] = None) -> None:
+        """
+        Args:
+            stats (Optional[StatsCollector]): 统计收集器，None表示新建
+            vehicles (Optional[GridIndex]): 行驶中车辆的网格索引(lon2x/lat2y空间，分辨率10000)，None表示不建立
+
+        Returns:
+
+        """
+        self.stats: StatsCollector = stats if stats is not None else StatsCollector()
+        self.vehicles: Optional[GridIndex] = vehicles
+        # 持有未完成行程计划的车辆
+        self.trip_plans: Set[Car] = set()
+        # 2D动画的细节层次控制,画布创建后由main.py设置
+        self.lod: Optional[LevelOfDetail] = None
+        # 所有车辆共用的3D方块批量图层,启用3D动画时由main.py设置
+        self.boxes: Optional[sim.Animate3dBoxBatch] = None
+
+    def animation_pre_tick(self, t: float) -> None:
+        """
+        每帧绘制动画对象前更新细节层次
+
+        Args:
+            t (float): 动画时间
+
+        Returns:
+
+        """
+        super().animation_pre_tick(t)
+        if self.lod is not None:
+            self.lod.update(t)
@@ -0,0 +1,212 @@
+"""
+2D动画的细节层次(LOD)模块
+
+每辆车一个AnimateRectangle时，每帧都要为每辆车生成PIL图像与PhotoImage，超过_maximum_number_of_bitmaps后
+全部合成到一张溢出图像中，帧耗时随车辆数线性增长。启用LOD后车辆不再直接创建2D动画对象，而是登记到本模块：
+
+    - 热力条：为每条路段在仿真画布上预先创建一条线，颜色表示路段上的车辆密度(辆/km)，
+              只在车辆进入/离开使密度档位变化时更新颜色，每帧耗时与变化的路段数成正比
+    - 车辆图形：放大到zoom倍以上，且视口内(由车辆网格索引查询)的车辆不超过max_sprites辆时，
+                隐藏热力条，只为视口内的车辆创建AnimateRectangle
+
+视口只在画布平移/缩放后重新查询，帧耗时与车队规模无关
+
+使用示例::
+
+    env.lod = LevelOfDetail(env, rn, sim.g.canvas, 1000, 1000)
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+import highway_sim.mySalabim.d2_interface_enhanced as sim
+
+if TYPE_CHECKING:
+    import tkinter
+
+    from highway_sim.components.environment import HighwayEnvironment
+    from highway_sim.data_parser.road_network import RoadNetwork
+
+# 由低到高的密度颜色
+HEAT_COLORS = ("#fee5d9", "#fcbba1", "#fc9272", "#fb6a4a", "#de2d26", "#a50f15")
+STRIP_TAG = "lod_strip"
+STRIP_WIDTH = 4
+
+
+class LevelOfDetail:
+    """
+    仿真画布的细节层次控制，需在环境持有车辆网格索引(env.vehicles)且路网已绘制到画布后创建
+
+    Args:
+        env (HighwayEnvironment): 仿真环境
+        road_network (RoadNetwork): 已构建RoadGraph的路网
+        canvas (tkinter.Canvas): 仿真画布
+        width (float): 画布宽度（像素数量），与RoadNetwork.draw相同
+        height (float): 画布高度（像素数量），与RoadNetwork.draw相同
+        zoom (float): 显示车辆图形的最小缩放倍数
+        max_sprites (int): 视口内最多显示的车辆图形数，超过时显示热力条
+        saturation (float): 颜色最深的密度（辆/km）
+    """
+
+    def __init__(
+            self,
+            env: HighwayEnvironment,
+            road_network: RoadNetwork,
+            canvas: tkinter.Canvas,
+            width: float,
+            height: float,
+            zoom: float = 4.0,
+            max_sprites: int = 500,
+            saturation: float = 20.0,
+    ):
+        self.env = env
+        self.canvas = canvas
+        self.zoom = zoom
+        self.max_sprites = max_sprites
+        self.sprite_mode = False
+
+        graph = road_network.graph
+        source = np.repeat(np.arange(graph.node_num), graph.out_degree)
+        target = graph.indices
+        # 等距圆柱投影近似的路段长度(km)
+        lat = np.radians((graph.latitude[source] + graph.latitude[target]) / 2)
+        dx = (graph.longitude[target] - graph.longitude[source]) * np.cos(lat) * 111.32
+        dy = (graph.latitude[target] - graph.latitude[source]) * 110.57
+        # 每km一辆车对应的颜色档位
+        per_vehicle = len(HEAT_COLORS) / (np.maximum(np.hypot(dx, dy), 0.1) * saturation)
+
+        xs = road_network.lon2x(graph.longitude, width).tolist()
+        ys = (height - road_network.lat2y(graph.latitude, width)).tolist()
+        # (出发位置, 到达位置) -> [画布线条, 车辆数, 颜色档位(-1表示无车), 每辆车的档位增量]
+        self.__strips: Dict[Tuple[int, int], list] = {}
+        for u, v, k in zip(source.tolist(), target.tolist(), per_vehicle.tolist()):
+            item = canvas.create_line(
+                xs[u], ys[u], xs[v], ys[v], width=STRIP_WIDTH, fill="", tags=STRIP_TAG
+            )
+            self.__strips[(u, v)] = [item, 0, -1, k]
+        self.__dirty = set()
+
+        # 车辆 -> (路段, 创建图形的函数)
+        self.__vehicles: Dict[Hashable, tuple] = {}
+        self.__sprites: Dict[Hashable, sim.Animate2dBase] = {}
+        self.__view_key: Optional[tuple] = None
+        self.__viewport: Tuple[float, float, float, float] = (0, 0, 0, 0)
+
+    def enter(
+            self,
+            vehicle: Hashable,
+            segment: Tuple[int, int],
+            bounds: Tuple[float, float, float, float],
+            make_sprite: Callable[[], sim.Animate2dBase],
+    ) -> None:
+        """
+        车辆开始在路段上行驶
+
+        Args:
+            vehicle (Hashable): 车辆
+            segment (Tuple[int, int]): 路段两端位置的Location.index
+            bounds (Tuple[float, float, float, float]): 路段在车辆坐标中的外接矩形(x0, y0, x1, y1)
+            make_sprite (Callable[[], sim.Animate2dBase]): 创建车辆2D动画对象的函数
+
+        Returns:
+
+        """
+        self.__vehicles[vehicle] = (segment, make_sprite)
+        strip = self.__strips.get(segment)
+        if strip is not None:
+            strip[1] += 1
+            self.__dirty.add(segment)
+        if self.sprite_mode and self.__in_viewport(bounds):
+            if len(self.__sprites) >= self.max_sprites:
+                # 视口内车辆过多,下一帧重新选择显示方式
+                self.__view_key = None
+            else:
+                self.__sprites[vehicle] = make_sprite()
+
+    def leave(self, vehicle: Hashable) -> None:
+        """
+        车辆离开当前路段
+
+        Args:
+            vehicle (Hashable): 车辆
+
+        Returns:
+
+        """
+        segment, _ = self.__vehicles.pop(vehicle)
+        strip = self.__strips.get(segment)
+        if strip is not None:
+            strip[1] -= 1
+            self.__dirty.add(segment)
+        sprite = self.__sprites.pop(vehicle, None)
+        if sprite is not None:
+            sprite.remove()
+
+    def update(self, t: float) -> None:
+        """
+        每帧在绘制动画对象前调用：视口变化时重新选择显示方式，并更新密度档位变化的热力条
+
+        Args:
+            t (float): 动画时间
+
+        Returns:
+
+        """
+        g = sim.g
+        origin = self.canvas.coords(g.origin_point)
+        env = self.env
+        key = (origin[0], origin[1], g.scale_factor, env.width(), env.height())
+        if key != self.__view_key:
+            self.__view_key = key
+            self.__viewport = self.__compute_viewport(origin[0], origin[1], g.scale_factor)
+            self.__select_sprites(g.scale_factor)
+
+        canvas = self.canvas
+        for segment in self.__dirty:
+            strip = self.__strips[segment]
+            level = min(int(strip[1] * strip[3]), len(HEAT_COLORS) - 1) if strip[1] > 0 else -1
+            if level != strip[2]:
+                strip[2] = level
+                canvas.itemconfigure(strip[0], fill=HEAT_COLORS[level] if level >= 0 else "")
+        self.__dirty.clear()
+
+    def __compute_viewport(self, origin_x: float, origin_y: float, scale_factor: float) -> Tuple[float, float, float, float]:
+        # Animate2dBase.make_pil_image中画布变换的逆变换
+        env = self.env
+        scale = env.scale()
+        ini_height = env._ini_height
+        x_min = (0 - origin_x) / scale_factor
+        x_max = (env.width() - origin_x) / scale_factor
+        y_min = ini_height - (env.height() - origin_y) / scale_factor
+        y_max = ini_height + origin_y / scale_factor
+        return (
+            env.x0() + x_min / scale,
+            env.y0() + y_min / scale,
+            env.x0() + x_max / scale,
+            env.y0() + y_max / scale,
+        )
+
+    def __in_viewport(self, bounds: Tuple[float, float, float, float]) -> bool:
+        x0, y0, x1, y1 = self.__viewport
+        bx0, by0, bx1, by1 = bounds
+        return min(bx0, bx1) <= x1 and x0 <= max(bx0, bx1) and min(by0, by1) <= y1 and y0 <= max(by0, by1)
+
+    def __select_sprites(self, scale_factor: float) -> None:
+        sprite_mode = False
+        if scale_factor >= self.zoom:
+            visible = self.env.vehicles.query(*self.__viewport)
+            sprite_mode = len(visible) <= self.max_sprites
+
+        wanted = set(visible) if sprite_mode else set()
+        for vehicle in [x for x in self.__sprites if x not in wanted]:
+            self.__sprites.pop(vehicle).remove()
+        for vehicle in wanted:
+            if vehicle not in self.__sprites and vehicle in self.__vehicles:
+                self.__sprites[vehicle] = self.__vehicles[vehicle][1]()
+
+        if sprite_mode != self.sprite_mode:
+            self.sprite_mode = sprite_mode
+            self.canvas.itemconfigure(STRIP_TAG, state="hidden" if sprite_mode else "normal")
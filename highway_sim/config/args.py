@@ -14,6 +14,33 @@ LOG_FILE = "../log/statistics.log"
 # Animation
 ENABLE_3D = True
 ENABLE_2D = True
+ENABLE_LOD = False
+LOD_ZOOM = 4.0
+LOD_MAX_SPRITES = 500
+
+# Simulation
+EVENT_LIST = "heap"
+ENGINE = "des"
+ENABLE_CACHE = True
+KEEP_SAMPLES = True
+TRACE_FILE = None
+HOP_TRACE = None
+HOP_TRACE_FORMAT = "npy"
+RESULTS_FILE = None
+FLOW_FILE = None
+FLOW_BIN_MINUTES = 15
+OD_FILE = None
+OD_SPARSE = False
+
+# Replication
+REPLICATIONS = 1
+WORKERS = None
+SEED = None
+
+# Sweep
+SWEEP_GRID = []
+SWEEP_LHS = 0
+SWEEP_OUTPUT = "../log/sweep.csv"
 
 # 当您执行 import config 时，整个 config 模块被导入，您需要通过 ENABLE_LOG 来访问和修改其中的变量。
 # 当您执行 from config import ENABLE_LOG 时，ENABLE_LOG 变量被导入到当前模块的命名空间中，
@@ -39,6 +66,27 @@ class Parser:
     - --log-file: 日志文件路径
     - --d2: 是否开启2D动画
     - --d3: 是否开启3D动画
+    - --lod: 2D动画启用细节层次，缩小时显示路段密度热力条
+    - --lod-zoom: 显示车辆图形的最小缩放倍数
+    - --lod-max-sprites: 视口内最多显示的车辆图形数
+    - --event-list: 未来事件列表实现（heap/calendar）
+    - --engine: 仿真引擎（des: 逐车离散事件仿真, vectorized: 向量化采样，仅无界面运行）
+    - --no-cache: 不使用路网解析缓存，总是重新解析源文件
+    - --streaming-stats: 只保留流式统计(直方图、均值方差、分位数草图)，不保存逐个样本
+    - --trace-file: 统计事件的二进制追踪文件路径，默认不输出
+    - --hop-trace: 逐段行程追踪的输出路径(npy格式为目录)，默认不输出
+    - --hop-trace-format: 逐段行程追踪的文件格式（npy/arrow/parquet）
+    - --results-file: 统计结果的.npz文件路径(verify.py读取)，默认不输出
+    - --flow-file: 分位置流量与占用矩阵的.npz文件路径，默认不统计
+    - --flow-bin-minutes: 分位置流量的时间段长度（分钟）
+    - --od-file: 出入口矩阵的.npz文件路径，默认不统计
+    - --od-sparse: 出入口矩阵使用稀疏存储
+    - --replications: 重复实验次数（replication.py）
+    - --workers: 重复实验的进程数，默认CPU核数
+    - --seed: 重复实验的根种子，默认随机
+    - --sweep-grid: 参数网格，形如NAME=v1,v2，可重复给出（sweep.py）
+    - --sweep-lhs: 拉丁超立方采样点数，大于0时忽略--sweep-grid
+    - --sweep-output: 参数扫描结果表路径
     """
 
     def __init__(self):
@@ -48,13 +96,43 @@ class Parser:
         parser.add_argument('--log-file', type=str, default='../log/statistics.log', help='Logging file')
         parser.add_argument('--d2', action='store_true', help='Enable 2D visualization')
         parser.add_argument('--d3', action='store_true', help='Enable 3D visualization')
+        parser.add_argument('--lod', action='store_true', help='Enable level-of-detail 2D rendering')
+        parser.add_argument('--lod-zoom', type=float, default=4.0, help='Minimum zoom for individual vehicles')
+        parser.add_argument('--lod-max-sprites', type=int, default=500,
+                            help='Maximum individual vehicles in the viewport')
+        parser.add_argument('--event-list', type=str, default='heap', choices=['heap', 'calendar'],
+                            help='Future event list implementation')
+        parser.add_argument('--engine', type=str, default='des', choices=['des', 'vectorized'],
+                            help='Simulation engine (vectorized only in headless mode)')
+        parser.add_argument('--no-cache', action='store_true', help='Disable road network parse cache')
+        parser.add_argument('--streaming-stats', action='store_true',
+                            help='Keep only bounded-memory streaming statistics instead of every sample')
+        parser.add_argument('--trace-file', type=str, default=None, help='Binary trace file for statistics events')
+        parser.add_argument('--hop-trace', type=str, default=None, help='Columnar per-hop trace output path')
+        parser.add_argument('--hop-trace-format', type=str, default='npy', choices=['npy', 'arrow', 'parquet'],
+                            help='Per-hop trace file format')
+        parser.add_argument('--results-file', type=str, default=None, help='Statistics results .npz file')
+        parser.add_argument('--flow-file', type=str, default=None, help='Per-gantry flow matrix .npz file')
+        parser.add_argument('--flow-bin-minutes', type=float, default=15, help='Per-gantry flow time bin (minutes)')
+        parser.add_argument('--od-file', type=str, default=None, help='Origin-destination matrix .npz file')
+        parser.add_argument('--od-sparse', action='store_true', help='Store the origin-destination matrix sparsely')
+        parser.add_argument('--replications', type=int, default=1, help='Number of independent replications')
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes for replications')
+        parser.add_argument('--seed', type=int, default=None, help='Root seed for replications')
+        parser.add_argument('--sweep-grid', type=str, action='append', default=[],
+                            help='Parameter grid NAME=v1,v2 (repeatable)')
+        parser.add_argument('--sweep-lhs', type=int, default=0, help='Latin hypercube sample size')
+        parser.add_argument('--sweep-output', type=str, default='../log/sweep.csv', help='Sweep results table')
         self.parser = parser
         args = parser.parse_args()
         self.__update_config(args)
 
     @classmethod
     def __update_config(cls, args: argparse.Namespace) -> None:
-        global ENABLE_LOG, LOG_LEVEL, LOG_FILE, ENABLE_2D, ENABLE_3D
+        global ENABLE_LOG, LOG_LEVEL, LOG_FILE, ENABLE_2D, ENABLE_3D, EVENT_LIST, ENGINE, ENABLE_CACHE, KEEP_SAMPLES
+        global TRACE_FILE, HOP_TRACE, HOP_TRACE_FORMAT, RESULTS_FILE, FLOW_FILE, FLOW_BIN_MINUTES
+        global OD_FILE, OD_SPARSE, ENABLE_LOD, LOD_ZOOM, LOD_MAX_SPRITES
+        global REPLICATIONS, WORKERS, SEED, SWEEP_GRID, SWEEP_LHS, SWEEP_OUTPUT
 
         if args.log:
             ENABLE_LOG = True
@@ -78,3 +156,24 @@ class Parser:
             ENABLE_3D = True
         else:
             ENABLE_3D = False
+        ENABLE_LOD = args.lod
+        LOD_ZOOM = args.lod_zoom
+        LOD_MAX_SPRITES = args.lod_max_sprites
+        EVENT_LIST = args.event_list
+        ENGINE = args.engine
+        ENABLE_CACHE = not args.no_cache
+        KEEP_SAMPLES = not args.streaming_stats
+        TRACE_FILE = args.trace_file
+        HOP_TRACE = args.hop_trace
+        HOP_TRACE_FORMAT = args.hop_trace_format
+        RESULTS_FILE = args.results_file
+        FLOW_FILE = args.flow_file
+        FLOW_BIN_MINUTES = args.flow_bin_minutes
+        OD_FILE = args.od_file
+        OD_SPARSE = args.od_sparse
+        REPLICATIONS = args.replications
+        WORKERS = args.workers
+        SEED = args.seed
+        SWEEP_GRID = args.sweep_grid
+        SWEEP_LHS = args.sweep_lhs
+        SWEEP_OUTPUT = args.sweep_output
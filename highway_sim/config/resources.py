@@ -4,3 +4,5 @@
 
 PROVINCE: str = "山东省"
 RESOURCE_PATH: str = r"../resources/"
+# 路网解析缓存,相对于省份数据目录
+ROAD_NETWORK_CACHE: str = r"cache/road_network.pkl"
@@ -0,0 +1,211 @@
+"""
+路网解析结果缓存模块
+
+功能概述：
+解析gantry.xlsx等表格是短时仿真启动耗时的主要部分。本模块把解析得到的路网保存为带版本号的二进制快照，
+下次启动时通过一次反序列化恢复，避免重新读取Excel
+
+缓存格式：
+    文件中依次保存两个pickle对象：
+    1. 头部：缓存版本号与各源文件的(大小, 修改时间, sha256)
+    2. 快照：以整数下标表示的扁平路网数据(位置属性、上下游关系、各索引字典、入口概率)，
+       不直接序列化对象图，避免长链路上的深层递归
+
+失效规则：
+    - 版本号不一致时失效
+    - 源文件大小与修改时间均未变化时直接使用
+    - 否则重新计算sha256，内容一致时仍可使用，不一致时失效并重新解析
+
+派生结构(别名表、路网图、经纬度范围)不写入缓存，加载后由Parser重新构建
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import pickle
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from highway_sim.entity import location
+from highway_sim.entity.location import Gantry, Location, LocationWithProb, TollPlaza
+
+if TYPE_CHECKING:
+    from highway_sim.data_parser.road_network import RoadNetwork
+
+logger = logging.getLogger(__name__)
+
+# 快照结构变化时需要递增
+CACHE_VERSION = 1
+
+_GANTRY = "G"
+_TOLL_PLAZA = "T"
+
+
+def file_signature(path: str, with_hash: bool = True) -> Tuple[int, int, Optional[str]]:
+    """
+    计算文件签名
+
+    Args:
+        path (str): 文件路径
+        with_hash (bool): 是否计算sha256
+
+    Returns:
+        Tuple[int, int, Optional[str]]: (大小, 修改时间ns, sha256)
+    """
+    st = os.stat(path)
+    digest = None
+    if with_hash:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+    return st.st_size, st.st_mtime_ns, digest
+
+
+def _is_fresh(sources: Dict[str, Tuple[int, int, Optional[str]]], paths: List[str]) -> bool:
+    if sorted(sources) != sorted(paths):
+        return False
+    for path in paths:
+        if not os.path.exists(path):
+            return False
+        size, mtime, digest = sources[path]
+        now_size, now_mtime, _ = file_signature(path, with_hash=False)
+        if (size, mtime) == (now_size, now_mtime):
+            continue
+        if size != now_size or file_signature(path)[2] != digest:
+            return False
+    return True
+
+
+def _snapshot(rn: RoadNetwork) -> dict:
+    locations: List[Location] = []
+    index: Dict[int, int] = {}
+    for group in (rn.hex_2_entrance.values(), rn.id_2_gantry.values(), rn.hex_2_exit.values()):
+        for x in group:
+            if id(x) not in index:
+                index[id(x)] = len(locations)
+                locations.append(x)
+
+    nodes = []
+    for x in locations:
+        if isinstance(x, Gantry):
+            extra = (_GANTRY, x._hex_code_of_reverse_gantry, x._gantry_type.name)
+        else:
+            extra = (_TOLL_PLAZA, x._supported_gantry_id, x._tp_type.name)
+        nodes.append((x.name, x._id, x.hex_code, x.longitude, x.latitude) + extra)
+
+    return {
+        "nodes": nodes,
+        "downstream": [[(index[id(lwp.l)], lwp.p) for lwp in x.downstream] for x in locations],
+        "upstream": [[index[id(u)] for u in x.upstream] for x in locations],
+        "id_2_gantry": {k: index[id(v)] for k, v in rn.id_2_gantry.items()},
+        "hex_2_gantry": {k: index[id(v)] for k, v in rn.hex_2_gantry.items()},
+        "hex_2_entrance": {k: index[id(v)] for k, v in rn.hex_2_entrance.items()},
+        "hex_2_exit": {k: index[id(v)] for k, v in rn.hex_2_exit.items()},
+        "entrances": [index[id(x)] for x in rn.entrances],
+        "valid_entrance_hex_set": sorted(rn.valid_entrance_hex_set),
+        "province_entrances": [index[id(x)] for x in rn.province_entrances],
+        "entrances_with_prob": [(index[id(x)], p) for x, p in rn.entrances_with_prob],
+        "entrances_all": rn.entrances_all,
+        "enable_get_next_by_prob": location.enable_get_next_by_prob,
+    }
+
+
+def _restore(rn: RoadNetwork, snapshot: dict) -> None:
+    locations: List[Location] = []
+    for name, id_str, hex_code, longitude, latitude, kind, extra, type_name in snapshot["nodes"]:
+        if kind == _GANTRY:
+            x = Gantry(
+                name=name,
+                _id=id_str,
+                longitude=longitude,
+                latitude=latitude,
+                hex_code=hex_code,
+                _hex_code_of_reverse_gantry=extra,
+                _gantry_type=Gantry.Type[type_name],
+            )
+        else:
+            x = TollPlaza(
+                name=name,
+                _id=id_str,
+                longitude=longitude,
+                latitude=latitude,
+                hex_code=hex_code,
+                _tp_type=TollPlaza.Type[type_name],
+                _supported_gantry_id=extra,
+            )
+        locations.append(x)
+    for x, downstream, upstream in zip(locations, snapshot["downstream"], snapshot["upstream"]):
+        x.downstream = [LocationWithProb(locations[i], p) for i, p in downstream]
+        x.upstream = [locations[i] for i in upstream]
+
+    rn.id_2_gantry = {k: locations[i] for k, i in snapshot["id_2_gantry"].items()}
+    rn.hex_2_gantry = {k: locations[i] for k, i in snapshot["hex_2_gantry"].items()}
+    rn.hex_2_entrance = {k: locations[i] for k, i in snapshot["hex_2_entrance"].items()}
+    rn.hex_2_exit = {k: locations[i] for k, i in snapshot["hex_2_exit"].items()}
+    rn.entrances = [locations[i] for i in snapshot["entrances"]]
+    rn.valid_entrance_hex_set = set(snapshot["valid_entrance_hex_set"])
+    rn.province_entrances = [locations[i] for i in snapshot["province_entrances"]]
+    rn.entrances_with_prob = [(locations[i], p) for i, p in snapshot["entrances_with_prob"]]
+    rn.entrances_all = snapshot["entrances_all"]
+    location.enable_get_next_by_prob = snapshot["enable_get_next_by_prob"]
+
+
+def load(rn: RoadNetwork, cache_file: str, sources: List[str]) -> bool:
+    """
+    从缓存恢复路网，缓存不存在或失效时不修改路网
+
+    Args:
+        rn (RoadNetwork): 待填充的路网
+        cache_file (str): 缓存文件路径
+        sources (List[str]): 源文件路径
+
+    Returns:
+        bool: 是否成功从缓存恢复
+    """
+    if not os.path.exists(cache_file):
+        return False
+    try:
+        with open(cache_file, "rb") as f:
+            header = pickle.load(f)
+            if header.get("version") != CACHE_VERSION or not _is_fresh(header["sources"], sources):
+                logger.info("road network cache %s is stale", cache_file)
+                return False
+            snapshot = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, KeyError, AttributeError) as e:
+        logger.warning("failed to read road network cache %s: %s", cache_file, e)
+        return False
+    _restore(rn, snapshot)
+    logger.info("road network loaded from cache %s", cache_file)
+    return True
+
+
+def save(rn: RoadNetwork, cache_file: str, sources: List[str]) -> None:
+    """
+    将解析完成的路网写入缓存，先写临时文件再替换，避免并发读取到不完整的文件
+
+    Args:
+        rn (RoadNetwork): 已解析的路网
+        cache_file (str): 缓存文件路径
+        sources (List[str]): 源文件路径
+
+    Returns:
+
+    """
+    header = {
+        "version": CACHE_VERSION,
+        "sources": {path: file_signature(path) for path in sources},
+    }
+    os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_file, "wb") as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(_snapshot(rn), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logger.warning("failed to write road network cache %s: %s", cache_file, e)
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
@@ -26,16 +26,27 @@
         - 通过min/max经纬度计算坐标映射比例
         - lon2x()/lat2y()方法实现经纬度到画布坐标的线性映射
         - draw()方法实现基于Tkinter的可视化绘制
+        - draw()直接遍历数组化路网图的边，不再递归遍历对象图
+        - spatial_index()在lon2x/lat2y空间中为门架和路段构建均匀网格索引，draw(viewport=...)只访问与视口相交的网格
 
     2. 拓扑关系构建：
         - 解析relation.xlsx建立门架上下游关系
         - 使用LocationWithProb对象存储带概率的下游节点
-        - 入口收费站通过entrances_with_prob实现按流量加权随机
+        - 解析下游概率后为每个位置构建别名表，O(1)选择下游门架
+        - 入口收费站通过entrances_with_prob实现按流量加权随机，解析后构建别名表entrance_table，O(1)选择入口
 
-    3. 数据清洗规则：
+    3. 数组化图表示：
+        - 解析完成后构建RoadGraph(CSR结构, 整数节点编号, 经纬度数组)，保存在road_network.graph
+        - 采样、渲染、分析可直接使用连续数组而不遍历对象图
+
+    4. 数据清洗规则：
         - 过滤状态非"运行"的收费站
         - 移除无有效下游的入口节点
         - 处理重复门架Hex编码(保留首次出现实例)
+        - 各文件只读取需要的列并按列整体转换类型，不逐行构造Series
+
+    5. 解析缓存：
+        - 解析结果保存为二进制快照(见cache模块)，源文件未变化时启动直接加载
 
 使用示例::
 
@@ -48,20 +59,32 @@ from __future__ import annotations
 
 import logging
 import random
-import tkinter
-from typing import Dict, Tuple, List, Set
+import time
+from typing import Callable, Dict, Tuple, List, Set, Optional, TYPE_CHECKING
 
+import numpy as np
 import pandas as pd
 
 from highway_sim.config import fitting_data as fit
 from highway_sim.config import resources
+from highway_sim.data_parser import cache
 from highway_sim.entity import location
+from highway_sim.entity.graph import RoadGraph
 from highway_sim.entity.location import TollPlaza, Gantry, Location, LocationWithProb
 from highway_sim.stats import default as stats_default
 from highway_sim.util import parser
+from highway_sim.util.alias import AliasTable
+from highway_sim.util.spatial import GridIndex
+
+if TYPE_CHECKING:
+    # 仅用于类型标注,无界面运行时不导入tkinter
+    import tkinter
 
 logger = logging.getLogger(__name__)
 
+# 空间索引每个坐标轴上的网格数
+SPATIAL_CELLS = 64
+
 
 class RoadNetwork:
     """
@@ -80,12 +103,47 @@ class RoadNetwork:
         self.hex_2_exit: Dict[str, TollPlaza] = {}
         self.province_entrances: List[Gantry] = []
         self.entrances_with_prob: List[Tuple[TollPlaza, float]] = []
+        # entrances_with_prob的别名表,与入口数量无关的O(1)抽样
+        self.entrance_table: Optional[AliasTable] = None
         self.entrances_all: int = 0
         self.min_latitude = 90
         self.max_latitude = -90
         self.min_longitude = 180
         self.max_longitude = -180
         self.scale_factor = 1.0
+        # 数组化路网图,由build_graph构建
+        self.graph: Optional[RoadGraph] = None
+        # (分辨率, scale_factor) -> (门架索引, 路段索引),由spatial_index构建
+        self.__spatial: Dict[Tuple[float, float], Tuple[GridIndex, GridIndex]] = {}
+
+    def build_entrance_table(self) -> None:
+        """
+        根据entrances_with_prob构建入口选择别名表，只需在解析完成后调用一次
+
+        Returns:
+
+        """
+        if self.entrances_with_prob:
+            self.entrance_table = AliasTable([p for _, p in self.entrances_with_prob])
+        else:
+            self.entrance_table = None
+
+    def build_graph(self) -> RoadGraph:
+        """
+        构建CSR形式的路网图，节点依次为入口收费站、门架、出口收费站
+
+        Returns:
+            RoadGraph: 路网图
+        """
+        self.graph = RoadGraph.from_locations(
+            [
+                self.hex_2_entrance.values(),
+                self.hex_2_gantry.values(),
+                self.hex_2_exit.values(),
+            ]
+        )
+        self.__spatial.clear()
+        return self.graph
 
     def lon2x(self, lon: float, resolution) -> float:
         """
@@ -130,10 +188,13 @@ class RoadNetwork:
             height: float,
             road_color: str = "black",
             create_oval: bool = True,
+            viewport: Tuple[float, float, float, float] = None,
+            tags: str = "",
+            oval_radius: float = 2,
     ) -> None:
         """
         根据解析的门架信息在传入的画布中绘制地图，道路用两条门架中的线表示，可以选择是否绘制门架
-        自动将门架最长轴对齐到画布的相应轴
+        自动将门架最长轴对齐到画布的相应轴；给出viewport时只绘制网格索引中与之相交的路段与门架
 
         Args:
             cv (tkinter.Canvas): 画布对象
@@ -141,33 +202,64 @@ class RoadNetwork:
             height (float): 画布高度（像素数量）
             road_color  (str): 道路颜色
             create_oval (bool): 是否绘制门架
+            viewport (Tuple[float, float, float, float]): 画布坐标中的绘制范围(x0, y0, x1, y1)，None表示全部绘制
+            tags (str): 绘制的画布对象的标签
+            oval_radius (float): 门架圆点的半径（像素数量）
 
         Returns:
 
         """
+        graph = self.graph
+        xs = self.lon2x(graph.longitude, width).tolist()
+        ys = (height - self.lat2y(graph.latitude, width)).tolist()
+        source = np.repeat(np.arange(graph.node_num), graph.out_degree).tolist()
+        indices = graph.indices.tolist()
+        if viewport is None:
+            edges, nodes = range(graph.edge_num), range(graph.node_num)
+        else:
+            # 画布y轴向下,索引空间y轴向上
+            x0, y0, x1, y1 = viewport
+            gantries, roads = self.spatial_index(width)
+            edges = roads.query(x0, height - y0, x1, height - y1)
+            nodes = gantries.query(x0, height - y0, x1, height - y1)
+
+        for edge in edges:
+            u, v = source[edge], indices[edge]
+            cv.create_line(xs[u], ys[u], xs[v], ys[v], width=1, fill=road_color, tags=tags)
+        if create_oval:
+            r = oval_radius
+            for node in nodes:
+                x, y = xs[node], ys[node]
+                tag = cv.create_oval(x - r, y - r, x + r, y + r, fill="gray", tags=tags)
+                gantry = graph.locations[node]
+                cv.tag_bind(tag, "<Button-1>", lambda event, gantry=gantry: print(gantry.name))
+
+    def spatial_index(self, resolution: float) -> Tuple[GridIndex, GridIndex]:
+        """
+        分辨率为resolution的lon2x/lat2y空间中的门架与路段网格索引，按分辨率缓存，需先构建RoadGraph
+        门架以Location.index为键，路段以CSR图中的边号为键(外接矩形为两端位置)
 
-        hex_drawn: Set[str] = set()
-
-        def draw_gantry(gantry: Location, prev: Location = None):
-            if gantry.hex_code in hex_drawn:
-                return
-
-            x = self.lon2x(gantry.longitude, width)
-            y = height - self.lat2y(gantry.latitude, width)
-            hex_drawn.add(gantry.hex_code)
-            if create_oval:
-                tag = cv.create_oval(x - 2, y - 2, x + 2, y + 2, fill="gray")
-                cv.tag_bind(tag, "<Button-1>", lambda event: print(gantry.name))
-            if prev:
-                x_prev = self.lon2x(prev.longitude, width)
-                y_prev = height - self.lat2y(prev.latitude, width)
-                cv.create_line(x_prev, y_prev, x, y, width=1, fill=road_color)
-            for e in gantry.downstream:
-                draw_gantry(e.l, gantry)
+        Args:
+            resolution (float): 窗口分辨率，即坐标轴长度
 
-        for entry in self.hex_2_entrance.values():
-            if entry.hex_code not in hex_drawn:
-                draw_gantry(entry)
+        Returns:
+            Tuple[GridIndex, GridIndex]: (门架索引, 路段索引)
+        """
+        key = (resolution, self.scale_factor)
+        if key not in self.__spatial:
+            graph = self.graph
+            xs = self.lon2x(graph.longitude, resolution).tolist()
+            ys = self.lat2y(graph.latitude, resolution).tolist()
+            cell_size = resolution * self.scale_factor / SPATIAL_CELLS
+            gantries = GridIndex(cell_size)
+            roads = GridIndex(cell_size)
+            for node in range(graph.node_num):
+                gantries.insert(node, xs[node], ys[node])
+            source = np.repeat(np.arange(graph.node_num), graph.out_degree).tolist()
+            for edge, (u, v) in enumerate(zip(source, graph.indices.tolist())):
+                roads.insert(edge, xs[u], ys[u], xs[v], ys[v])
+            self.__spatial[key] = (gantries, roads)
+        return self.__spatial[key]
 
 
 class Parser:
@@ -177,62 +269,108 @@ class Parser:
     从文件中解析道路数据并填充到RoadNetwork实例中
     """
 
-    def __init__(self, road_network: RoadNetwork):
+    def __init__(self, road_network: RoadNetwork, use_cache: bool = True):
         self.road_network = road_network
+        self.use_cache = use_cache
+        # 源文件路径 -> (行数, 耗时秒)，仅在实际解析源文件时记录
+        self.timings: Dict[str, Tuple[int, float]] = {}
+        # 门架hex -> (下游hex -> 边)，在解析上下游关系时建立，同一下游hex保留首次出现的边
+        self.__downstream_index: Dict[str, Dict[str, LocationWithProb]] = {}
         self.__ENTRANCE_INDEX = 7
         self.__ENTRANCE_NAME = "省界入口"
         self.__EXIT_NAME = "省界出口"
+        province_path = resources.RESOURCE_PATH + rf"{resources.PROVINCE}/"
+        self.__GANTRY_FILE = province_path + "gantry.xlsx"
+        self.__CHARGE_FILE = province_path + "charge.xlsx"
+        self.__RELATION_FILE = province_path + "relation.xlsx"
+        self.__ENTRY_COUNT_FILE = province_path + "statisticalData/hourly_entry_count.csv"
+        self.__NEXT_GANTRY_PROB_FILE = province_path + "statisticalData/driver_normal.csv"
+        self.__CACHE_FILE = province_path + resources.ROAD_NETWORK_CACHE
+
+    def sources(self) -> List[str]:
+        """
+        路网解析依赖的全部源文件，任一文件变化都会使缓存失效
+
+        Returns:
+            List[str]: 源文件路径
+        """
+        return [
+            self.__GANTRY_FILE,
+            self.__CHARGE_FILE,
+            self.__RELATION_FILE,
+            self.__ENTRY_COUNT_FILE,
+            self.__NEXT_GANTRY_PROB_FILE,
+        ]
 
     def parse(self) -> None:
         """
         执行完整解析流程
+        启用缓存且缓存有效时直接从缓存恢复，否则解析源文件并写入缓存；派生结构每次重新构建
         """
-        self.__parse_gantry_information()
-        self.__parse_toll_plaza()
-        self.__parse_relation()
-        self.road_network.entrances = list(self.road_network.hex_2_entrance.values())
-        self.__clean_invalid_entrances()
-        for e in self.entrances:
-            self.road_network.valid_entrance_hex_set.add(e.hex_code)
-        self.__calculate_entrance_prob()
-        self.__parse_next_gantry_prob()
+        if not (self.use_cache and cache.load(self.road_network, self.__CACHE_FILE, self.sources())):
+            self.__parse_sources()
+            if self.use_cache:
+                cache.save(self.road_network, self.__CACHE_FILE, self.sources())
+        self.road_network.build_entrance_table()
+        self.__build_alias_tables()
         gantries = list(self.road_network.hex_2_gantry.values())
         for g in gantries:
             self.road_network.min_latitude = min(self.road_network.min_latitude, g.latitude)
             self.road_network.max_latitude = max(self.road_network.max_latitude, g.latitude)
             self.road_network.min_longitude = min(self.road_network.min_longitude, g.longitude)
             self.road_network.max_longitude = max(self.road_network.max_longitude, g.longitude)
+        self.road_network.build_graph()
+
+    def __parse_sources(self) -> None:
+        """
+        从源文件解析路网
+        """
+        self.__ingest(self.__GANTRY_FILE, self.__parse_gantry_information)
+        self.__ingest(self.__CHARGE_FILE, self.__parse_toll_plaza)
+        self.__ingest(self.__RELATION_FILE, self.__parse_relation)
+        self.road_network.entrances = list(self.road_network.hex_2_entrance.values())
+        self.__clean_invalid_entrances()
+        for e in self.entrances:
+            self.road_network.valid_entrance_hex_set.add(e.hex_code)
+        self.__ingest(self.__ENTRY_COUNT_FILE, self.__calculate_entrance_prob)
+        self.__ingest(self.__NEXT_GANTRY_PROB_FILE, self.__parse_next_gantry_prob)
 
-    def __parse_gantry_information(self) -> None:
+    def __ingest(self, path: str, step: Callable[[], int]) -> None:
+        """
+        执行单个文件的解析步骤，记录行数与耗时
+
+        Args:
+            path (str): 源文件路径
+            step (Callable[[], int]): 解析步骤，返回读取的行数
+        """
+        start = time.perf_counter()
+        rows = step()
+        seconds = time.perf_counter() - start
+        self.timings[path] = (rows, seconds)
+        logger.debug("parsed %s: %d rows in %.3fs", path, rows, seconds)
+
+    def __parse_gantry_information(self) -> int:
         """
         未清理停用的数据,原因是gantry与relation导出时间存在差异,若清理可能导致建立relation出现问题
         """
-        df = pd.read_excel(
-            resources.RESOURCE_PATH + rf"{resources.PROVINCE}/gantry.xlsx",
-            dtype=str,
-            na_filter=False,
+        names, ids, longitudes, latitudes, hex_codes, reverse_hex_codes, type_values = parser.read_columns(
+            self.__GANTRY_FILE,
+            {0: str, 1: str, 2: float, 3: float, 4: str, 5: str, self.__ENTRANCE_INDEX: str},
         )
-        for row in [x[1] for x in df.iterrows()]:
-            name = row.iloc[0].strip()
-            id_str = row.iloc[1].strip()
-            longitude = float(row.iloc[2])
-            latitude = float(row.iloc[3])
-            hex_code = row.iloc[4].strip()
-            hex_code_of_reverse_gantry = row.iloc[5].strip()
-            type_value = row.iloc[self.__ENTRANCE_INDEX].strip()
-            gantry_type = (
-                Gantry.Type.PROVINCE_ENTRANCE
-                if type_value == self.__ENTRANCE_NAME
-                else (
-                    Gantry.Type.PROVINCE_EXIT
-                    if type_value == self.__EXIT_NAME
-                    else Gantry.Type.COMMON
-                )
-            )
+        value_2_type = {
+            self.__ENTRANCE_NAME: Gantry.Type.PROVINCE_ENTRANCE,
+            self.__EXIT_NAME: Gantry.Type.PROVINCE_EXIT,
+        }
+        hex_2_gantry = self.road_network.hex_2_gantry
+        id_2_gantry = self.road_network.id_2_gantry
+        for name, id_str, longitude, latitude, hex_code, hex_code_of_reverse_gantry, type_value in zip(
+            names, ids, longitudes.tolist(), latitudes.tolist(), hex_codes, reverse_hex_codes, type_values
+        ):
             # 收费站id不会相同,但是hex会
-            if hex_code in self.road_network.hex_2_gantry:
-                self.road_network.id_2_gantry[id_str] = self.road_network.hex_2_gantry[hex_code]
+            if hex_code in hex_2_gantry:
+                id_2_gantry[id_str] = hex_2_gantry[hex_code]
                 continue
+            gantry_type = value_2_type.get(type_value, Gantry.Type.COMMON)
             gantry = Gantry(
                 name=name,
                 _id=id_str,
@@ -244,44 +382,31 @@ class Parser:
             )
             if gantry_type == Gantry.Type.PROVINCE_ENTRANCE:
                 self.road_network.province_entrances.append(gantry)
-            self.road_network.id_2_gantry[id_str] = gantry
-            self.road_network.hex_2_gantry[hex_code] = gantry
-
-    def __parse_toll_plaza(self) -> None:
-        df = pd.read_excel(
-            resources.RESOURCE_PATH + rf"{resources.PROVINCE}/charge.xlsx",
-            dtype=str,
-            na_filter=False,
+            id_2_gantry[id_str] = gantry
+            hex_2_gantry[hex_code] = gantry
+        return len(names)
+
+    def __parse_toll_plaza(self) -> int:
+        names, ids, hex_codes, longitudes, latitudes, gantry_ids, status = parser.read_columns(
+            self.__CHARGE_FILE,
+            {0: str, 1: str, 2: str, 3: str, 4: str, 5: str, 6: str},
         )
-        for row in [x[1] for x in df.iterrows()]:
-            name = row.iloc[0].strip()
-            id_str = row.iloc[1].strip()
-            hex_code = row.iloc[2].strip()
-            tmp = row.iloc[3]
-            longitude = float(0 if parser.is_null_cell(tmp) else tmp)
-            tmp = row.iloc[4]
-            latitude = float(0 if parser.is_null_cell(tmp) else tmp)
-            tmp = row.iloc[5].strip()
-            gantry_id = "null" if parser.is_null_cell(tmp) else tmp
-            status_str = row.iloc[6]
-
-            if status_str != "运行" or "分站" in name:
-                continue
+        longitudes = np.where(parser.null_mask(longitudes), "0", longitudes).astype(np.float64)
+        latitudes = np.where(parser.null_mask(latitudes), "0", latitudes).astype(np.float64)
+        gantry_ids = np.where(parser.null_mask(gantry_ids), "null", gantry_ids)
+        running = (status == "运行") & ~pd.Series(names, dtype=object).str.contains("分站").to_numpy(dtype=bool)
+
+        for i in np.flatnonzero(running).tolist():
+            name = names[i]
+            row = (name, ids[i], float(longitudes[i]), float(latitudes[i]), hex_codes[i], gantry_ids[i])
             if any(x in name for x in ["入口", "外"]):
-                self.__add_2_hex_2_entrance(
-                    name, id_str, longitude, latitude, hex_code, gantry_id
-                )
+                self.__add_2_hex_2_entrance(*row)
             elif any(x in name for x in ["出口", "内"]):
-                self.__add_2_hex_2_exit(
-                    name, id_str, longitude, latitude, hex_code, gantry_id
-                )
+                self.__add_2_hex_2_exit(*row)
             else:
-                self.__add_2_hex_2_entrance(
-                    name, id_str, longitude, latitude, hex_code, gantry_id
-                )
-                self.__add_2_hex_2_exit(
-                    name, id_str, longitude, latitude, hex_code, gantry_id
-                )
+                self.__add_2_hex_2_entrance(*row)
+                self.__add_2_hex_2_exit(*row)
+        return len(names)
 
     def __add_2_hex_2_entrance(self, n, i, lo, la, h, g) -> None:
         t = TollPlaza.Type.ENTRANCE
@@ -309,49 +434,54 @@ class Parser:
         )
         self.road_network.hex_2_exit[h] = tp
 
-    def __parse_relation(self) -> None:
+    def __parse_relation(self) -> int:
         """
         上下游hex中可能出现门架和收费站的hex, 但是id只会出现门架的id
         若上下游hex中出现收费站hex,则门架id必是该收费站承载门架的id?
         如果是这样感觉可以在parse_toll_plaza处理收费站上下游关系
         """
-        df = pd.read_excel(
-            resources.RESOURCE_PATH + rf"{resources.PROVINCE}/relation.xlsx",
-            dtype=str,
-            na_filter=False,
+        ids, all_up_hexs, all_down_hexs = parser.read_columns(
+            self.__RELATION_FILE,
+            {0: str, 1: str, 2: str},
         )
-        for row in [x[1] for x in df.iterrows()]:
-            id_str = row.iloc[0].strip()
-            up_hexs = row.iloc[1].strip()
-            down_hexs = row.iloc[2].strip()
-
-            if id_str not in self.road_network.id_2_gantry:
+        id_2_gantry = self.road_network.id_2_gantry
+        hex_2_gantry = self.road_network.hex_2_gantry
+        hex_2_entrance = self.road_network.hex_2_entrance
+        hex_2_exit = self.road_network.hex_2_exit
+        index = self.__downstream_index
+        for id_str, up_hexs, down_hexs in zip(ids, all_up_hexs, all_down_hexs):
+            gantry = id_2_gantry.get(id_str)
+            if gantry is None:
                 continue
 
-            gantry = self.road_network.id_2_gantry[id_str]
             if not parser.is_null_cell(up_hexs):
                 hexs: List[str] = up_hexs.split(r"|")
                 for h in hexs:
                     h = h.strip()
-                    if h in self.road_network.hex_2_entrance:
-                        tmp = self.road_network.hex_2_entrance[h]
+                    if h in hex_2_entrance:
+                        tmp = hex_2_entrance[h]
                         tmp.downstream.append(LocationWithProb(gantry, 0))
                         gantry.upstream.append(tmp)
-                    elif h in self.road_network.hex_2_gantry:
-                        tmp = self.road_network.hex_2_gantry[h]
+                    elif h in hex_2_gantry:
+                        tmp = hex_2_gantry[h]
                         gantry.upstream.append(tmp)
 
             if not parser.is_null_cell(down_hexs):
                 hexs: List[str] = down_hexs.split(r"|")
+                edges = index.setdefault(gantry.hex_code, {})
                 for h in hexs:
                     h = h.strip()
-                    if h in self.road_network.hex_2_exit:
-                        tmp = self.road_network.hex_2_exit[h]
+                    if h in hex_2_exit:
+                        tmp = hex_2_exit[h]
                         tmp.upstream.append(gantry)
-                        gantry.downstream.append(LocationWithProb(tmp, 0))
-                    elif h in self.road_network.hex_2_gantry:
-                        tmp = self.road_network.hex_2_gantry[h]
-                        gantry.downstream.append(LocationWithProb(tmp, 0))
+                    elif h in hex_2_gantry:
+                        tmp = hex_2_gantry[h]
+                    else:
+                        continue
+                    lwp = LocationWithProb(tmp, 0)
+                    gantry.downstream.append(lwp)
+                    edges.setdefault(tmp.hex_code, lwp)
+        return len(ids)
 
     def __clean_invalid_entrances(self) -> None:
         """
@@ -362,42 +492,71 @@ class Parser:
         ]
         self.entrances = [x for x in self.road_network.entrances if len(x.downstream) > 0]
 
-    def __calculate_entrance_prob(self) -> None:
+    def __calculate_entrance_prob(self) -> int:
         # verified
-        df = pd.read_csv(
-            resources.RESOURCE_PATH
-            + rf"{resources.PROVINCE}/statisticalData/hourly_entry_count.csv",
-            dtype=str,
-            na_filter=False,
+        hex_codes, nums = parser.read_columns(
+            self.__ENTRY_COUNT_FILE,
+            {0: str, 2: np.int64},
         )
-        hex_2_count = {}
-        for row in [x[1] for x in df.iterrows()]:
-            h = row.iloc[0].strip()
-            if h in self.road_network.valid_entrance_hex_set:
-                num = int(row.iloc[2])
-                self.road_network.entrances_all += num
-                hex_2_count[h] = num + hex_2_count.get(h, 0)
+        valid = pd.Series(hex_codes, dtype=object).isin(self.road_network.valid_entrance_hex_set).to_numpy()
+        # 按首次出现顺序汇总,与逐行累加得到的顺序一致
+        hex_2_count = pd.Series(nums[valid]).groupby(hex_codes[valid], sort=False).sum()
+        self.road_network.entrances_all += int(nums[valid].sum())
         for k, v in hex_2_count.items():
             self.road_network.entrances_with_prob.append(
-                (self.road_network.hex_2_entrance[k], v / self.road_network.entrances_all)
+                (self.road_network.hex_2_entrance[k], int(v) / self.road_network.entrances_all)
             )
+        return len(hex_codes)
 
-    def __parse_next_gantry_prob(self) -> None:
+    def __parse_next_gantry_prob(self) -> int:
         # 文件中的hex_code都是gantry的
         # verified
-        df = pd.read_csv(
-            resources.RESOURCE_PATH
-            + rf"{resources.PROVINCE}/statisticalData/driver_normal.csv",
-            dtype=str,
-            na_filter=False,
+        up_hexs, down_hexs, probs = parser.read_columns(
+            self.__NEXT_GANTRY_PROB_FILE,
+            {0: str, 1: str, 2: np.float64},
         )
         location.enable_get_next_by_prob = True
-        for row in [x[1] for x in df.iterrows()]:
-            up_hex = row.iloc[0].strip()
-            down_hex = row.iloc[1].strip()
-            p = float(row.iloc[2])
-            up = self.road_network.hex_2_gantry[up_hex]
-            for lwp in up.downstream:
-                if lwp.l.hex_code == down_hex:
-                    lwp.p = float(p)
-                    break
+        hex_2_gantry = self.road_network.hex_2_gantry
+        index = self.__downstream_index
+        unknown_up: Dict[str, int] = {}
+        unknown_edge: Dict[Tuple[str, str], int] = {}
+        for up_hex, down_hex, p in zip(up_hexs, down_hexs, probs.tolist()):
+            if up_hex not in hex_2_gantry:
+                unknown_up[up_hex] = unknown_up.get(up_hex, 0) + 1
+                continue
+            lwp = index.get(up_hex, {}).get(down_hex)
+            if lwp is None:
+                unknown_edge[(up_hex, down_hex)] = unknown_edge.get((up_hex, down_hex), 0) + 1
+                continue
+            lwp.p = p
+        if unknown_up:
+            logger.warning(
+                "%d rows in %s reference %d unknown upstream gantries, skipped, e.g. %s",
+                sum(unknown_up.values()),
+                self.__NEXT_GANTRY_PROB_FILE,
+                len(unknown_up),
+                list(unknown_up)[:10],
+            )
+        if unknown_edge:
+            logger.warning(
+                "%d rows in %s reference %d unknown downstream edges, skipped, e.g. %s",
+                sum(unknown_edge.values()),
+                self.__NEXT_GANTRY_PROB_FILE,
+                len(unknown_edge),
+                list(unknown_edge)[:10],
+            )
+        return len(up_hexs)
+
+    def __build_alias_tables(self) -> None:
+        """
+        为所有有下游的位置构建下游选择别名表，概率和偏离1的位置汇总后一次性告警
+        """
+        locations: List[Location] = list(self.road_network.hex_2_gantry.values())
+        locations.extend(self.road_network.hex_2_entrance.values())
+        renormalized = [x.hex_code for x in locations if x.build_alias_table()]
+        if renormalized:
+            logger.warning(
+                "%d locations have downstream probabilities not summing to 1, renormalized, e.g. %s",
+                len(renormalized),
+                renormalized[:10],
+            )
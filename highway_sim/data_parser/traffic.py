@@ -16,11 +16,16 @@
 
 from __future__ import annotations
 
-from typing import Dict
+import logging
+import time
+from typing import Dict, List, Tuple
 
-import pandas as pd
+import numpy as np
 
 from highway_sim.config import resources
+from highway_sim.util import parser
+
+logger = logging.getLogger(__name__)
 
 
 class Traffic:
@@ -39,18 +44,29 @@ class Parser:
 
     def __init__(self, traffic: Traffic):
         self.traffic = traffic
-
-    def __parse_traffic_distribution(self) -> None:
-        df = pd.read_csv(
+        self.__DISTRIBUTION_FILE = (
             resources.RESOURCE_PATH
-            + rf"{resources.PROVINCE}/statisticalData/hourly_traffic_distribution.csv",
-            dtype=str,
-            na_filter=False,
+            + rf"{resources.PROVINCE}/statisticalData/hourly_traffic_distribution.csv"
         )
-        for row in [x[1] for x in df.iterrows()]:
-            hour = int(row.iloc[0])
-            interval = float(row.iloc[2])
-            self.traffic.hour_2_interval_ms[hour] = interval
+        # 源文件路径 -> (行数, 耗时秒)
+        self.timings: Dict[str, Tuple[int, float]] = {}
+
+    def __parse_traffic_distribution(self) -> int:
+        hours, intervals = parser.read_columns(
+            self.__DISTRIBUTION_FILE,
+            {0: np.int64, 2: np.float64},
+        )
+        self.traffic.hour_2_interval_ms.update(zip(hours.tolist(), intervals.tolist()))
+        return len(hours)
+
+    def sources(self) -> List[str]:
+        """
+        交通流量解析依赖的全部源文件
+
+        Returns:
+            List[str]: 源文件路径
+        """
+        return [self.__DISTRIBUTION_FILE]
 
     def parse(self) -> None:
         """
@@ -59,4 +75,8 @@ class Parser:
         Returns:
 
         """
-        self.__parse_traffic_distribution()
+        start = time.perf_counter()
+        rows = self.__parse_traffic_distribution()
+        seconds = time.perf_counter() - start
+        self.timings[self.__DISTRIBUTION_FILE] = (rows, seconds)
+        logger.debug("parsed %s: %d rows in %.3fs", self.__DISTRIBUTION_FILE, rows, seconds)
@@ -0,0 +1,3 @@
+"""
+仿真引擎模块
+"""
@@ -0,0 +1,199 @@
+"""
+向量化行程采样引擎
+
+功能概述：
+容量规划只需要Car/CarGenerator产生的统计结果（出入口小时分布、门架通行时间、总行程时间、经过门架数、出入口计数），
+不需要逐车协程。本模块用NumPy数组一次性采样全部到达时间、入口、路径与行驶时间，
+统计口径与stats/default.py以及逐车仿真保持一致，结果写入仿真器持有的StatsCollector，可沿用record输出。
+收集器启用逐段行程追踪或分位置流量时，每一轮游走的全部路段整批记录，车辆编号为到达顺序(从0开始)
+
+采样逻辑：
+    1. 到达时间：与CarGenerator相同，间隔按当前到达时刻所在小时的相邻3小时区间均匀采样，按小时分块累加
+    2. 入口选择：按PROVINCE_ENTRANCE_RATION选择省界入口(均匀)或收费站入口(按流量加权)
+    3. 路径：在RoadNetwork.graph(CSR结构)上做随机游走，下游概率与Location.effective_downstream_prob一致
+    4. 行驶时间：与Car.get_duration相同的Gamma分布
+
+使用示例::
+
+    simulator = VectorizedSimulator(rn, traffic, seed=1)
+    simulator.run(common.DAY_MILLISECOND)
+    simulator.stats.record(logger)
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from highway_sim.config import common
+from highway_sim.config import fitting_data as fit
+from highway_sim.data_parser.road_network import RoadNetwork
+from highway_sim.data_parser.traffic import Traffic
+from highway_sim.stats.default import StatsCollector
+
+logger = logging.getLogger(__name__)
+
+# 与Car.get_duration中的乘数一致
+_GANTRY_TIMES = 75
+_TOLL_PLAZA_TIMES = 10
+
+
+class VectorizedSimulator:
+    """
+    向量化仿真器，一次运行得到与逐车仿真同口径的统计结果
+
+    Args:
+        road_network (RoadNetwork): 路网
+        traffic (Traffic): 交通流量
+        seed (Optional[int]): 随机种子，None表示随机
+        stats (Optional[StatsCollector]): 统计收集器，None表示新建
+    """
+
+    def __init__(
+            self,
+            road_network: RoadNetwork,
+            traffic: Traffic,
+            seed: Optional[int] = None,
+            stats: Optional[StatsCollector] = None,
+    ):
+        self.rn = road_network
+        self.traffic = traffic
+        self.rng = np.random.default_rng(seed)
+        self.stats = stats if stats is not None else StatsCollector()
+        if road_network.graph is None:
+            road_network.build_graph()
+        self.graph = road_network.graph
+        self.out_degree = self.graph.out_degree
+        self.province_nodes = np.array(
+            [x.index for x in road_network.province_entrances], dtype=np.int64
+        )
+        self.entrance_nodes = np.array(
+            [x.index for x, _ in road_network.entrances_with_prob], dtype=np.int64
+        )
+        self.entrance_cum = np.cumsum([p for _, p in road_network.entrances_with_prob])
+
+    def sample_arrivals(self, duration_ms: float) -> np.ndarray:
+        """
+        采样仿真时长内全部车辆的到达时间，与CarGenerator.gen_interval_ms同分布
+
+        Args:
+            duration_ms (float): 仿真时长（毫秒）
+
+        Returns:
+            np.ndarray: 升序的到达时间（毫秒）
+        """
+        chunks = []
+        t = 0
+        while t < duration_ms:
+            hour_index = int(t / common.HOUR_MILLISECOND)
+            hour = hour_index % 24
+            hours = [(hour - 1) % 24, hour, (hour + 1) % 24]
+            intervals = [self.traffic.hour_2_interval_ms[h] for h in hours]
+            low, high = min(intervals) - 5, max(intervals) + 5
+            hour_end = min((hour_index + 1) * common.HOUR_MILLISECOND, duration_ms)
+            mean = max((low + high) / 2 * (1 - fit.PROVINCE_ENTRANCE_RATION), 1)
+            n = int((hour_end - t) / mean * 1.2) + 16
+            gaps = (self.rng.uniform(low, high, n) * (1 - fit.PROVINCE_ENTRANCE_RATION)).astype(np.int64)
+            times = t + np.concatenate(([0], np.cumsum(gaps)))
+            # 本小时内到达的车辆,其后一辆车的间隔仍按本小时采样
+            inside = int(np.searchsorted(times, hour_end, side="left"))
+            if inside == len(times):
+                inside = len(times) - 1
+            chunks.append(times[:inside])
+            t = int(times[inside])
+        return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
+
+    def sample_entrances(self, n: int) -> np.ndarray:
+        """
+        采样n辆车的入口节点，并记录收费站入口的入口编号统计
+
+        Args:
+            n (int): 车辆数
+
+        Returns:
+            np.ndarray: 入口节点
+        """
+        is_province = self.rng.random(n) < fit.PROVINCE_ENTRANCE_RATION
+        nodes = np.empty(n, dtype=np.int64)
+        nodes[is_province] = self.province_nodes[
+            self.rng.integers(len(self.province_nodes), size=int(is_province.sum()))
+        ]
+        n_toll = n - int(is_province.sum())
+        toll = np.searchsorted(self.entrance_cum, self.rng.random(n_toll), side="right")
+        nodes[~is_province] = self.entrance_nodes[np.minimum(toll, len(self.entrance_nodes) - 1)]
+
+        self.stats.add_hex_counts(True, self.__hex_counts(nodes[~is_province]))
+        return nodes
+
+    def __hex_counts(self, nodes: np.ndarray) -> Dict[str, int]:
+        counts = np.bincount(nodes, minlength=self.graph.node_num)
+        return {self.graph.hex_code[node]: int(counts[node]) for node in np.flatnonzero(counts)}
+
+    def sample_durations(self, nodes: np.ndarray) -> np.ndarray:
+        """
+        采样从各节点出发到达下一位置的行驶时间，与Car.get_duration同分布
+
+        Args:
+            nodes (np.ndarray): 出发节点
+
+        Returns:
+            np.ndarray: 行驶时间（秒，整数）
+        """
+        times = np.where(self.graph.is_toll_plaza[nodes], _TOLL_PLAZA_TIMES, _GANTRY_TIMES)
+        gamma = self.rng.gamma(fit.NEXT_GANTRY_GAMMA_ALPHA, 1 / fit.NEXT_GANTRY_GAMMA_BETA, len(nodes))
+        return np.ceil(gamma * times).astype(np.int64) + 1
+
+    def run(self, duration_ms: float) -> None:
+        """
+        运行向量化仿真，统计结果写入self.stats
+
+        Args:
+            duration_ms (float): 仿真时长（毫秒）
+
+        Returns:
+            None
+        """
+        graph = self.graph
+        arrivals = self.sample_arrivals(duration_ms)
+        n = len(arrivals)
+        self.stats.add_hours(True, _hours(arrivals))
+
+        current = self.sample_entrances(n)
+        entrances = current.copy()
+        start = arrivals.astype(np.int64)
+        last_duration = np.zeros(n, dtype=np.int64)
+        hops = np.zeros(n, dtype=np.int64)
+        track_hops = self.stats.track_hops
+        active = np.flatnonzero(self.out_degree[current] > 0)
+        while len(active):
+            nodes = current[active]
+            durations = self.sample_durations(nodes)
+            # 与逐车仿真一致,门架通行时间在出发时记录,从收费站出发的一段不计入
+            gantry = ~graph.is_toll_plaza[nodes]
+            self.stats.add_gantry_times(durations[gantry].tolist())
+            last_duration[active] = durations
+            hops[active] += 1
+            enter = start[active]
+            start[active] += durations * common.SECOND_MILLISECOND
+            if track_hops:
+                self.stats.add_hops(active, nodes, enter, start[active])
+            current[active] = graph.sample_next(nodes, self.rng.random(len(active)))
+            # start此时为下一段的开始时间,超出仿真时长的车辆不再行驶
+            keep = (self.out_degree[current[active]] > 0) & (start[active] < duration_ms)
+            active = active[keep]
+
+        exited = np.flatnonzero((self.out_degree[current] == 0) & (start < duration_ms))
+        exit_times = start[exited]
+        self.stats.add_hours(False, _hours(exit_times))
+        self.stats.add_num_passed(hops[exited].tolist())
+        # 与StatsCollector.total_time_info一致,记录的是最后一段的开始时间到离开时间
+        self.stats.add_total_times(last_duration[exited].tolist())
+        self.stats.add_hex_counts(False, self.__hex_counts(current[exited]))
+        self.stats.add_od(entrances[exited], current[exited])
+        logger.info("vectorized run: %d cars entered, %d cars exited", n, len(exited))
+
+
+def _hours(times_ms: np.ndarray) -> List[int]:
+    return ((times_ms // common.HOUR_MILLISECOND).astype(np.int64) % 24).tolist()
@@ -0,0 +1,126 @@
+"""
+路网的数组化图表示
+
+将Location对象图转换为CSR(compressed sparse row)结构：节点为整数编号，
+第v个节点的下游边为indices[indptr[v]:indptr[v + 1]]，对应的选择概率为prob中的同一区间，
+经纬度等属性保存在连续数组中，供采样、渲染、分析直接使用，避免逐个对象遍历
+
+节点编号同时写入Location.index，由对象可O(1)得到节点编号
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterable, List
+
+import numpy as np
+
+from highway_sim.entity.location import Location, TollPlaza
+
+
+@dataclass(repr=False)
+class RoadGraph:
+    """
+    CSR形式的路网图
+    """
+    locations: List[Location] = field(default_factory=list)
+    hex_code: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=object))
+    longitude: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float64))
+    latitude: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float64))
+    is_toll_plaza: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=bool))
+    indptr: np.ndarray = field(default_factory=lambda: np.zeros(1, dtype=np.int64))
+    indices: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    # 与Location.effective_downstream_prob一致的边选择概率,每个节点的出边概率和为1
+    prob: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float64))
+    # 全局有序抽样键: 源节点号 + 节点内累计概率,节点内最后一条边为源节点号 + 1
+    key: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float64))
+
+    @classmethod
+    def from_locations(cls, groups: Iterable[Iterable[Location]]) -> RoadGraph:
+        """
+        由位置对象构建CSR图，并为每个位置写入节点编号
+
+        Args:
+            groups (Iterable[Iterable[Location]]): 位置集合，按顺序编号，重复对象只编号一次
+
+        Returns:
+            RoadGraph: 路网图
+        """
+        locations: List[Location] = []
+        seen = set()
+        for group in groups:
+            for x in group:
+                if id(x) not in seen:
+                    seen.add(id(x))
+                    x.index = len(locations)
+                    locations.append(x)
+
+        n = len(locations)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        indices: List[int] = []
+        prob: List[float] = []
+        for i, x in enumerate(locations):
+            for lwp, p in zip(x.downstream, x.effective_downstream_prob() if x.downstream else []):
+                indices.append(lwp.l.index)
+                prob.append(p)
+            indptr[i + 1] = len(indices)
+
+        graph = cls(
+            locations=locations,
+            hex_code=np.array([x.hex_code for x in locations], dtype=object),
+            longitude=np.array([x.longitude for x in locations], dtype=np.float64),
+            latitude=np.array([x.latitude for x in locations], dtype=np.float64),
+            is_toll_plaza=np.array([isinstance(x, TollPlaza) for x in locations], dtype=bool),
+            indptr=indptr,
+            indices=np.array(indices, dtype=np.int64),
+            prob=np.array(prob, dtype=np.float64),
+        )
+        graph.key = graph.__build_key()
+        return graph
+
+    def __build_key(self) -> np.ndarray:
+        source = np.repeat(np.arange(self.node_num, dtype=np.int64), self.out_degree)
+        cum = np.cumsum(self.prob)
+        # 减去每个节点之前所有边的概率和,得到节点内累计概率
+        start = np.concatenate(([0.0], cum))[self.indptr[:-1]]
+        within = cum - np.repeat(start, self.out_degree)
+        last = self.indptr[1:][self.out_degree > 0] - 1
+        within[last] = 1.0
+        return source + within
+
+    @property
+    def node_num(self) -> int:
+        """
+        节点数
+        """
+        return len(self.locations)
+
+    @property
+    def edge_num(self) -> int:
+        """
+        边数
+        """
+        return len(self.indices)
+
+    @property
+    def out_degree(self) -> np.ndarray:
+        """
+        每个节点的出度
+        """
+        return np.diff(self.indptr)
+
+    def sample_next(self, nodes: np.ndarray, u: np.ndarray) -> np.ndarray:
+        """
+        为一批节点按边概率各抽取一个下游节点
+
+        Args:
+            nodes (np.ndarray): 当前节点，出度必须大于0
+            u (np.ndarray): [0, 1)均匀随机数
+
+        Returns:
+            np.ndarray: 下游节点
+        """
+        edge = np.searchsorted(self.key, nodes + u, side="right")
+        # 浮点舍入可能使v + u等于v + 1,限制在本节点的边内
+        edge = np.minimum(edge, self.indptr[nodes + 1] - 1)
+        return self.indices[edge]
@@ -12,6 +12,8 @@ from abc import ABC
 from dataclasses import dataclass, field
 from typing import List, Optional
 
+from highway_sim.util.alias import AliasTable
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,6 +41,42 @@ class Location(ABC):
     # 对downstream的操作需要取第一个或任意一个元素,换用dict会比较麻烦
     # 因为每个gantry的downstream不多,在parse数据时不使用dict影响不大
     downstream: List[LocationWithProb] = field(default_factory=list)
+    # 下游选择的别名表,由build_alias_table在解析概率后构建
+    _alias: Optional[AliasTable] = None
+    # 在RoadGraph中的节点编号,构建路网图前为-1
+    index: int = -1
+
+    def effective_downstream_prob(self) -> List[float]:
+        """
+        计算按累计概率选择下游时各下游的实际概率：
+        随机数r落在第一个累计概率不小于r的下游；概率和不足1时，剩余部分均分给所有下游；
+        概率和超过1时，超出部分被截断
+
+        Returns:
+            List[float]: 与downstream一一对应的概率，和为1
+        """
+        n = len(self.downstream)
+        probs = []
+        cnt: float = 0.0
+        for lwp in self.downstream:
+            prev = min(cnt, 1.0)
+            cnt += lwp.p
+            probs.append(max(min(cnt, 1.0) - prev, 0.0))
+        rest = max(1.0 - min(cnt, 1.0), 0.0) / n
+        return [p + rest for p in probs]
+
+    def build_alias_table(self) -> bool:
+        """
+        根据下游概率构建别名表，归一化只在此处进行一次
+
+        Returns:
+            bool: 下游概率和是否偏离1(需要归一化)
+        """
+        if len(self.downstream) == 0:
+            self._alias = None
+            return False
+        self._alias = AliasTable(self.effective_downstream_prob())
+        return abs(sum(lwp.p for lwp in self.downstream) - 1.0) > 1e-6
 
     def get_next_location(self, enable_prob: bool = False) -> Optional[Location, None]:
         """
@@ -54,23 +92,9 @@ class Location(ABC):
             return None
         if not (enable_prob and enable_get_next_by_prob):
             return random.choice(self.downstream).l
-        # if len(self.hex_code) != 8:
-        #     logger.warning("%s %s", self.hex_code, hex(id(self)))
-        #     logger.warning({x.l.hex_code: x.p for x in self.downstream})
-        r = random.random()
-        cnt: float = 0.0
-        for lwp in self.downstream:
-            lo = lwp.l
-            p = lwp.p
-            # if len(self.hex_code) != 8:
-            #     logger.warning("%s %f", lo.hex_code, p)
-            cnt += p
-            if cnt >= r:
-                # logger.warning("next with prob %f %f", cnt, r)
-                return lo
-        # if len(self.hex_code) != 8:
-        #     logger.warning("next without prob")
-        return random.choice(self.downstream).l
+        if self._alias is None:
+            self.build_alias_table()
+        return self.downstream[self._alias.sample()].l
 
     def __repr__(self):
         return f"Location(name={self.name}, id={self._id}, hex={self.hex_code}, longitude={self.longitude}, latitude={self.latitude})"
@@ -0,0 +1,194 @@
+"""
+无界面批量运行模块
+该模块负责在无显示环境（服务器、批量重复实验）下运行仿真，导入链中不包含tkinter、PIL与OpenGL，
+同时提供日志初始化与统计结果输出，供main.py等入口复用
+
+使用示例::
+
+    cd highway_sim
+    python headless.py --log
+"""
+
+import logging
+import time
+from typing import Hashable, Optional, Tuple
+
+from highway_sim.components.car import flush_trip_plans
+from highway_sim.components.car_generator import CarGenerator
+from highway_sim.components.environment import HighwayEnvironment
+from highway_sim.data_parser.road_network import RoadNetwork, Parser as RoadNetworkParser
+from highway_sim.data_parser.traffic import Traffic, Parser as TrafficParser
+from highway_sim.engine.vectorized import VectorizedSimulator
+from highway_sim.stats.default import StatsCollector
+from highway_sim.stats.flow import FlowCounter
+from highway_sim.stats.od import ODMatrix
+from highway_sim.stats.results import save_results
+from highway_sim.stats.sink import StructTraceSink
+from highway_sim.stats.trace import HopTraceWriter
+from highway_sim.config import common
+from highway_sim.config import args
+
+logger: logging.Logger
+start_time: float
+
+
+def init_logger(enable_log: bool) -> None:
+    """
+    初始化日志记录器
+
+    Args:
+        enable_log (bool): 是否启用日志记录
+    """
+    global logger, start_time
+    if enable_log:
+        logging.basicConfig(
+            level=args.LOG_LEVEL,
+            format="%(message)s",
+            filename=args.LOG_FILE,
+            filemode="w",
+        )
+        logger = logging.getLogger(__name__)
+        start_time = time.time()
+
+
+def record(enable_log: bool, stats: StatsCollector) -> None:
+    """
+    记录日志，指定--results-file时同时保存.npz结果文件，指定--flow-file时保存分位置流量，
+    指定--od-file时保存出入口矩阵
+
+    Args:
+        enable_log (bool): 是否启用日志记录
+        stats (StatsCollector): 统计收集器
+    """
+    global logger, start_time
+
+    if enable_log:
+        end_time = time.time()
+        logger.info("spend %fs", end_time - start_time)
+        stats.record(logger)
+    if args.RESULTS_FILE:
+        save_results(stats, args.RESULTS_FILE)
+    if stats.flows is not None and args.FLOW_FILE:
+        stats.flows.save(args.FLOW_FILE)
+    if stats.od is not None and args.OD_FILE:
+        stats.od.save(args.OD_FILE)
+
+
+def create_stats(road_network: RoadNetwork) -> StatsCollector:
+    """
+    按启动参数创建统计收集器，指定--trace-file时附加二进制追踪接收器，指定--hop-trace时启用逐段行程追踪，
+    指定--flow-file时启用分位置流量统计，指定--od-file时启用出入口矩阵
+
+    Args:
+        road_network (RoadNetwork): 路网，提供逐段行程追踪、分位置流量与出入口矩阵的节点编号表
+
+    Returns:
+        StatsCollector: 统计收集器
+    """
+    hops = None
+    if args.HOP_TRACE:
+        hops = HopTraceWriter(args.HOP_TRACE, road_network.graph.hex_code, args.HOP_TRACE_FORMAT)
+    flows = None
+    if args.FLOW_FILE:
+        flows = FlowCounter(road_network.graph.hex_code, args.FLOW_BIN_MINUTES * common.MINUTE_MILLISECOND)
+    od = ODMatrix.from_road_network(road_network, args.OD_SPARSE) if args.OD_FILE else None
+    stats = StatsCollector(keep_samples=args.KEEP_SAMPLES, hops=hops, flows=flows, od=od)
+    if args.TRACE_FILE:
+        stats.add_sink(StructTraceSink(args.TRACE_FILE))
+    return stats
+
+
+def parse(use_cache: bool = True) -> Tuple[RoadNetwork, Traffic]:
+    """
+    解析路网与交通流量数据
+
+    Args:
+        use_cache (bool): 是否使用路网解析缓存
+
+    Returns:
+        Tuple[RoadNetwork, Traffic]: 路网与交通流量数据
+    """
+    rn = RoadNetwork()
+    traffic = Traffic()
+    RoadNetworkParser(rn, use_cache).parse()
+    TrafficParser(traffic).parse()
+    return rn, traffic
+
+
+def build_environment(
+        random_seed: Hashable = "*",
+        event_list: str = "heap",
+        stats: Optional[StatsCollector] = None,
+) -> HighwayEnvironment:
+    """
+    创建不包含任何动画对象的仿真环境
+
+    Args:
+        random_seed (Hashable): 随机种子，"*"表示按当前时间随机
+        event_list (str): 未来事件列表实现，"heap"或"calendar"
+        stats (Optional[StatsCollector]): 统计收集器，None表示新建
+
+    Returns:
+        HighwayEnvironment: 无界面仿真环境
+    """
+    # Car根据args中的开关决定是否创建动画对象,无界面运行时必须关闭
+    args.ENABLE_2D = False
+    args.ENABLE_3D = False
+    return HighwayEnvironment(
+        random_seed=random_seed,
+        time_unit="milliseconds",
+        headless=True,
+        event_list=event_list,
+        stats=stats,
+    )
+
+
+def run(
+        rn: RoadNetwork,
+        traffic: Traffic,
+        duration_ms: float,
+        random_seed: Hashable = "*",
+        event_list: str = "heap",
+        stats: Optional[StatsCollector] = None,
+) -> HighwayEnvironment:
+    """
+    在无界面环境中运行一次仿真
+
+    Args:
+        rn (RoadNetwork): 路网数据
+        traffic (Traffic): 交通流量数据
+        duration_ms (float): 仿真时长（毫秒）
+        random_seed (Hashable): 随机种子
+        event_list (str): 未来事件列表实现，"heap"或"calendar"
+        stats (Optional[StatsCollector]): 统计收集器，None表示新建
+
+    Returns:
+        HighwayEnvironment: 运行结束后的仿真环境，统计结果在env.stats中
+    """
+    env = build_environment(random_seed, event_list, stats)
+    CarGenerator(road_network=rn, traffic=traffic)
+    env.run(duration_ms)
+    flush_trip_plans(env)
+    return env
+
+
+if __name__ == "__main__":
+    args.Parser()
+
+    init_logger(args.ENABLE_LOG)
+
+    road_network, traffic_data = parse(args.ENABLE_CACHE)
+    result = create_stats(road_network)
+    if args.ENGINE == "vectorized":
+        VectorizedSimulator(road_network, traffic_data, stats=result).run(common.DAY_MILLISECOND * 0.01)
+    else:
+        run(
+            road_network,
+            traffic_data,
+            common.DAY_MILLISECOND * 0.01,
+            event_list=args.EVENT_LIST,
+            stats=result,
+        )
+
+    record(args.ENABLE_LOG, result)
+    result.close()
@@ -4,18 +4,20 @@
 """
 # run `export PYTHONPATH=/extend/school/projects/highwaysim:$PYTHONPATH` before running this file
 
-import logging
-import time
 import tkinter
 
 from highway_sim.mySalabim import d2_interface_enhanced as sim
+from highway_sim.components.car import flush_trip_plans
 from highway_sim.components.car_generator import CarGenerator
+from highway_sim.components.lod import LevelOfDetail
+from highway_sim.components.environment import HighwayEnvironment
 from highway_sim.data_parser.road_network import RoadNetwork, Parser as RoadNetworkParser
 from highway_sim.data_parser.traffic import Traffic, Parser as TrafficParser
-from highway_sim.stats import default as stats_default
+from highway_sim.headless import create_stats, init_logger, record
 from highway_sim.config import common
 from dataclasses import dataclass
 from highway_sim.config import args
+from highway_sim.util.spatial import GridIndex
 
 
 @dataclass
@@ -33,48 +35,14 @@ SCALE_DECREASE_FACTOR = 0.9
 G_SIMULATION_RESOLUTION = 10000
 G_SIMULATION_WIDTH_PX = 1000
 G_SIMULATION_HEIGHT_PX = 1000
+# 行驶中车辆网格索引的网格边长(仿真坐标)
+G_VEHICLE_CELL_SIZE = G_SIMULATION_RESOLUTION / 64
+# 仿真画布上路网对象的标签,框选放大与复位时整体删除后重绘
+SIM_ROAD_TAG = "sim_road"
 
 G_MAP_WIDTH = 500
 G_MAP_HEIGHT = 500
 
-logger: logging.Logger
-start_time: int
-
-
-def init_logger(enable_log: bool) -> None:
-    """
-    初始化日志记录器
-
-    Args:
-        enable_log (bool): 是否启用日志记录
-    """
-    global logger, start_time
-    if enable_log:
-        logging.basicConfig(
-            level=args.LOG_LEVEL,
-            format="%(message)s",
-            filename=args.LOG_FILE,
-            filemode="w",
-        )
-        logger = logging.getLogger(__name__)
-        start_time = time.time()
-
-
-def record(enable_log: bool) -> None:
-    """
-    记录日志
-
-    Args:
-        enable_log (bool): 是否启用日志记录
-    """
-    global logger, start_time
-
-    if enable_log:
-        end_time = time.time()
-        logger.info("spend %fs", end_time - start_time)
-        stats_default.record(logger)
-
-
 g_map_scale_factor: float = 1.0
 g_map_drag_start_pos: Pos = Pos(0, 0)
 g_inspect_start_pos: Pos
@@ -259,17 +227,43 @@ def deal_cv_right_motion(event: tkinter.Event) -> None:
     )
 
 
-def deal_cv_mid_press(event: tkinter.Event) -> None:
+def draw_simulation_roads(
+        viewport: tuple = None, create_oval: bool = False, oval_radius: float = 2
+) -> None:
     """
-    将鼠标中键按下与返回原始2d界面大小绑定
+    删除仿真画布上的路网后重新绘制，只绘制路网网格索引中与viewport相交的路段与门架，
+    路网保持在其他画布对象(车辆、热力条)之下
 
     Args:
-        event (tkinter.Event): 鼠标事件对象
+        viewport (tuple): 未缩放的仿真画布坐标中的绘制范围(x0, y0, x1, y1)，None表示全部绘制
+        create_oval (bool): 是否绘制门架
+        oval_radius (float): 门架圆点的半径（未缩放的像素数量）
 
     Returns:
 
     """
+    global g_simulation_cv, rn
+    g_simulation_cv.delete(SIM_ROAD_TAG)
+    rn.draw(
+        g_simulation_cv,
+        G_SIMULATION_WIDTH_PX,
+        G_SIMULATION_HEIGHT_PX,
+        "red",
+        create_oval,
+        viewport=viewport,
+        tags=SIM_ROAD_TAG,
+        oval_radius=oval_radius,
+    )
+    g_simulation_cv.tag_lower(SIM_ROAD_TAG)
+
+
+def reset_simulation_view() -> None:
+    """
+    把仿真画布的平移与缩放复位到初始状态
 
+    Returns:
+
+    """
     global g_simulation_cv, g_sim_origin, g_sim_global
     tmp = g_simulation_cv.coords(g_sim_origin)
     origin_x = tmp[0]
@@ -281,9 +275,25 @@ def deal_cv_mid_press(event: tkinter.Event) -> None:
     g_sim_global.scale_factor = 1
 
 
+def deal_cv_mid_press(event: tkinter.Event) -> None:
+    """
+    将鼠标中键按下与返回原始2d界面大小绑定，并重新绘制全部路网
+
+    Args:
+        event (tkinter.Event): 鼠标事件对象
+
+    Returns:
+
+    """
+    reset_simulation_view()
+    draw_simulation_roads()
+
+
 def deal_cv_right_release(event: tkinter.Event) -> None:
     """
     将鼠标右键释放与改变2d界面显示区域绑定
+    仿真画布只通过路网网格索引重绘放大后视口附近的路段与门架(可点击显示名称)，
+    视口外的路段不再随每次平移/缩放变换，中键复位后恢复全部路网
 
     Args:
         event (tkinter.Event): 鼠标事件对象
@@ -339,13 +349,26 @@ def deal_cv_right_release(event: tkinter.Event) -> None:
     # 从左上角(0, 0)放大,然后拖动
     # g_simulation_window.geometry(f"{sim_width_px}x{sim_height_px}")
     # 如果在获取新的框前有移动sim界面,如何复位?用origin_point和scale
-    deal_cv_mid_press(event)
+    reset_simulation_view()
     # 调整y轴:原因: map和simulation的x轴成比例,图像生成时都是x轴固定,y轴可以取任意值,这里只是设定为一样,实际不同,这里的调整原点应该是
     # height- map_max_height
     map2sim = G_SIMULATION_WIDTH_PX / G_MAP_WIDTH
     move_x_px = -(g_inspect_start_pos.x * map2sim)
     move_y_px = -(G_SIMULATION_HEIGHT_PX - (map_max_height * map2sim))
     move_y_px += -((g_inspect_start_pos.y - (G_MAP_HEIGHT - map_max_height)) * map2sim)
+    # 放大后窗口显示的范围(未缩放的仿真画布坐标),四周各留一个视口的余量,小范围平移后仍有路网
+    view_width = G_SIMULATION_WIDTH_PX / sim_scale
+    view_height = G_SIMULATION_HEIGHT_PX / sim_scale
+    draw_simulation_roads(
+        (
+            -move_x_px - view_width,
+            -move_y_px - view_height,
+            -move_x_px + 2 * view_width,
+            -move_y_px + 2 * view_height,
+        ),
+        create_oval=True,
+        oval_radius=2 / sim_scale,
+    )
     g_simulation_cv.move("all", move_x_px, move_y_px)
     g_simulation_cv.scale("all", 0, 0, sim_scale, sim_scale)
     g_sim_global.scale_factor = sim_scale
@@ -387,31 +410,56 @@ if __name__ == "__main__":
     init_logger(args.ENABLE_LOG)
 
     rn = RoadNetwork()
-    rnp = RoadNetworkParser(rn)
+    rnp = RoadNetworkParser(rn, args.ENABLE_CACHE)
     traffic = Traffic()
     tp = TrafficParser(traffic)
     rnp.parse()
     tp.parse()
 
-    real_root = tkinter.Tk()
-    real_root.withdraw()
+    enable_gui = args.ENABLE_2D or args.ENABLE_3D
+    # 不启用动画时不创建tkinter根窗口,可在无显示环境下运行
+    if enable_gui:
+        real_root = tkinter.Tk()
+        real_root.withdraw()
 
     # 注意这里的random_seed,不设置或者设置为None都是固定值
-    env = sim.Environment(random_seed="*", time_unit="milliseconds")
+    env = HighwayEnvironment(
+        random_seed="*",
+        time_unit="milliseconds",
+        headless=not enable_gui,
+        event_list=args.EVENT_LIST,
+        stats=create_stats(rn),
+        vehicles=GridIndex(G_VEHICLE_CELL_SIZE) if args.ENABLE_2D else None,
+    )
 
     CarGenerator(road_network=rn, traffic=traffic)
 
     set_animate(env, args.ENABLE_2D, args.ENABLE_3D)
 
+    if args.ENABLE_3D:
+        # 所有车辆的3D方块放在一个批量图层中,每帧一次绘制
+        env.boxes = sim.Animate3dBoxBatch(x_len=20, y_len=20, z_len=5, z=0.5, shaded=False)
+
     create_map_window(args.ENABLE_2D)
     # visualization
     if args.ENABLE_2D:
         rn.draw(g_map_cv, G_MAP_WIDTH, G_MAP_HEIGHT)
         # 注意,这里不能传入resolution,因为直接调用tkinter
-        rn.draw(
-            g_simulation_cv, G_SIMULATION_WIDTH_PX, G_SIMULATION_HEIGHT_PX, "red", False
-        )
+        draw_simulation_roads()
+        if args.ENABLE_LOD:
+            # 热力条与路网同时绘制,之后随画布一起平移/缩放
+            env.lod = LevelOfDetail(
+                env,
+                rn,
+                g_simulation_cv,
+                G_SIMULATION_WIDTH_PX,
+                G_SIMULATION_HEIGHT_PX,
+                zoom=args.LOD_ZOOM,
+                max_sprites=args.LOD_MAX_SPRITES,
+            )
 
     env.run(common.DAY_MILLISECOND * 0.01)
+    flush_trip_plans(env)
 
-    record(args.ENABLE_LOG)
+    record(args.ENABLE_LOG, env.stats)
+    env.stats.close()
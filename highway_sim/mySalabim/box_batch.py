@@ -0,0 +1,291 @@
+"""
+3D方块批量绘制与视锥剔除模块
+
+d2_interface_enhanced与d3_performance_enhanced共用同一份实现，两个分支各自以
+Animate3dBoxBatch(BoxBatch, Animate3dBase)的形式提供给使用者：
+
+    - 视锥剔除：相机每帧设置投影后调用read_projection_dot_view_matrix，
+                frustum_mask把所有对象中心组成(N, 4)数组，一次矩阵乘法得到可见性掩码
+    - 批量绘制：所有方块的起止位置与时间保存在按槽位索引的数组中，每帧一次插值得到全部位置，
+                剔除后把可见方块的顶点用glBufferSubData写入顶点缓冲(VBO)，一次glDrawArrays绘制；
+                法向量与颜色对所有方块相同，只在缓冲创建或扩容时上传一次
+
+固定管线没有实例化绘制，无法只上传每个方块的位置偏移，因此每帧上传的是可见方块的全部顶点(每个方块24个)
+
+使用示例::
+
+    boxes = sim.Animate3dBoxBatch(x_len=20, y_len=20, z_len=5, z=0.5)
+    slot = boxes.add(x0, y0, x1, y1, t0, t1)
+    boxes.remove_box(slot)
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+# 视锥剔除开关
+Enable_frustum_culling = True
+# 投影矩阵与视图矩阵之积，None表示尚未设置相机，此时不剔除
+Projection_dot_view_matrix: Optional[np.ndarray] = None
+# 剔除前对象中心y坐标的偏移量
+Frustum_y_offset = -100
+# OpenGL.GL，首次绘制时导入
+gl = None
+
+
+def set_projection_dot_view_matrix(matrix: np.ndarray) -> None:
+    """
+    设置视锥剔除使用的投影矩阵，相机每帧设置投影后调用
+
+    Args:
+        matrix (np.ndarray): 4x4矩阵，齐次世界坐标左乘该矩阵得到裁剪坐标
+
+    Returns:
+
+    """
+    global Projection_dot_view_matrix
+    Projection_dot_view_matrix = matrix
+
+
+def read_projection_dot_view_matrix() -> None:
+    """
+    从OpenGL读取当前的投影矩阵作为视锥剔除的投影矩阵，相机在投影矩阵上调用gluLookAt，视图矩阵为单位矩阵
+
+    Returns:
+
+    """
+    gl = _load_gl()
+    set_projection_dot_view_matrix(np.array(gl.glGetDoublev(gl.GL_PROJECTION_MATRIX), dtype=np.float64).T)
+
+
+def frustum_mask(centers: np.ndarray) -> np.ndarray:
+    """
+    一次矩阵乘法判断所有点是否在视锥内
+
+    Args:
+        centers (np.ndarray): (n, 3)的世界坐标
+
+    Returns:
+        np.ndarray: 可见性掩码，关闭剔除或尚未设置投影矩阵时全为True
+    """
+    n = len(centers)
+    if not Enable_frustum_culling or Projection_dot_view_matrix is None:
+        return np.ones(n, dtype=bool)
+    points = np.empty((n, 4))
+    points[:, :3] = centers
+    points[:, 3] = 1.0
+    clip_coords = points @ Projection_dot_view_matrix.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ndc = clip_coords[:, :3] / clip_coords[:, 3:]
+    return np.all(np.abs(ndc) <= 1, axis=1)
+
+
+def _load_gl():
+    global gl
+    if gl is None:
+        import OpenGL.GL as gl
+    return gl
+
+
+class BoxBatch:
+    """
+    在一个对象中绘制大量相同的方块，每个方块在两点之间匀速移动，与各分支的Animate3dBase组合使用
+
+    几何形状与颜色对所有方块相同且不是动态属性；add加入方块，move修改方块的运动，
+    remove_box删除方块，remove()从动画中移除整个批量对象
+
+    Args:
+        x_len (float): 方块x方向的长度
+        y_len (float): 方块y方向的长度
+        z_len (float): 方块z方向的长度
+        z (float): 方块的z坐标
+        x_ref (float): -1表示x为方块的末端，0表示中心，1表示始端
+        y_ref (float): 同x_ref
+        z_ref (float): 同x_ref
+        color (ColorType): 方块颜色
+        shaded (bool): 为True时各面颜色深浅不同
+        capacity (int): 初始槽位数，不足时翻倍
+    """
+
+    # 6个面各4个顶点所在的角(0为x/y/z的低侧,1为高侧),顺序与draw_box3d相同
+    _corners = (
+        (0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0),  # bottom z-
+        (0, 0, 1), (1, 0, 1), (1, 1, 1), (0, 1, 1),  # top z+
+        (0, 0, 0), (1, 0, 0), (1, 0, 1), (0, 0, 1),  # left y-
+        (1, 1, 0), (0, 1, 0), (0, 1, 1), (1, 1, 1),  # right y+
+        (1, 0, 0), (1, 1, 0), (1, 1, 1), (1, 0, 1),  # front x+
+        (0, 1, 0), (0, 0, 0), (0, 0, 1), (0, 1, 1),  # front x-
+    )
+    _normals = ((0, 0, -1), (0, 0, 1), (0, -1, 0), (0, 1, 0), (1, 0, 0), (-1, 0, 0))
+    _shades = (1, 1, 0.9, 0.9, 0.8, 0.8)
+
+    def setup(
+            self,
+            x_len: float = 1,
+            y_len: float = 1,
+            z_len: float = 1,
+            z: float = 0,
+            x_ref: float = 0,
+            y_ref: float = 0,
+            z_ref: float = 0,
+            color="white",
+            shaded: bool = False,
+            capacity: int = 1024,
+    ) -> None:
+        lengths = np.array([x_len, y_len, z_len], dtype=np.float32)
+        refs = np.array([x_ref, y_ref, z_ref], dtype=np.float32)
+        low = (refs - 1) / 2 * lengths
+        high = (refs + 1) / 2 * lengths
+        corners = np.array(self._corners, dtype=np.float32)
+        self._box_vertices = low + corners * (high - low)
+        self._box_vertices[:, 2] += z
+        # 方块位置到其中心的偏移,用于视锥剔除
+        self._center = (low + high) / 2 + np.array([0, Frustum_y_offset, z], dtype=np.float32)
+        self._box_normals = np.repeat(np.array(self._normals, dtype=np.float32), 4, axis=0)
+        gl_color, self._show = self.env.colorspec_to_gl_color_alpha(color)
+        shades = self._shades if shaded else (1,) * 6
+        self._box_colors = np.repeat(
+            np.array([[c * s for c in gl_color] for s in shades], dtype=np.float32), 4, axis=0
+        )
+
+        # 每个槽位当前运动的起点、终点、开始时间与结束时间
+        self._xy0 = np.zeros((capacity, 2))
+        self._xy1 = np.zeros((capacity, 2))
+        self._t0 = np.zeros(capacity)
+        self._t1 = np.zeros(capacity)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._free = list(range(capacity - 1, -1, -1))
+        self._vertices = np.zeros((capacity, 24, 3), dtype=np.float32)
+        # 顶点、法向量、颜色三个VBO，以及它们当前的槽位容量(0表示需要重新分配)
+        self._buffers = None
+        self._buffer_capacity = 0
+
+    def _grow(self) -> None:
+        capacity = len(self._alive)
+        self._xy0 = np.concatenate((self._xy0, np.zeros_like(self._xy0)))
+        self._xy1 = np.concatenate((self._xy1, np.zeros_like(self._xy1)))
+        self._t0 = np.concatenate((self._t0, np.zeros_like(self._t0)))
+        self._t1 = np.concatenate((self._t1, np.zeros_like(self._t1)))
+        self._alive = np.concatenate((self._alive, np.zeros_like(self._alive)))
+        self._free.extend(range(2 * capacity - 1, capacity - 1, -1))
+        self._vertices = np.zeros((2 * capacity, 24, 3), dtype=np.float32)
+
+    def add(self, x0: float, y0: float, x1: float, y1: float, t0: float, t1: float) -> int:
+        """
+        加入一个在t0时位于(x0, y0)、t1时到达(x1, y1)的方块
+
+        Returns:
+            int: 方块的槽位，用于move与remove_box
+        """
+        if not self._free:
+            self._grow()
+        slot = self._free.pop()
+        self._alive[slot] = True
+        self.move(slot, x0, y0, x1, y1, t0, t1)
+        return slot
+
+    def move(self, slot: int, x0: float, y0: float, x1: float, y1: float, t0: float, t1: float) -> None:
+        """
+        令槽位中的方块在t0时位于(x0, y0)、t1时到达(x1, y1)
+        """
+        self._xy0[slot] = (x0, y0)
+        self._xy1[slot] = (x1, y1)
+        self._t0[slot] = t0
+        self._t1[slot] = t1
+
+    def remove_box(self, slot: int) -> None:
+        """
+        删除槽位中的方块，槽位可被之后的add复用
+        """
+        if self._alive[slot]:
+            self._alive[slot] = False
+            self._free.append(slot)
+
+    def positions(self, t: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        所有方块在t时的位置
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 槽位与(n, 2)的x、y坐标
+        """
+        slots = np.flatnonzero(self._alive)
+        t0 = self._t0[slots]
+        duration = self._t1[slots] - t0
+        fraction = np.divide(t - t0, duration, out=np.ones_like(t0), where=duration > 0)
+        np.clip(fraction, 0, 1, out=fraction)
+        xy0 = self._xy0[slots]
+        return slots, xy0 + (self._xy1[slots] - xy0) * fraction[:, None]
+
+    def visible_positions(self, t: float) -> np.ndarray:
+        """
+        视锥内的方块在t时的位置
+
+        Returns:
+            np.ndarray: (n, 2)的x、y坐标
+        """
+        _, xy = self.positions(t)
+        centers = np.empty((len(xy), 3))
+        centers[:, :2] = xy + self._center[:2]
+        centers[:, 2] = self._center[2]
+        return xy[frustum_mask(centers)]
+
+    def _upload_static(self, gl) -> None:
+        # 按当前容量分配三个VBO,法向量与颜色对所有槽位相同,只在此时上传
+        capacity = len(self._vertices)
+        if self._buffers is None:
+            self._buffers = gl.glGenBuffers(3)
+        vertex_buffer, normal_buffer, color_buffer = self._buffers
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, vertex_buffer)
+        gl.glBufferData(gl.GL_ARRAY_BUFFER, self._vertices.nbytes, None, gl.GL_DYNAMIC_DRAW)
+        for buffer, per_box in ((normal_buffer, self._box_normals), (color_buffer, self._box_colors)):
+            data = np.broadcast_to(per_box, (capacity, 24, 3)).copy()
+            gl.glBindBuffer(gl.GL_ARRAY_BUFFER, buffer)
+            gl.glBufferData(gl.GL_ARRAY_BUFFER, data.nbytes, data, gl.GL_STATIC_DRAW)
+        self._buffer_capacity = capacity
+
+    def draw(self, t: float) -> None:
+        if not self._show:
+            return
+        xy = self.visible_positions(t)
+        n = len(xy)
+        if n == 0:
+            return
+        vertices = self._vertices[:n]
+        np.copyto(vertices, self._box_vertices)
+        vertices[:, :, :2] += xy[:, None, :].astype(np.float32)
+
+        gl = _load_gl()
+        if self._buffer_capacity != len(self._vertices):
+            self._upload_static(gl)
+        vertex_buffer, normal_buffer, color_buffer = self._buffers
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, vertex_buffer)
+        gl.glBufferSubData(gl.GL_ARRAY_BUFFER, 0, vertices.nbytes, vertices)
+
+        gl.glEnable(gl.GL_COLOR_MATERIAL)
+        gl.glColorMaterial(gl.GL_FRONT, gl.GL_AMBIENT_AND_DIFFUSE)
+        gl.glEnableClientState(gl.GL_VERTEX_ARRAY)
+        gl.glEnableClientState(gl.GL_NORMAL_ARRAY)
+        gl.glEnableClientState(gl.GL_COLOR_ARRAY)
+        gl.glVertexPointer(3, gl.GL_FLOAT, 0, None)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, normal_buffer)
+        gl.glNormalPointer(gl.GL_FLOAT, 0, None)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, color_buffer)
+        gl.glColorPointer(3, gl.GL_FLOAT, 0, None)
+        gl.glDrawArrays(gl.GL_QUADS, 0, n * 24)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+        gl.glDisableClientState(gl.GL_COLOR_ARRAY)
+        gl.glDisableClientState(gl.GL_NORMAL_ARRAY)
+        gl.glDisableClientState(gl.GL_VERTEX_ARRAY)
+        gl.glDisable(gl.GL_COLOR_MATERIAL)
+
+    def remove(self) -> None:
+        """
+        从动画中移除整个批量对象，并释放VBO
+        """
+        if self._buffers is not None:
+            _load_gl().glDeleteBuffers(3, self._buffers)
+            self._buffers = None
+            self._buffer_capacity = 0
+        super().remove()
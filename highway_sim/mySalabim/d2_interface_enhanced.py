@@ -61,6 +61,12 @@ from typing import (
     Optional,
 )
 
+# added
+from highway_sim.mySalabim import box_batch as _box_batch
+from highway_sim.mySalabim import event_list as _event_list
+
+# added
+
 # module = salabim  # for PythonInExcel runner
 
 dataframe = None  # to please PyLance
@@ -7575,6 +7581,7 @@ class Component:
         self._from_stores = []
         self._to_stores = []
         self._on_event_list = False
+        self._event_entry = None
         self._scheduled_time = inf
         self._failed = False
         self._skip_standby = skip_standby
@@ -7934,21 +7941,19 @@ by adding at the end:
             else:
                 seq = self.env._seq
             self._on_event_list = True
-            heapq.heappush(self.env._event_list, (t, priority, seq, self, return_value))
+            self._event_entry = self.env._event_list.push(
+                t, priority, seq, self, return_value
+            )
         if self.env._yieldless:
             if self is self.env._current_component:
                 self.env._glet.switch()
 
     def _remove(self):
         if self._on_event_list:
-            for i in range(len(self.env._event_list)):
-                if self.env._event_list[i][3] == self:
-                    self.env._event_list[i] = self.env._event_list[0]
-                    self.env._event_list.pop(0)
-                    heapq.heapify(self.env._event_list)
-                    self._on_event_list = False
-                    return
-            raise Exception("remove error", self.name())
+            self.env._event_list.remove(self._event_entry)
+            self._event_entry = None
+            self._on_event_list = False
+            return
         if self.status.value == standby:
             if self in self.env._standbylist:
                 self.env._standbylist.remove(self)
@@ -10423,13 +10428,9 @@ by adding:
         priority the component is scheduled with : float
             returns None otherwise
 
-        Note
-        ----
-        The method has to traverse the event list, so performance may be an issue.
         """
-        for t, priority, seq, component, return_value in self.env._event_list:
-            if component is self:
-                return priority
+        if self._on_event_list:
+            return self._event_entry[1]
         return None
 
     def remaining_duration(
@@ -11018,6 +11019,21 @@ class Environment:
         This is particularly useful when running a simulation on a server.
         Note that this will show a slight performance increase, when creating videos.
 
+    headless : bool
+        if False (default), the environment can be animated as usual
+
+        if True, no animation objects (intro/extro, modelname, clock) are created and
+        any attempt to start 2d/3d animation or video raises a ValueError.
+        Use this for batch runs on machines without a display: tkinter, PIL and OpenGL are never imported.
+
+    event_list : str
+        future event list implementation
+
+        if "heap" (default), a binary heap (O(log n) per event)
+
+        if "calendar", a calendar queue (amortized O(1) per event for dense, evenly spread event times).
+        Both return events in exactly the same order, so results are identical under the same seed.
+
     Any valid parameter for Environment.animation_parameters() will be forwarded to animation_parameters(), e.g.
         env = sim.Environment(trace=True, animation=True, speed=5)
 
@@ -11046,9 +11062,14 @@ class Environment:
         do_reset: bool = None,
         blind_animation: bool = False,
         yieldless: bool = None,
+        headless: bool = False,
+        event_list: str = "heap",
         *args,
         **kwargs,
     ):
+        # added
+        self._headless = headless
+        # added
         if name is None:
             if isdefault_env:
                 name = "default environment"
@@ -11106,7 +11127,7 @@ class Environment:
         self._nameserializeStore = {}
         self._nameserializeState = {}
         self._seq = 0
-        self._event_list = []
+        self._event_list = _event_list.create(event_list)
         self._standbylist = []
         self._pendingstandbylist = []
 
@@ -11121,7 +11142,7 @@ class Environment:
         self._animate = False
         self._animate3d = False
         if (
-            "_AnimateIntro" in globals()
+            "_AnimateIntro" in globals() and not self._headless
         ):  # in case of minimized, _AnimateIntro and _AnimateExtro are not available
             self.view = _AnimateIntro(env=self)
             _AnimateExtro(env=self)
@@ -11130,6 +11151,8 @@ class Environment:
         self.obj_filenames = {}
         self.running = False
         self._maximum_number_of_bitmaps = 4000
+        # added
+        self._sprite_cache = _SpriteCache(256)
         self._t = 0
         self.video_t = 0
         self.frame_number = 0
@@ -11205,9 +11228,12 @@ class Environment:
         if Pythonista:
             can_animate()
             fonts()  # this speeds up for strange reasons
-        self.an_modelname()
+        # added
+        if not self._headless:
+            self.an_modelname()
 
-        self.an_clocktext()
+            self.an_clocktext()
+        # added
 
         ap_parameters = [
             parameter
@@ -11790,7 +11816,7 @@ class Environment:
                 self.env._standbylist = []
 
             if self._event_list:
-                (t, priority, seq, c, return_value) = heapq.heappop(self._event_list)
+                (t, priority, seq, c, return_value) = self._event_list.pop()
             else:
                 c = self._main
                 if self.end_on_empty_eventlist:
@@ -12167,6 +12193,10 @@ class Environment:
         in such a way that the x and y scaling are the same.
 
         """
+        # added
+        if self._headless and (animate or animate3d or video):
+            raise ValueError("animation and video are not available in a headless environment")
+        # added
         frame_changed = False
         width_changed = False
         height_changed = False
@@ -13747,6 +13777,31 @@ class Environment:
             self.animation_parameters(maximum_number_of_bitmaps=value, animate=None)
         return self._maximum_number_of_bitmaps
 
+    # added
+    def maximum_number_of_sprites(self, value: int = None) -> int:
+        """
+        maximum number of rendered polygon/rectangle/line/circle images kept in the sprite cache
+        (applies to animation with tkinter only)
+
+        Animation objects with the same image ident (spec, colors, linewidth, angle, scale_factor, ...)
+        share one PIL image and one PhotoImage, so identical objects only update their canvas coordinates.
+
+        Parameters
+        ----------
+        value : int
+            new maximum number of cached images, 0 disables the cache
+
+            if not specified, no change
+
+        Returns
+        -------
+        maximum number of cached images : int
+        """
+        if value is not None:
+            self._sprite_cache.maxsize = value
+            self._sprite_cache.clear()
+        return self._sprite_cache.maxsize
+
     def synced(self, value: bool = None) -> bool:
         """
         synced
@@ -13797,7 +13852,7 @@ class Environment:
             return self.env._now
         else:
             if self._event_list:
-                return self._event_list[0][0]
+                return self._event_list.peek_time()
             else:
                 if self.end_on_empty_eventlist:
                     return self._now
@@ -14225,7 +14280,8 @@ class Environment:
                             )
                             ao.canvas_object = None
                         else:
-                            ao.im = ImageTk.PhotoImage(ao._image)
+                            # added
+                            ao.im = _photo_image(ao)
                             co1 = g.canvas.create_image(
                                 ao._image_x,
                                 self._height - ao._image_y,
@@ -14240,8 +14296,11 @@ class Environment:
                         if ao.canvas_object == co:
                             if ao._image_ident != ao._image_ident_prev:
                                 # print("updated")
-                                ao.im = ImageTk.PhotoImage(ao._image)
-                                g.canvas.itemconfig(ao.canvas_object, image=ao.im)
+                                # added
+                                im = _photo_image(ao)
+                                if im is not ao.im:
+                                    ao.im = im
+                                    g.canvas.itemconfig(ao.canvas_object, image=ao.im)
 
                             if (ao._image_x != ao._image_x_prev) or (
                                 ao._image_y != ao._image_y_prev
@@ -14254,7 +14313,8 @@ class Environment:
                                     (ao._image_x, self._height - ao._image_y),
                                 )
                         else:
-                            ao.im = ImageTk.PhotoImage(ao._image)
+                            # added
+                            ao.im = _photo_image(ao)
                             ao.canvas_object = co
                             g.canvas.itemconfig(ao.canvas_object, image=ao.im)
                             g.canvas.coords(
@@ -16416,6 +16476,71 @@ class _AnimateOff(Component):
 # end of PySimpleGUI UI
 
 
+# added
+class _Sprite:
+    """
+    rendered polygon/rectangle/line/circle image, shared by all animation objects with the same image ident
+    """
+
+    __slots__ = ("image", "bounds", "photo")
+
+    def __init__(self, image, bounds):
+        self.image = image
+        self.bounds = bounds  # (minrx, minry, maxrx, maxry, minpx, minpy, maxpx, maxpy)
+        self.photo = None  # ImageTk.PhotoImage, created when first shown on the canvas
+
+
+# added
+class _SpriteCache:
+    """
+    bounded LRU cache of rendered images, keyed by (type, scale, _image_ident)
+
+    Parameters
+    ----------
+    maxsize : int
+        maximum number of cached images, the least recently used image is evicted first
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, image, bounds) -> _Sprite:
+        entry = _Sprite(image, bounds)
+        if self.maxsize > 0:
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+
+
+# added
+def _photo_image(ao):
+    """
+    PhotoImage of ao._image, shared with all other objects showing the same cached image
+    """
+    sprite = getattr(ao, "_sprite", None)
+    if sprite is None or sprite.image is not ao._image:
+        return ImageTk.PhotoImage(ao._image)
+    if sprite.photo is None:
+        sprite.photo = ImageTk.PhotoImage(ao._image)
+    return sprite.photo
+
+
 class Animate2dBase(DynamicClass):
     def __init__(
         self, type, locals_, argument_default, attached_to=None, attach_text=True
@@ -16460,6 +16585,8 @@ class Animate2dBase(DynamicClass):
 
         self._image_ident = None  # denotes no image yet
         self._image = None
+        # added
+        self._sprite = None
         self._image_x = 0
         self._image_y = 0
         self.canvas_object = None
@@ -16646,7 +16773,26 @@ class Animate2dBase(DynamicClass):
                             g.scale_factor,
                         )
 
-                    if self._image_ident != self._image_ident_prev:
+                    # added
+                    build = self._image_ident != self._image_ident_prev
+                    if build:
+                        sprite_key = (self.type, self.env._scale, self._image_ident)
+                        self._sprite = self.env._sprite_cache.get(sprite_key)
+                        if self._sprite is not None:
+                            self._image = self._sprite.image
+                            (
+                                self.minrx,
+                                self.minry,
+                                self.maxrx,
+                                self.maxry,
+                                self.minpx,
+                                self.minpy,
+                                self.maxpx,
+                                self.maxpy,
+                            ) = self._sprite.bounds
+                            build = False
+
+                    if build:
                         if self.type == "rectangle":
                             px = [rectangle[0], rectangle[2]]
                             py = [rectangle[1], rectangle[3]]
@@ -16907,6 +17053,12 @@ class Animate2dBase(DynamicClass):
                         self.minpy = minpy
                         self.maxpx = maxpx
                         self.maxpy = maxpy
+                        # added
+                        self._sprite = self.env._sprite_cache.put(
+                            sprite_key,
+                            self._image,
+                            (minrx, minry, maxrx, maxry, minpx, minpy, maxpx, maxpy),
+                        )
 
                     if self.type == "circle":
                         self.env._centerx = qx
@@ -27124,6 +27276,10 @@ class _AnimateIntro(Animate3dBase):
         gl.glMatrixMode(gl.GL_MODELVIEW)
 
         gl.glLoadIdentity()
+        # added
+        # projection used by the frustum culling of Animate3dBoxBatch
+        _box_batch.read_projection_dot_view_matrix()
+        # added
 
 
 class _AnimateExtro(Animate3dBase):
@@ -27982,6 +28138,66 @@ class Animate3dBox(Animate3dBase):
         )
 
 
+# added
+class Animate3dBoxBatch(_box_batch.BoxBatch, Animate3dBase):
+    """
+    Draws many identical boxes, each moving linearly between two points, in one batched call
+
+    The boxes are kept in numpy arrays (one slot per box). Each frame the positions of all live slots
+    are evaluated at once, boxes outside the view frustum are dropped with one frustum_mask call and the
+    vertices of the visible boxes are written to a vertex buffer object with glBufferSubData and drawn
+    with a single glDrawArrays. Normals and colors are uploaded once per buffer allocation.
+
+    The implementation is shared by both salabim forks, see highway_sim.mySalabim.box_batch.
+
+    Parameters
+    ----------
+    x_len : float
+        length of the boxes in the x-direction (default 1)
+
+    y_len : float
+        length of the boxes in the y-direction (default 1)
+
+    z_len : float
+        length of the boxes in the z-direction (default 1)
+
+    z : float
+        z-coordinate of the boxes (default 0)
+
+    x_ref : int
+        if -1, the x parameter refers to the 'end' of the box
+
+        if 0, the x parameter refers to the center of the box (default)
+
+        if 1, the x parameter refers to the 'start' of the box
+
+    y_ref : int
+        see x_ref
+
+    z_ref : int
+        see x_ref
+
+    color : colorspec
+        color of the boxes (default "white")
+
+    shaded : bool
+        if False (default), all sides will be colored with color
+        if True, the various sides will have a different darkness
+
+    capacity : int
+        initial number of slots, grows when required (default 1024)
+
+    Note
+    ----
+    The geometry and color are the same for all boxes and are not dynamic.
+    Boxes are added with add, retargeted with move and removed with remove_box.
+    remove() removes the whole batch from the animation.
+    """
+
+
+# added
+
+
 class Animate3dBar(Animate3dBase):
     """
     Creates a 3D bar between two given points
@@ -65,6 +65,8 @@ from typing import (
 from pympler import tracker
 from pympler import summary
 
+from highway_sim.mySalabim import box_batch as _box_batch
+
 # added
 
 # module = salabim  # for PythonInExcel runner
@@ -82,8 +84,8 @@ PythonInExcel = not ("__file__" in globals())
 AnacondaCode = sys.platform == "emscripten"
 
 # added
-Enable_frustum_culling = True
-Projection_dot_view_matrix = None
+# frustum culling state (switch, projection matrix, y offset) is kept in box_batch,
+# shared with d2_interface_enhanced
 tr = tracker.SummaryTracker()
 SUMMARY_INTERVAL = 100
 SUMMARY_CNT = 0
@@ -6344,42 +6346,33 @@ class Animate3dBase(DynamicClass):
     def is_removed(self) -> bool:
         return self in self.env.an_objects3d
 
-    def is_point_in_frustum(self, t) -> bool:
+    # added
+    # objects with _cull = True provide frustum_center and are culled by cull_frustum before drawing,
+    # which sets _in_frustum
+    _cull = False
+    _in_frustum = True
+
+    def frustum_center(self, t) -> Tuple[float, float, float]:
         """
-        Args:
-            world_point (np.array): point in world coordinate [x, y, z]
+        center of the object in world coordinates, as used for frustum culling
         """
-        x = self.x(t)
-        y = self.y(t)
-        z = self.z(t)
-        x_ref = self.x_ref(t)
-        y_ref = self.y_ref(t)
-        z_ref = self.z_ref(t)
         x_len = self.x_len(t)
         y_len = self.y_len(t)
         z_len = self.z_len(t)
+        x_c = self.x(t) + self.x_ref(t) / 2 * x_len
+        y_c = self.y(t) + self.y_ref(t) / 2 * y_len + _box_batch.Frustum_y_offset
+        z_c = self.z(t) + self.z_ref(t) / 2 * z_len
+        return x_c, y_c, z_c
 
-        x_c = (x + x_ref / 2 * x_len) + 0
-        y_c = (y + y_ref / 2 * y_len) - 100
-        z_c = (z + z_ref / 2 * z_len) + 0
-
-        global Enable_frustum_culling
-        if not Enable_frustum_culling:
-            return True
-
-        world_point = numpy.array([x_c, y_c, z_c, 1.0])  # [x, y, z] -> [x, y, z, 1]
-
-        clip_coords = numpy.dot(Projection_dot_view_matrix, world_point)
-
-        x_clip, y_clip, z_clip, w_clip = clip_coords
+    def is_point_in_frustum(self, t) -> bool:
+        """
+        Args:
+            t (float): time
 
-        x_w = x_clip / w_clip
-        y_w = y_clip / w_clip
-        z_w = z_clip / w_clip
-        if -1 <= x_w <= 1 and -1 <= y_w <= 1 and -1 <= z_w <= 1:
-            return True
-        else:
-            return False
+        tests a single object, cull_frustum tests all objects of a frame with one matrix multiply
+        """
+        return bool(_box_batch.frustum_mask(numpy.array([self.frustum_center(t)]))[0])
+    # added
 
 
 class _Movement:
@@ -14288,12 +14281,17 @@ class Environment:
                     self.an_objects3d,
                     key=lambda obj: (obj.layer(self._t), obj.sequence),
                 )
+                # added
+                drawn = []
                 for an in an_objects3d:
                     if an.keep(t):
                         if an.visible(t):
-                            an.draw(t)
+                            drawn.append(an)
                     else:
                         an.remove()
+                cull_frustum(drawn, t)
+                for an in drawn:
+                    an.draw(t)
                 self._exclude_from_animation = "only in video"
 
             self.animation_post_tick(t)
@@ -22140,12 +22138,17 @@ class _BlindVideoMaker(Component):
                 self.env.an_objects3d,
                 key=lambda obj: (obj.layer(self.env._t), obj.sequence),
             )
+            # added
+            drawn = []
             for an in an_objects3d:
                 if an.keep(self.env._t):
                     if an.visible(self.env._t):
-                        an.draw(self.env._t)
+                        drawn.append(an)
                 else:
                     an.remove()
+            cull_frustum(drawn, self.env._t)
+            for an in drawn:
+                an.draw(self.env._t)
             self.env._exclude_from_animation = "only in video"
 
         self.env._save_frame()
@@ -27903,26 +27906,17 @@ class Animate3dBox(Animate3dBase):
         self.y_offset = 0
         self.z_offset = 0
 
-    def draw(self, t):
-        gl_color, show = self.env.colorspec_to_gl_color_alpha(self.color(t))
-        gl_edge_color, show_edge = self.env.colorspec_to_gl_color_alpha(
-            self.edge_color(t)
-        )
-        x = self.x(t)
-        y = self.y(t)
-        z = self.z(t)
-        x_ref = self.x_ref(t)
-        y_ref = self.y_ref(t)
-        z_ref = self.z_ref(t)
-        x_len = self.x_len(t)
-        y_len = self.y_len(t)
-        z_len = self.z_len(t)
-
-        x_c = (x + x_ref / 2 * x_len) + 0
-        y_c = (y + y_ref / 2 * y_len) + 0
-        z_c = (z + z_ref / 2 * z_len) + 0
+    # added
+    _cull = True
 
-        if self.is_point_in_frustum(t):
+    def draw(self, t):
+        # added
+        # _in_frustum is set by cull_frustum for all objects of the frame at once
+        if self._in_frustum:
+            gl_color, show = self.env.colorspec_to_gl_color_alpha(self.color(t))
+            gl_edge_color, show_edge = self.env.colorspec_to_gl_color_alpha(
+                self.edge_color(t)
+            )
             draw_box3d(
                 x_len=self.x_len(t),
                 y_len=self.y_len(t),
@@ -27944,6 +27938,66 @@ class Animate3dBox(Animate3dBase):
             )
 
 
+# added
+class Animate3dBoxBatch(_box_batch.BoxBatch, Animate3dBase):
+    """
+    Draws many identical boxes, each moving linearly between two points, in one batched call
+
+    The boxes are kept in numpy arrays (one slot per box). Each frame the positions of all live slots
+    are evaluated at once, boxes outside the view frustum are dropped with one frustum_mask call and the
+    vertices of the visible boxes are written to a vertex buffer object with glBufferSubData and drawn
+    with a single glDrawArrays. Normals and colors are uploaded once per buffer allocation.
+
+    The implementation is shared by both salabim forks, see highway_sim.mySalabim.box_batch.
+
+    Parameters
+    ----------
+    x_len : float
+        length of the boxes in the x-direction (default 1)
+
+    y_len : float
+        length of the boxes in the y-direction (default 1)
+
+    z_len : float
+        length of the boxes in the z-direction (default 1)
+
+    z : float
+        z-coordinate of the boxes (default 0)
+
+    x_ref : int
+        if -1, the x parameter refers to the 'end' of the box
+
+        if 0, the x parameter refers to the center of the box (default)
+
+        if 1, the x parameter refers to the 'start' of the box
+
+    y_ref : int
+        see x_ref
+
+    z_ref : int
+        see x_ref
+
+    color : colorspec
+        color of the boxes (default "white")
+
+    shaded : bool
+        if False (default), all sides will be colored with color
+        if True, the various sides will have a different darkness
+
+    capacity : int
+        initial number of slots, grows when required (default 1024)
+
+    Note
+    ----
+    The geometry and color are the same for all boxes and are not dynamic.
+    Boxes are added with add, retargeted with move and removed with remove_box.
+    remove() removes the whole batch from the animation.
+    """
+
+
+# added
+
+
 class Animate3dBar(Animate3dBase):
     """
     Creates a 3D bar between two given points
@@ -29736,10 +29790,31 @@ def set_projection_dot_view_matrix():
     # projection_matrix = numpy.array(
     #     gl.glGetDoublev(gl.GL_PROJECTION_MATRIX), dtype=numpy.float64
     # ).T
-    global Projection_dot_view_matrix
-    Projection_dot_view_matrix = numpy.array(
-        gl.glGetDoublev(gl.GL_PROJECTION_MATRIX), dtype=numpy.float64
-    ).T
+    _box_batch.read_projection_dot_view_matrix()
+
+
+# added
+def cull_frustum(an_objects3d: Iterable["Animate3dBase"], t: float) -> None:
+    """
+    sets _in_frustum of all cullable objects (_cull = True) of a frame, with one matrix multiply
+
+    Parameters
+    ----------
+    an_objects3d : iterable of Animate3dBase
+        objects to be drawn
+
+    t : float
+        time
+    """
+    candidates = [an for an in an_objects3d if an._cull]
+    if not candidates:
+        return
+    centers = numpy.array([an.frustum_center(t) for an in candidates], dtype=numpy.float64)
+    for an, in_frustum in zip(candidates, _box_batch.frustum_mask(centers).tolist()):
+        an._in_frustum = in_frustum
+
+
+# added
 
 
 class capture_stdout:
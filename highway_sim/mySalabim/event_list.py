@@ -0,0 +1,275 @@
+"""
+未来事件列表模块
+
+为Environment提供支持按句柄删除的事件列表，替代原先直接在list上使用heapq、
+删除时线性查找并整体heapify的做法（每次取消/重新调度为O(n)）
+
+条目格式与原实现一致：[t, priority, seq, component, return_value]，
+按(t, priority, seq)排序，seq唯一，因此不会比较到component
+
+提供两种实现，由Environment(event_list=...)选择：
+    - "heap"     : HeapEventList，二叉堆，O(log n)
+    - "calendar" : CalendarEventList，日历队列，对毫秒级密集、间隔分布稳定的事件均摊O(1)
+
+两种实现的出队顺序完全一致(均按(t, priority, seq)全序)，相同随机种子下仿真结果相同
+
+使用示例::
+
+    event_list = create("heap")
+    entry = event_list.push(t, priority, seq, component, return_value)
+    event_list.remove(entry)
+    t, priority, seq, component, return_value = event_list.pop()
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+from typing import Any, Dict, Iterator, List
+
+# 条目中component所在位置,置为None即表示该条目已被删除(墓碑)
+_COMPONENT = 3
+
+
+class HeapEventList:
+    """
+    基于heapq的惰性删除事件列表
+
+    push返回条目本身作为句柄，remove只把条目标记为墓碑(O(1))，pop/peek时跳过墓碑(O(log n))。
+    墓碑数量超过堆大小一半时整体压缩，保证堆大小与存活事件数同阶，删除的均摊代价为O(1)
+    """
+
+    __slots__ = ("_heap", "_removed")
+
+    def __init__(self):
+        self._heap: List[list] = []
+        self._removed: int = 0
+
+    def push(self, t: float, priority: float, seq: int, component: Any, return_value: Any) -> list:
+        """
+        加入一个事件
+
+        Returns:
+            list: 条目句柄，用于remove
+        """
+        entry = [t, priority, seq, component, return_value]
+        heapq.heappush(self._heap, entry)
+        return entry
+
+    def remove(self, entry: list) -> None:
+        """
+        删除push返回的条目
+
+        Args:
+            entry (list): 条目句柄
+        """
+        entry[_COMPONENT] = None
+        self._removed += 1
+        if self._removed > len(self._heap) >> 1:
+            self._compact()
+
+    def pop(self) -> list:
+        """
+        取出(t, priority, seq)最小的事件
+
+        Returns:
+            list: [t, priority, seq, component, return_value]
+        """
+        heap = self._heap
+        while True:
+            entry = heapq.heappop(heap)
+            if entry[_COMPONENT] is not None:
+                return entry
+            self._removed -= 1
+
+    def peek_time(self) -> float:
+        """
+        返回最早事件的时间，调用前需保证列表非空
+        """
+        heap = self._heap
+        while heap[0][_COMPONENT] is None:
+            heapq.heappop(heap)
+            self._removed -= 1
+        return heap[0][0]
+
+    def _compact(self) -> None:
+        self._heap = [entry for entry in self._heap if entry[_COMPONENT] is not None]
+        heapq.heapify(self._heap)
+        self._removed = 0
+
+    def __len__(self) -> int:
+        return len(self._heap) - self._removed
+
+    def __bool__(self) -> bool:
+        return len(self._heap) > self._removed
+
+    def __iter__(self) -> Iterator[list]:
+        """
+        按堆中顺序(非时间顺序)遍历存活的事件
+        """
+        return (entry for entry in self._heap if entry[_COMPONENT] is not None)
+
+
+class CalendarEventList:
+    """
+    日历队列(Brown, 1988)事件列表
+
+    时间轴按宽度width划分为虚拟桶floor(t / width)，映射到nbuckets个物理桶(虚拟桶号 & (nbuckets - 1))，
+    桶内按(t, priority, seq)有序。出队时从当前虚拟桶开始依次查看各桶的队首，只取属于当前虚拟桶的事件；
+    一整轮没有找到时直接在所有桶首中查找最小值。事件数翻倍/减半时调整桶数，并按最早若干事件的平均间隔重新估计桶宽
+
+    删除与HeapEventList相同，采用墓碑标记
+    """
+
+    __slots__ = ("_buckets", "_mask", "_width", "_vb", "_size", "_removed")
+
+    _MIN_BUCKETS = 2
+    _WIDTH_SAMPLES = 64
+
+    def __init__(self, width: float = 1.0):
+        self._buckets: List[List[list]] = [[] for _ in range(self._MIN_BUCKETS)]
+        self._mask: int = self._MIN_BUCKETS - 1
+        self._width: float = width
+        # 当前虚拟桶号
+        self._vb: int = 0
+        # 存活事件数
+        self._size: int = 0
+        # 桶中墓碑数
+        self._removed: int = 0
+
+    def push(self, t: float, priority: float, seq: int, component: Any, return_value: Any) -> list:
+        """
+        加入一个事件
+
+        Returns:
+            list: 条目句柄，用于remove
+        """
+        entry = [t, priority, seq, component, return_value]
+        vb = int(t // self._width)
+        if vb < self._vb:
+            self._vb = vb
+        bisect.insort(self._buckets[vb & self._mask], entry)
+        self._size += 1
+        if self._size > len(self._buckets) << 1:
+            self._resize(len(self._buckets) << 1)
+        return entry
+
+    def remove(self, entry: list) -> None:
+        """
+        删除push返回的条目
+
+        Args:
+            entry (list): 条目句柄
+        """
+        entry[_COMPONENT] = None
+        self._size -= 1
+        self._removed += 1
+        if self._removed > self._size:
+            self._resize(len(self._buckets))
+
+    def pop(self) -> list:
+        """
+        取出(t, priority, seq)最小的事件
+
+        Returns:
+            list: [t, priority, seq, component, return_value]
+        """
+        bucket = self._buckets[self._find()]
+        entry = bucket.pop(0)
+        self._size -= 1
+        if self._size < len(self._buckets) >> 1 and len(self._buckets) > self._MIN_BUCKETS:
+            self._resize(len(self._buckets) >> 1)
+        return entry
+
+    def peek_time(self) -> float:
+        """
+        返回最早事件的时间，调用前需保证列表非空
+        """
+        return self._buckets[self._find()][0][0]
+
+    def _find(self) -> int:
+        """
+        定位最早事件所在的物理桶，并把当前虚拟桶推进到该事件
+
+        Returns:
+            int: 物理桶下标
+        """
+        if self._size == 0:
+            raise IndexError("pop from empty event list")
+        buckets = self._buckets
+        mask = self._mask
+        width = self._width
+        vb = self._vb
+        for _ in range(len(buckets)):
+            bucket = buckets[vb & mask]
+            while bucket and bucket[0][_COMPONENT] is None:
+                del bucket[0]
+                self._removed -= 1
+            if bucket and int(bucket[0][0] // width) <= vb:
+                self._vb = vb
+                return vb & mask
+            vb += 1
+        # 一整轮都没有当前"年份"的事件,直接查找所有桶首的最小值
+        best = None
+        for i, bucket in enumerate(buckets):
+            while bucket and bucket[0][_COMPONENT] is None:
+                del bucket[0]
+                self._removed -= 1
+            if bucket and (best is None or bucket[0] < buckets[best][0]):
+                best = i
+        self._vb = int(buckets[best][0][0] // width)
+        return best
+
+    def _resize(self, nbuckets: int) -> None:
+        entries = [entry for bucket in self._buckets for entry in bucket if entry[_COMPONENT] is not None]
+        self._buckets = [[] for _ in range(nbuckets)]
+        self._mask = nbuckets - 1
+        self._removed = 0
+        if not entries:
+            return
+        times = heapq.nsmallest(self._WIDTH_SAMPLES, (entry[0] for entry in entries))
+        if times[-1] != times[0]:
+            # 每个桶平均容纳约3个事件
+            self._width = 3 * (times[-1] - times[0]) / (len(times) - 1)
+        width = self._width
+        mask = self._mask
+        buckets = self._buckets
+        for entry in entries:
+            buckets[int(entry[0] // width) & mask].append(entry)
+        # 每个桶只有少量事件,逐桶排序的总代价为O(n)
+        for bucket in buckets:
+            bucket.sort()
+        self._vb = int(times[0] // width)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __iter__(self) -> Iterator[list]:
+        """
+        按桶顺序(非时间顺序)遍历存活的事件
+        """
+        return (entry for bucket in self._buckets for entry in bucket if entry[_COMPONENT] is not None)
+
+
+EVENT_LISTS: Dict[str, type] = {
+    "heap": HeapEventList,
+    "calendar": CalendarEventList,
+}
+
+
+def create(name: str):
+    """
+    根据名称创建事件列表
+
+    Args:
+        name (str): "heap" 或 "calendar"
+
+    Returns:
+        HeapEventList | CalendarEventList: 事件列表
+    """
+    if name not in EVENT_LISTS:
+        raise ValueError(f"unknown event list: {name}, expected one of {list(EVENT_LISTS)}")
+    return EVENT_LISTS[name]()
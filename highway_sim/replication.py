@@ -0,0 +1,353 @@
+"""
+多次重复实验模块
+
+功能概述：
+单次仿真的统计结果带有随机误差。本模块将N次相互独立的重复实验分发到进程池中运行，
+每次重复实验使用由根种子派生的独立随机数流，最后把各次的汇总指标合并为均值与置信区间
+
+实现要点：
+    1. 种子：numpy.random.SeedSequence(seed).spawn(N)为每次重复实验派生互不重叠的种子，
+       根种子相同则结果可复现，未指定根种子时记录随机生成的entropy以便复现
+    2. 路网共享：支持fork的平台上，子进程在创建时继承父进程已解析好的路网与交通流量，只读使用，不重复解析，
+       其他平台由每个子进程在初始化时解析一次(可命中路网解析缓存)
+    3. 统计：每次重复实验使用独立的StatsCollector，结束后取StatsCollector.summary()，
+       置信区间按Student t分布计算
+
+使用示例::
+
+    rn, traffic = headless.parse()
+    report = run_replications(rn, traffic, 8, workers=4, seed=2024)
+    report.record(logger)
+
+    # 命令行
+    python replication.py --log --replications 8 --workers 4 --seed 2024
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import multiprocessing
+import os
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from highway_sim import headless
+from highway_sim.config import args
+from highway_sim.config import common
+from highway_sim.data_parser.road_network import RoadNetwork
+from highway_sim.data_parser.traffic import Traffic
+from highway_sim.engine.vectorized import VectorizedSimulator
+from highway_sim.stats.default import StatsCollector
+
+logger = logging.getLogger(__name__)
+
+# 子进程共享的只读路网与交通流量
+_network: Optional[Tuple[RoadNetwork, Traffic]] = None
+
+
+@dataclass
+class ReplicationResult:
+    """
+    单次重复实验的结果
+    """
+    index: int
+    seed: int
+    metrics: Dict[str, float]
+
+
+@dataclass
+class ConfidenceInterval:
+    """
+    指标在多次重复实验上的均值与置信区间
+    """
+    mean: float
+    half_width: float
+    n: int
+
+    @property
+    def low(self) -> float:
+        return self.mean - self.half_width
+
+    @property
+    def high(self) -> float:
+        return self.mean + self.half_width
+
+
+@dataclass
+class ReplicationReport:
+    """
+    多次重复实验的合并结果
+
+    Attributes:
+        entropy (int): 根种子的entropy，用于复现
+        confidence (float): 置信水平
+        results (List[ReplicationResult]): 按编号排序的各次结果
+        intervals (Dict[str, ConfidenceInterval]): 指标名 -> 置信区间
+    """
+    entropy: int
+    confidence: float
+    results: List[ReplicationResult] = field(default_factory=list)
+    intervals: Dict[str, ConfidenceInterval] = field(default_factory=dict)
+
+    def record(self, log: logging.Logger) -> None:
+        """
+        以info级别输出各指标的置信区间
+
+        Args:
+            log (logging.Logger): 日志记录器
+
+        Returns:
+
+        """
+        log.info(
+            "%d replications, seed entropy %d, %.0f%% confidence",
+            len(self.results),
+            self.entropy,
+            self.confidence * 100,
+        )
+        for name, ci in self.intervals.items():
+            log.info("%s %.4f ± %.4f [%.4f, %.4f]", name, ci.mean, ci.half_width, ci.low, ci.high)
+
+
+def spawn_seeds(n: int, seed: Optional[int] = None) -> Tuple[int, List[int]]:
+    """
+    由根种子派生n个独立种子
+
+    Args:
+        n (int): 重复次数
+        seed (Optional[int]): 根种子，None表示随机
+
+    Returns:
+        Tuple[int, List[int]]: (根种子entropy, 各次重复实验的种子)
+    """
+    root = np.random.SeedSequence(seed)
+    seeds = [int(child.generate_state(1)[0]) for child in root.spawn(n)]
+    return root.entropy, seeds
+
+
+def _t_cdf(t: float, df: int) -> float:
+    # 整数自由度t分布的分布函数，Abramowitz & Stegun 26.7.3/26.7.4的有限级数
+    theta = math.atan(t / math.sqrt(df))
+    c2 = math.cos(theta) ** 2
+    if df % 2:
+        total, term = 0.0, math.cos(theta)
+        for k in range(1, (df - 1) // 2 + 1):
+            if k > 1:
+                term *= c2 * (2 * k - 2) / (2 * k - 1)
+            total += term
+        a = 2 / math.pi * (theta + math.sin(theta) * total)
+    else:
+        total, term = 1.0, 1.0
+        for k in range(1, df // 2):
+            term *= c2 * (2 * k - 1) / (2 * k)
+            total += term
+        a = math.sin(theta) * total
+    return (1 + a) / 2
+
+
+def t_quantile(p: float, df: int) -> float:
+    """
+    Student t分布的p分位数，df<=2时为精确值；其余使用Cornish-Fisher展开，
+    df<10时展开在p=0.995处仍有最多0.8%的误差，再以精确分布函数做牛顿迭代，
+    df>=10时展开在p<=0.995处相对误差小于0.01%
+
+    Args:
+        p (float): 概率，0.5 < p < 1
+        df (int): 自由度
+
+    Returns:
+        float: 分位数
+    """
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = statistics.NormalDist().inv_cdf(p)
+    t = (
+        z
+        + (z ** 3 + z) / (4 * df)
+        + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+        + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3)
+        + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * df ** 4)
+    )
+    if df < 10:
+        log_norm = math.lgamma((df + 1) / 2) - math.lgamma(df / 2) - 0.5 * math.log(df * math.pi)
+        for _ in range(8):
+            pdf = math.exp(log_norm - (df + 1) / 2 * math.log1p(t * t / df))
+            step = (_t_cdf(t, df) - p) / pdf
+            t -= step
+            if abs(step) <= 1e-15 * t:
+                break
+    return t
+
+
+def merge(results: List[ReplicationResult], confidence: float = 0.95) -> Dict[str, ConfidenceInterval]:
+    """
+    合并多次重复实验的指标，忽略nan
+
+    Args:
+        results (List[ReplicationResult]): 各次结果
+        confidence (float): 置信水平
+
+    Returns:
+        Dict[str, ConfidenceInterval]: 指标名 -> 置信区间，只有一个样本时半宽为nan
+    """
+    intervals = {}
+    names = results[0].metrics.keys() if results else []
+    for name in names:
+        values = [r.metrics[name] for r in results if not math.isnan(r.metrics[name])]
+        n = len(values)
+        if n == 0:
+            intervals[name] = ConfidenceInterval(math.nan, math.nan, 0)
+            continue
+        mean = statistics.fmean(values)
+        if n == 1:
+            intervals[name] = ConfidenceInterval(mean, math.nan, 1)
+            continue
+        half_width = t_quantile((1 + confidence) / 2, n - 1) * statistics.stdev(values) / math.sqrt(n)
+        intervals[name] = ConfidenceInterval(mean, half_width, n)
+    return intervals
+
+
+def _init_worker(use_cache: bool) -> None:
+    global _network
+    if _network is None:
+        _network = headless.parse(use_cache)
+
+
+def share_network(rn: RoadNetwork, traffic: Traffic) -> None:
+    """
+    设置当前进程及之后创建的子进程共享的路网与交通流量
+
+    Args:
+        rn (RoadNetwork): 已解析的路网
+        traffic (Traffic): 交通流量数据
+
+    Returns:
+
+    """
+    global _network
+    _network = (rn, traffic)
+
+
+def create_executor(workers: int, use_cache: bool = True) -> ProcessPoolExecutor:
+    """
+    创建共享路网的进程池，需先调用share_network
+
+    Args:
+        workers (int): 进程数
+        use_cache (bool): 不支持fork的平台上，子进程解析路网时是否使用缓存
+
+    Returns:
+        ProcessPoolExecutor: 进程池
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        # fork时子进程直接继承_network
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(use_cache,),
+    )
+
+
+def replicate(seed: int, duration_ms: float, engine: str = "des", event_list: str = "heap") -> Dict[str, float]:
+    """
+    在共享路网上运行一次仿真，返回StatsCollector.summary()
+
+    Args:
+        seed (int): 随机种子
+        duration_ms (float): 仿真时长（毫秒）
+        engine (str): 仿真引擎，"des"或"vectorized"
+        event_list (str): 未来事件列表实现，"heap"或"calendar"
+
+    Returns:
+        Dict[str, float]: 汇总指标
+    """
+    rn, traffic = _network
+    # 只需要汇总指标,不保存逐个样本
+    stats = StatsCollector(keep_samples=False)
+    if engine == "vectorized":
+        VectorizedSimulator(rn, traffic, seed=seed, stats=stats).run(duration_ms)
+    else:
+        headless.run(rn, traffic, duration_ms, random_seed=seed, event_list=event_list, stats=stats)
+    return stats.summary()
+
+
+def _replicate(index: int, seed: int, duration_ms: float, engine: str, event_list: str) -> ReplicationResult:
+    return ReplicationResult(index, seed, replicate(seed, duration_ms, engine, event_list))
+
+
+def run_replications(
+        rn: RoadNetwork,
+        traffic: Traffic,
+        n: int,
+        duration_ms: float = common.DAY_MILLISECOND,
+        workers: Optional[int] = None,
+        seed: Optional[int] = None,
+        engine: str = "des",
+        event_list: str = "heap",
+        confidence: float = 0.95,
+        use_cache: bool = True,
+) -> ReplicationReport:
+    """
+    运行n次独立重复实验并合并结果
+
+    Args:
+        rn (RoadNetwork): 已解析的路网，子进程只读共享
+        traffic (Traffic): 交通流量数据
+        n (int): 重复次数
+        duration_ms (float): 每次仿真时长（毫秒）
+        workers (Optional[int]): 进程数，None表示CPU核数，1表示在当前进程中依次运行
+        seed (Optional[int]): 根种子，None表示随机
+        engine (str): 仿真引擎，"des"或"vectorized"
+        event_list (str): 未来事件列表实现，"heap"或"calendar"
+        confidence (float): 置信水平
+        use_cache (bool): 不支持fork的平台上，子进程解析路网时是否使用缓存
+
+    Returns:
+        ReplicationReport: 合并结果
+    """
+    if n < 1:
+        raise ValueError(f"replications must be positive, got {n}")
+    entropy, seeds = spawn_seeds(n, seed)
+    workers = min(workers or os.cpu_count() or 1, n)
+    jobs = [(i, s, duration_ms, engine, event_list) for i, s in enumerate(seeds)]
+
+    share_network(rn, traffic)
+    if workers == 1:
+        results = [_replicate(*job) for job in jobs]
+    else:
+        with create_executor(workers, use_cache) as executor:
+            futures = [executor.submit(_replicate, *job) for job in jobs]
+            results = [f.result() for f in futures]
+    return ReplicationReport(entropy, confidence, results, merge(results, confidence))
+
+
+if __name__ == "__main__":
+    args.Parser()
+
+    headless.init_logger(args.ENABLE_LOG)
+
+    road_network, traffic_data = headless.parse(args.ENABLE_CACHE)
+    report = run_replications(
+        road_network,
+        traffic_data,
+        args.REPLICATIONS,
+        duration_ms=common.DAY_MILLISECOND * 0.01,
+        workers=args.WORKERS,
+        seed=args.SEED,
+        engine=args.ENGINE,
+        event_list=args.EVENT_LIST,
+        use_cache=args.ENABLE_CACHE,
+    )
+    if args.ENABLE_LOG:
+        report.record(headless.logger)
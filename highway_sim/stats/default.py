@@ -1,155 +1,490 @@
 """
 默认统计信息模块
-"""
-
-import logging
-from typing import List, Dict
-
-from highway_sim.config import common
 
-gantry_time_used: List[int] = []
-total_time_used: List[int] = []
-num_gantry_passed: List[int] = []
-exit_hex2num: Dict[str, int] = {}
-entry_hex2num: Dict[str, int] = {}
-hour2entry_num: Dict[int, int] = {a: 0 for a in range(24)}
-hour2exit_num: Dict[int, int] = {a: 0 for a in range(24)}
+统计结果保存在StatsCollector实例中，由仿真环境(HighwayEnvironment.stats)或向量化仿真器持有，
+同一进程内的多次或并行仿真互不影响。每条统计事件同时转发给注册的接收器(见sink模块)，
+转发函数在接收器变化时绑定一次：没有接收器时为空操作，只有一个接收器时直接调用其record
 
+门架通行时间、总行程时间、经过门架数始终以流式统计(见streaming模块)累计，内存固定；
+keep_samples为False时不再保存逐个样本，record输出紧凑汇总代替完整列表
 
-def entry_hour_info(now_ms: float, logger: logging.Logger) -> None:
-    """
-    记录车辆进入高速公路时的小时信息，并以debug级别输出
+指定hops(见trace模块)时，车辆的每一段行程另外写入列式追踪文件；
+指定flows(见flow模块)时，每一段行程同时计入分位置、分时间段的流量与占用；
+指定od(见od模块)时，驶离的车辆按(入口, 出口)计入出入口矩阵
+"""
 
-    Args:
-        now_ms (float): 当前时间（ms）
-        logger (logging.Logger): 日志记录器
+import logging
+from typing import Dict, Iterable, List, Optional
 
-    Returns:
+import numpy as np
 
-    """
-    hour = int(now_ms / common.HOUR_MILLISECOND) % 24
-    hour2entry_num[hour] += 1
-    logger.debug("enterHour %d", hour)
+from highway_sim.config import common
+from highway_sim.stats import sink as stats_sink
+from highway_sim.stats.flow import FlowCounter
+from highway_sim.stats.od import ODMatrix
+from highway_sim.stats.sink import Sink, default_sinks, noop
+from highway_sim.stats.streaming import StreamingStats
+from highway_sim.stats.trace import HopTraceWriter
 
 
-def exit_hour_info(now_ms: float, logger: logging.Logger) -> None:
+class StatsCollector:
     """
-    记录车辆离开高速公路时的小时信息，并以debug级别输出
+    统计信息收集器
 
     Args:
-        now_ms (float): 当前时间（ms）
-        logger (logging.Logger): 日志记录器
-
-    Returns:
-
+        sinks (Optional[Iterable[Sink]]): 统计事件接收器，None表示default_sinks()
+        keep_samples (bool): 是否保存逐个样本
+        hops (Optional[HopTraceWriter]): 逐段行程追踪，None表示不追踪
+        flows (Optional[FlowCounter]): 分位置流量计数器，None表示不统计
+        od (Optional[ODMatrix]): 出入口矩阵，None表示不统计
     """
-    hour = int(now_ms / common.HOUR_MILLISECOND) % 24
-    hour2exit_num[hour] += 1
-    logger.debug("exitHour %d", hour)
 
+    def __init__(
+            self,
+            sinks: Optional[Iterable[Sink]] = None,
+            keep_samples: bool = True,
+            hops: Optional[HopTraceWriter] = None,
+            flows: Optional[FlowCounter] = None,
+            od: Optional[ODMatrix] = None,
+    ):
+        self.keep_samples = keep_samples
+        self.hops = hops
+        self.flows = flows
+        self.od = od
+        self.__init_streaming()
+        self.gantry_time_used: List[int] = []
+        self.total_time_used: List[int] = []
+        self.num_gantry_passed: List[int] = []
+        self.exit_hex2num: Dict[str, int] = {}
+        self.entry_hex2num: Dict[str, int] = {}
+        self.hour2entry_num: Dict[int, int] = {a: 0 for a in range(24)}
+        self.hour2exit_num: Dict[int, int] = {a: 0 for a in range(24)}
+        self.sinks: List[Sink] = list(sinks) if sinks is not None else default_sinks()
+        self.__bind()
+
+    def __init_streaming(self) -> None:
+        # 门架通行时间按10秒分桶到1小时,总行程时间按分钟分桶到1天
+        self.gantry_time = StreamingStats(0, common.HOUR_MILLISECOND / common.SECOND_MILLISECOND, 360)
+        self.total_time = StreamingStats(0, common.DAY_MILLISECOND / common.SECOND_MILLISECOND, 1440)
+        self.gantry_passed = StreamingStats(0, 512, 512)
+
+    def add_sink(self, sink: Sink) -> None:
+        """
+        注册统计事件接收器
+
+        Args:
+            sink (Sink): 接收器
+
+        Returns:
+
+        """
+        self.sinks.append(sink)
+        self.__bind()
+
+    def __bind(self) -> None:
+        if not self.sinks:
+            self.__emit = noop
+            self.__emit_many = noop
+        elif len(self.sinks) == 1:
+            self.__emit = self.sinks[0].record
+            self.__emit_many = self.sinks[0].record_many
+        else:
+            self.__emit = self.__emit_all
+            self.__emit_many = self.__emit_many_all
+
+    def __emit_all(self, kind: str, value: object) -> None:
+        for s in self.sinks:
+            s.record(kind, value)
+
+    def __emit_many_all(self, kind: str, values: List[object]) -> None:
+        for s in self.sinks:
+            s.record_many(kind, values)
+
+    def entry_hour_info(self, now_ms: float) -> None:
+        """
+        记录车辆进入高速公路时的小时信息
+
+        Args:
+            now_ms (float): 当前时间（ms）
+
+        Returns:
+
+        """
+        hour = int(now_ms / common.HOUR_MILLISECOND) % 24
+        self.hour2entry_num[hour] += 1
+        self.__emit(stats_sink.ENTRY_HOUR, hour)
+
+    def exit_hour_info(self, now_ms: float) -> None:
+        """
+        记录车辆离开高速公路时的小时信息
+
+        Args:
+            now_ms (float): 当前时间（ms）
+
+        Returns:
+
+        """
+        hour = int(now_ms / common.HOUR_MILLISECOND) % 24
+        self.hour2exit_num[hour] += 1
+        self.__emit(stats_sink.EXIT_HOUR, hour)
+
+    def num_passed_info(self, num: int) -> None:
+        """
+        记录通过的门架数量
+
+        Args:
+            num (int): 通过的门架数量
+
+        Returns:
+
+        """
+        if self.keep_samples:
+            self.num_gantry_passed.append(num)
+        self.gantry_passed.add(num)
+        self.__emit(stats_sink.NUM_PASSED, num)
+
+    def total_time_info(self, now_ms: float, last_ms: float) -> None:
+        """
+        记录车辆通过高速公路的总时间
+
+        Args:
+            now_ms (float): 当前时间（ms）
+            last_ms (float): 进入公路时间（ms）
+
+        Returns:
+
+        """
+        duration = int((now_ms - last_ms) / common.SECOND_MILLISECOND)
+        if self.keep_samples:
+            self.total_time_used.append(duration)
+        self.total_time.add(duration)
+        self.__emit(stats_sink.TOTAL_TIME, duration)
 
-def num_passed_info(num: int, logger: logging.Logger) -> None:
-    """
-    记录通过的门架数量，并以debug级别输出
+    def gantry_time_info(self, duration: int) -> None:
+        """
+        记录车辆通过门架的时间
 
-    Args:
-        num (int): 通过的门架数量
-        logger (logging.Logger): 日志记录器
+        Args:
+            duration (int): 通过门架的时间（ms）
 
-    Returns:
+        Returns:
 
-    """
-    num_gantry_passed.append(num)
-    logger.debug("passed %d gantry", num)
+        """
+        d = int(duration / common.SECOND_MILLISECOND)
+        if self.keep_samples:
+            self.gantry_time_used.append(d)
+        self.gantry_time.add(d)
+        self.__emit(stats_sink.GANTRY_TIME, d)
 
+    def exit_hex_info(self, h: str) -> None:
+        """
+        记录车辆离开高速公路时的出口编号信息
 
-def total_time_info(now_ms: float, last_ms: float, logger: logging.Logger) -> None:
-    """
-    记录车辆通过高速公路的总时间，并以debug级别输出
+        Args:
+            h (str): 出口编号
 
-    Args:
-        now_ms (float): 当前时间（ms）
-        last_ms (float): 进入公路时间（ms）
-        logger (logging.Logger): 日志记录器
+        Returns:
 
-    Returns:
+        """
+        self.exit_hex2num[h] = self.exit_hex2num.get(h, 0) + 1
+        self.__emit(stats_sink.EXIT_HEX, h)
 
-    """
+    def entry_hex_info(self, h: str) -> None:
+        """
+        记录车辆进入高速公路时的入口编号信息
 
-    duration = int((now_ms - last_ms) / common.SECOND_MILLISECOND)
-    total_time_used.append(duration)
-    logger.debug("totalTime %d s", duration)
+        Args:
+            h (str): 入口编号
 
+        Returns:
 
-def gantry_time_info(duration: int, logger: logging.Logger) -> None:
-    """
-    记录车辆通过门架的时间，并以debug级别输出
+        """
+        self.entry_hex2num[h] = self.entry_hex2num.get(h, 0) + 1
+        self.__emit(stats_sink.ENTRY_HEX, h)
 
-    Args:
-        duration (int): 通过门架的时间（ms）
-        logger (logging.Logger): 日志记录器
+    def od_info(self, origin: int, destination: int) -> None:
+        """
+        记录驶离车辆的入口与出口，未启用出入口矩阵时不记录
 
-    Returns:
+        Args:
+            origin (int): 入口的Location.index
+            destination (int): 出口的Location.index
 
-    """
-    d = int(duration / common.SECOND_MILLISECOND)
-    gantry_time_used.append(d)
-    logger.debug("thisTime %d s", d)
+        Returns:
 
+        """
+        if self.od is not None:
+            self.od.add(origin, destination)
 
-def exit_hex_info(h: str, logger: logging.Logger) -> None:
-    """
-    记录车辆离开高速公路时的出口编号信息，并以debug级别输出
+    @property
+    def track_hops(self) -> bool:
+        """
+        是否需要逐段记录行程(启用了逐段行程追踪或分位置流量)
+        """
+        return self.hops is not None or self.flows is not None
 
-    Args:
-        h (str): 出口编号
-        logger (logging.Logger): 日志记录器
+    def hop_info(self, car: int, node: int, enter_ms: float, exit_ms: float) -> None:
+        """
+        记录车辆的一段行程，写入逐段行程追踪与分位置流量
 
-    Returns:
+        Args:
+            car (int): 车辆编号
+            node (int): 出发位置的Location.index
+            enter_ms (float): 进入时间（ms）
+            exit_ms (float): 离开时间（ms）
 
-    """
-    exit_hex2num[h] = exit_hex2num.get(h, 0) + 1
-    logger.debug("exitHex %s", h)
+        Returns:
 
+        """
+        if self.hops is not None:
+            self.hops.add(car, node, enter_ms, exit_ms)
+        if self.flows is not None:
+            self.flows.add(node, enter_ms, exit_ms)
 
-def entry_hex_info(h: str, logger: logging.Logger) -> None:
-    """
-    记录车辆进入高速公路时的入口编号信息，并以debug级别输出
+    def add_hours(self, entry: bool, hours: List[int]) -> None:
+        """
+        批量记录进入或离开的小时
 
-    Args:
-        h (str): 入口编号
-        logger (logging.Logger): 日志记录器
+        Args:
+            entry (bool): True为进入，False为离开
+            hours (List[int]): 小时(0-23)
 
-    Returns:
+        Returns:
 
-    """
-    entry_hex2num[h] = entry_hex2num.get(h, 0) + 1
-    logger.debug("enterHex %s", h)
+        """
+        hour2num = self.hour2entry_num if entry else self.hour2exit_num
+        for hour in hours:
+            hour2num[hour] += 1
+        self.__emit_many(stats_sink.ENTRY_HOUR if entry else stats_sink.EXIT_HOUR, hours)
 
+    def add_hex_counts(self, entry: bool, counts: Dict[str, int]) -> None:
+        """
+        批量记录出入口编号
 
-def record(logger: logging.Logger) -> None:
-    """
-    以info级别输出记录的所有统计信息，可选：对数据进行额外操作
+        Args:
+            entry (bool): True为入口，False为出口
+            counts (Dict[str, int]): 编号 -> 车辆数
 
-    Args:
-        logger (logging.Logger): 日志记录器
+        Returns:
 
-    Returns:
+        """
+        hex2num = self.entry_hex2num if entry else self.exit_hex2num
+        for h, num in counts.items():
+            hex2num[h] = hex2num.get(h, 0) + num
+        if self.sinks:
+            kind = stats_sink.ENTRY_HEX if entry else stats_sink.EXIT_HEX
+            self.__emit_many(kind, [h for h, num in counts.items() for _ in range(num)])
 
-    """
-    top_10_entry_hex = {
-        k: entry_hex2num[k]
-        for k in sorted(entry_hex2num, key=entry_hex2num.get, reverse=True)[:10]
-    }
-    top_10_exit_hex = {
-        k: exit_hex2num[k]
-        for k in sorted(exit_hex2num, key=exit_hex2num.get, reverse=True)[:10]
-    }
-    logger.info(top_10_entry_hex)
-    logger.info(top_10_exit_hex)
-    logger.info(gantry_time_used)
-    logger.info(total_time_used)
-    logger.info(num_gantry_passed)
-    logger.info(hour2entry_num)
-    logger.info(hour2exit_num)
-    logger.info(sum(gantry_time_used) / len(gantry_time_used))
+    def add_gantry_times(self, seconds: List[int]) -> None:
+        """
+        批量记录门架通行时间
+
+        Args:
+            seconds (List[int]): 通行时间（秒）
+
+        Returns:
+
+        """
+        if self.keep_samples:
+            self.gantry_time_used.extend(seconds)
+        self.gantry_time.add_many(seconds)
+        self.__emit_many(stats_sink.GANTRY_TIME, seconds)
+
+    def add_total_times(self, seconds: List[int]) -> None:
+        """
+        批量记录总行程时间
+
+        Args:
+            seconds (List[int]): 总行程时间（秒）
+
+        Returns:
+
+        """
+        if self.keep_samples:
+            self.total_time_used.extend(seconds)
+        self.total_time.add_many(seconds)
+        self.__emit_many(stats_sink.TOTAL_TIME, seconds)
+
+    def add_num_passed(self, nums: List[int]) -> None:
+        """
+        批量记录通过的门架数量
+
+        Args:
+            nums (List[int]): 通过的门架数量
+
+        Returns:
+
+        """
+        if self.keep_samples:
+            self.num_gantry_passed.extend(nums)
+        self.gantry_passed.add_many(nums)
+        self.__emit_many(stats_sink.NUM_PASSED, nums)
+
+    def add_hops(self, cars: np.ndarray, nodes: np.ndarray, enter_ms: np.ndarray, exit_ms: np.ndarray) -> None:
+        """
+        批量记录行程，与逐个调用hop_info相同
+
+        Args:
+            cars (np.ndarray): 车辆编号
+            nodes (np.ndarray): 出发位置的Location.index
+            enter_ms (np.ndarray): 进入时间（ms）
+            exit_ms (np.ndarray): 离开时间（ms）
+
+        Returns:
+
+        """
+        if self.hops is not None:
+            self.hops.add_many(cars, nodes, enter_ms, exit_ms)
+        if self.flows is not None:
+            self.flows.add_many(nodes, enter_ms, exit_ms)
+
+    def add_od(self, origins: np.ndarray, destinations: np.ndarray) -> None:
+        """
+        批量记录驶离车辆的入口与出口
+
+        Args:
+            origins (np.ndarray): 入口的Location.index
+            destinations (np.ndarray): 出口的Location.index
+
+        Returns:
+
+        """
+        if self.od is not None:
+            self.od.add_many(origins, destinations)
+
+    def snapshot(self) -> "StatsCollector":
+        """
+        复制当前统计结果，副本不带接收器
+
+        Returns:
+            StatsCollector: 副本
+        """
+        other = StatsCollector(sinks=[], keep_samples=self.keep_samples)
+        other.merge(self)
+        return other
+
+    def merge(self, other: "StatsCollector") -> "StatsCollector":
+        """
+        把另一个收集器的统计结果累加到本收集器，不转发给接收器
+
+        Args:
+            other (StatsCollector): 另一个收集器
+
+        Returns:
+            StatsCollector: 本收集器
+        """
+        self.gantry_time_used.extend(other.gantry_time_used)
+        self.total_time_used.extend(other.total_time_used)
+        self.num_gantry_passed.extend(other.num_gantry_passed)
+        self.gantry_time.merge(other.gantry_time)
+        self.total_time.merge(other.total_time)
+        self.gantry_passed.merge(other.gantry_passed)
+        if self.flows is not None and other.flows is not None:
+            self.flows.merge(other.flows)
+        if self.od is not None and other.od is not None:
+            self.od.merge(other.od)
+        for h, num in other.exit_hex2num.items():
+            self.exit_hex2num[h] = self.exit_hex2num.get(h, 0) + num
+        for h, num in other.entry_hex2num.items():
+            self.entry_hex2num[h] = self.entry_hex2num.get(h, 0) + num
+        for a in range(24):
+            self.hour2entry_num[a] += other.hour2entry_num[a]
+            self.hour2exit_num[a] += other.hour2exit_num[a]
+        return self
+
+    def reset(self) -> None:
+        """
+        清空所有统计信息，保留接收器
+
+        Returns:
+
+        """
+        self.gantry_time_used.clear()
+        self.total_time_used.clear()
+        self.num_gantry_passed.clear()
+        self.__init_streaming()
+        if self.flows is not None:
+            self.flows.reset()
+        if self.od is not None:
+            self.od.reset()
+        self.exit_hex2num.clear()
+        self.entry_hex2num.clear()
+        for a in range(24):
+            self.hour2entry_num[a] = 0
+            self.hour2exit_num[a] = 0
+
+    def close(self) -> None:
+        """
+        关闭所有接收器与逐段行程追踪
+
+        Returns:
+
+        """
+        for s in self.sinks:
+            s.close()
+        if self.hops is not None:
+            self.hops.close()
+
+    def summary(self) -> Dict[str, float]:
+        """
+        将统计信息汇总为标量指标，用于多次重复实验的合并
+
+        Returns:
+            Dict[str, float]: 指标名 -> 数值，无样本的均值与分位数为nan
+        """
+        gantry_time = self.gantry_time.summary()
+        total_time = self.total_time.summary()
+        result = {
+            "entry_num": float(sum(self.hour2entry_num.values())),
+            "exit_num": float(sum(self.hour2exit_num.values())),
+            "mean_gantry_time": gantry_time["mean"],
+            "mean_total_time": total_time["mean"],
+            "mean_gantry_passed": self.gantry_passed.summary()["mean"],
+            "p50_gantry_time": gantry_time["p50"],
+            "p90_gantry_time": gantry_time["p90"],
+            "p50_total_time": total_time["p50"],
+            "p90_total_time": total_time["p90"],
+        }
+        for a in range(24):
+            result[f"entry_num_h{a:02d}"] = float(self.hour2entry_num[a])
+        for a in range(24):
+            result[f"exit_num_h{a:02d}"] = float(self.hour2exit_num[a])
+        return result
+
+    def record(self, logger: logging.Logger) -> None:
+        """
+        以info级别输出记录的所有统计信息，可选：对数据进行额外操作
+        不保存样本时，门架通行时间、总行程时间、经过门架数三行输出紧凑汇总代替完整列表
+
+        Args:
+            logger (logging.Logger): 日志记录器
+
+        Returns:
+
+        """
+        entry_hex2num = self.entry_hex2num
+        exit_hex2num = self.exit_hex2num
+        top_10_entry_hex = {
+            k: entry_hex2num[k]
+            for k in sorted(entry_hex2num, key=entry_hex2num.get, reverse=True)[:10]
+        }
+        top_10_exit_hex = {
+            k: exit_hex2num[k]
+            for k in sorted(exit_hex2num, key=exit_hex2num.get, reverse=True)[:10]
+        }
+        logger.info(top_10_entry_hex)
+        logger.info(top_10_exit_hex)
+        if self.keep_samples:
+            logger.info(self.gantry_time_used)
+            logger.info(self.total_time_used)
+            logger.info(self.num_gantry_passed)
+        else:
+            logger.info(self.gantry_time.summary())
+            logger.info(self.total_time.summary())
+            logger.info(self.gantry_passed.summary())
+        logger.info(self.hour2entry_num)
+        logger.info(self.hour2exit_num)
+        if self.keep_samples:
+            logger.info(sum(self.gantry_time_used) / len(self.gantry_time_used))
+        else:
+            logger.info(self.gantry_time.summary()["mean"])
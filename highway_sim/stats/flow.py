@@ -0,0 +1,172 @@
+"""
+分位置流量统计模块
+
+按位置(Location.index)与时间段统计车辆数与路段占用，全部保存在稠密的NumPy数组中：
+
+    - passed   : passed[node, b]为第b个时间段内从位置node出发(经过该门架/收费站)的车辆数
+    - occupancy: 路段node -> 下一位置上的平均车辆数，由车辆在路段上的时间对时间段积分得到
+
+每段行程只做常数次数组更新。路段时间[a, b)在时间段边界T_k处的累计占用为clip(T_k - a, 0, b - a)，
+是k的分段线性函数，用斜率与截距两个差分数组各更新两次即可，导出时沿时间轴累加，
+不需要逐个时间段循环，也不需要按事件时间排序
+
+使用示例::
+
+    flows = FlowCounter(rn.graph.hex_code, bin_ms=15 * common.MINUTE_MILLISECOND)
+    flows.add(location.index, enter_ms, exit_ms)
+    flows.passed          # (位置数, 时间段数)
+    flows.occupancy()     # (位置数, 时间段数)
+    flows.save("../log/flows.npz")
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Sequence
+
+import numpy as np
+
+from highway_sim.config import common
+
+
+class FlowCounter:
+    """
+    分位置、分时间段的流量与占用计数器，超出统计时长的部分不计入
+
+    Args:
+        hex_codes (Sequence[str]): 节点编号表，hex_codes[Location.index]为位置编号
+        bin_ms (float): 时间段长度（ms）
+        duration_ms (float): 统计时长（ms）
+    """
+
+    def __init__(
+            self,
+            hex_codes: Sequence[str],
+            bin_ms: float = common.HOUR_MILLISECOND,
+            duration_ms: float = common.DAY_MILLISECOND,
+    ):
+        self.hex_codes = np.asarray(hex_codes, dtype=str)
+        self.node_num = len(self.hex_codes)
+        self.bin_ms = bin_ms
+        self.bins = math.ceil(duration_ms / bin_ms)
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        清空计数
+
+        Returns:
+
+        """
+        self.passed = np.zeros((self.node_num, self.bins), dtype=np.int64)
+        # 第k列对应时间段边界T_k = k * bin_ms,最后一列收集超出统计时长的更新
+        self.__slope = np.zeros((self.node_num, self.bins + 2), dtype=np.int64)
+        self.__intercept = np.zeros((self.node_num, self.bins + 2), dtype=np.float64)
+
+    def add(self, node: int, enter_ms: float, exit_ms: float) -> None:
+        """
+        记录车辆在enter_ms经过位置node，并在[enter_ms, exit_ms)内行驶在该位置出发的路段上
+
+        Args:
+            node (int): 出发位置的Location.index
+            enter_ms (float): 进入时间（ms）
+            exit_ms (float): 离开时间（ms）
+
+        Returns:
+
+        """
+        b = int(enter_ms // self.bin_ms)
+        if b < self.bins:
+            self.passed[node, b] += 1
+        k1 = min(b + 1, self.bins + 1)
+        k2 = min(math.ceil(exit_ms / self.bin_ms), self.bins + 1)
+        slope = self.__slope[node]
+        intercept = self.__intercept[node]
+        slope[k1] += 1
+        slope[k2] -= 1
+        intercept[k1] -= enter_ms
+        intercept[k2] += exit_ms
+
+    def add_many(self, nodes: np.ndarray, enter_ms: np.ndarray, exit_ms: np.ndarray) -> None:
+        """
+        批量记录，与逐个调用add相同
+
+        Args:
+            nodes (np.ndarray): 出发位置的Location.index
+            enter_ms (np.ndarray): 进入时间（ms）
+            exit_ms (np.ndarray): 离开时间（ms）
+
+        Returns:
+
+        """
+        nodes = np.asarray(nodes, dtype=np.int64)
+        enter_ms = np.asarray(enter_ms, dtype=np.float64)
+        exit_ms = np.asarray(exit_ms, dtype=np.float64)
+        width = self.bins + 2
+        size = self.node_num * width
+
+        b = (enter_ms // self.bin_ms).astype(np.int64)
+        inside = b < self.bins
+        self.passed += np.bincount(
+            nodes[inside] * self.bins + b[inside], minlength=self.node_num * self.bins
+        ).reshape(self.passed.shape)
+
+        k1 = nodes * width + np.minimum(b + 1, self.bins + 1)
+        k2 = nodes * width + np.minimum(np.ceil(exit_ms / self.bin_ms).astype(np.int64), self.bins + 1)
+        index = np.concatenate((k1, k2))
+        self.__slope += np.bincount(
+            index, weights=np.concatenate((np.ones(len(k1)), -np.ones(len(k2)))), minlength=size
+        ).astype(np.int64).reshape(self.__slope.shape)
+        self.__intercept += np.bincount(
+            index, weights=np.concatenate((-enter_ms, exit_ms)), minlength=size
+        ).reshape(self.__intercept.shape)
+
+    def occupancy(self) -> np.ndarray:
+        """
+        各路段在各时间段内的平均车辆数
+
+        Returns:
+            np.ndarray: (位置数, 时间段数)
+        """
+        boundaries = np.arange(self.bins + 1) * self.bin_ms
+        slope = np.cumsum(self.__slope, axis=1)[:, :self.bins + 1]
+        intercept = np.cumsum(self.__intercept, axis=1)[:, :self.bins + 1]
+        # 各边界处的累计占用(车辆数 * ms)
+        cumulative = slope * boundaries + intercept
+        return np.diff(cumulative, axis=1) / self.bin_ms
+
+    def merge(self, other: FlowCounter) -> FlowCounter:
+        """
+        累加时间段划分相同的另一个计数器
+
+        Args:
+            other (FlowCounter): 另一个计数器
+
+        Returns:
+            FlowCounter: 本计数器
+        """
+        if (self.node_num, self.bin_ms, self.bins) != (other.node_num, other.bin_ms, other.bins):
+            raise ValueError("cannot merge flow counters with different layouts")
+        self.passed += other.passed
+        self.__slope += other.__slope
+        self.__intercept += other.__intercept
+        return self
+
+    def save(self, path: str) -> None:
+        """
+        导出为.npz文件，包含hex、bin_ms、passed与occupancy
+
+        Args:
+            path (str): 文件路径
+
+        Returns:
+
+        """
+        with open(path, "wb") as file:
+            np.savez(
+                file,
+                hex=self.hex_codes,
+                bin_ms=np.float64(self.bin_ms),
+                passed=self.passed,
+                occupancy=self.occupancy(),
+            )
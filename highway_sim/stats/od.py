@@ -0,0 +1,225 @@
+"""
+出入口(OD)矩阵模块
+
+entry_hex2num与exit_hex2num分别计数，丢失了车辆从哪个入口到哪个出口的信息。本模块把每辆驶离高速公路的车辆
+按(入口, 出口)计数，入口与出口各自编为紧凑的下标：
+
+    - 稠密：(入口数, 出口数)的int64数组，每次计数为一次数组下标更新
+    - 稀疏：字典 展平下标 -> 车辆数，只保存出现过的出入口对，适用于出入口很多的路网
+
+两种存储都可合并(多次重复实验)，可导出为.npz(稠密矩阵或COO三元组)或pandas.DataFrame(origin, destination, count)，
+便于与ETC收费数据对比
+
+使用示例::
+
+    od = ODMatrix.from_road_network(rn)
+    od.add(entrance.index, exit.index)
+    od.dense()      # (入口数, 出口数)
+    od.to_frame()   # 非零的出入口对
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from highway_sim.data_parser.road_network import RoadNetwork
+
+
+class ODMatrix:
+    """
+    出入口矩阵累加器，入口与出口以Location.index给出，不在入口/出口表中的计数记入dropped
+
+    Args:
+        hex_codes (Sequence[str]): 节点编号表，hex_codes[Location.index]为位置编号
+        entrances (Sequence[int]): 入口的Location.index，顺序即入口下标
+        exits (Sequence[int]): 出口的Location.index，顺序即出口下标
+        sparse (bool): 是否使用稀疏存储
+    """
+
+    def __init__(self, hex_codes: Sequence[str], entrances: Sequence[int], exits: Sequence[int], sparse: bool = False):
+        hex_codes = np.asarray(hex_codes, dtype=str)
+        entrances = np.asarray(entrances, dtype=np.int64)
+        exits = np.asarray(exits, dtype=np.int64)
+        self.origin_hex = hex_codes[entrances]
+        self.destination_hex = hex_codes[exits]
+        self.shape = (len(entrances), len(exits))
+        self.sparse = sparse
+        # Location.index -> 入口/出口下标,-1表示不是入口/出口
+        self.__origin = np.full(len(hex_codes), -1, dtype=np.int64)
+        self.__origin[entrances] = np.arange(len(entrances))
+        self.__destination = np.full(len(hex_codes), -1, dtype=np.int64)
+        self.__destination[exits] = np.arange(len(exits))
+        self.__origin_list = self.__origin.tolist()
+        self.__destination_list = self.__destination.tolist()
+        self.reset()
+
+    @classmethod
+    def from_road_network(cls, road_network: RoadNetwork, sparse: bool = False) -> ODMatrix:
+        """
+        以路网的省界入口与收费站入口为入口，没有下游的位置为出口
+
+        Args:
+            road_network (RoadNetwork): 已构建RoadGraph的路网
+            sparse (bool): 是否使用稀疏存储
+
+        Returns:
+            ODMatrix: 出入口矩阵
+        """
+        graph = road_network.graph
+        entrances = [x.index for x in road_network.province_entrances]
+        seen = set(entrances)
+        entrances += [x.index for x, _ in road_network.entrances_with_prob if x.index not in seen]
+        exits = np.flatnonzero(graph.out_degree == 0)
+        return cls(graph.hex_code, entrances, exits, sparse)
+
+    def reset(self) -> None:
+        """
+        清空计数
+
+        Returns:
+
+        """
+        self.dropped = 0
+        if self.sparse:
+            self.__counts: Dict[int, int] = {}
+        else:
+            self.__matrix = np.zeros(self.shape, dtype=np.int64)
+
+    def add(self, origin: int, destination: int) -> None:
+        """
+        记录一辆从origin进入、从destination离开的车辆
+
+        Args:
+            origin (int): 入口的Location.index
+            destination (int): 出口的Location.index
+
+        Returns:
+
+        """
+        i = self.__origin_list[origin]
+        j = self.__destination_list[destination]
+        if i < 0 or j < 0:
+            self.dropped += 1
+        elif self.sparse:
+            key = i * self.shape[1] + j
+            self.__counts[key] = self.__counts.get(key, 0) + 1
+        else:
+            self.__matrix[i, j] += 1
+
+    def add_many(self, origins: np.ndarray, destinations: np.ndarray) -> None:
+        """
+        批量记录，与逐个调用add相同
+
+        Args:
+            origins (np.ndarray): 入口的Location.index
+            destinations (np.ndarray): 出口的Location.index
+
+        Returns:
+
+        """
+        i = self.__origin[np.asarray(origins, dtype=np.int64)]
+        j = self.__destination[np.asarray(destinations, dtype=np.int64)]
+        valid = (i >= 0) & (j >= 0)
+        self.dropped += int(len(valid) - valid.sum())
+        self.__add_flat(i[valid] * self.shape[1] + j[valid], None)
+
+    def __add_flat(self, keys: np.ndarray, counts: np.ndarray = None) -> None:
+        if self.sparse:
+            if counts is None:
+                keys, counts = np.unique(keys, return_counts=True)
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                self.__counts[key] = self.__counts.get(key, 0) + count
+        else:
+            size = self.shape[0] * self.shape[1]
+            self.__matrix += np.bincount(keys, weights=counts, minlength=size).astype(np.int64).reshape(self.shape)
+
+    def nonzero(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        非零元素的COO三元组，按展平下标升序
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: (入口下标, 出口下标, 车辆数)
+        """
+        if self.sparse:
+            keys = np.array(sorted(self.__counts), dtype=np.int64)
+            counts = np.array([self.__counts[k] for k in keys.tolist()], dtype=np.int64)
+        else:
+            keys = np.flatnonzero(self.__matrix)
+            counts = self.__matrix.ravel()[keys]
+        rows, cols = np.divmod(keys, self.shape[1])
+        return rows, cols, counts
+
+    def dense(self) -> np.ndarray:
+        """
+        稠密矩阵
+
+        Returns:
+            np.ndarray: (入口数, 出口数)
+        """
+        if not self.sparse:
+            return self.__matrix.copy()
+        matrix = np.zeros(self.shape, dtype=np.int64)
+        rows, cols, counts = self.nonzero()
+        matrix[rows, cols] = counts
+        return matrix
+
+    @property
+    def total(self) -> int:
+        """
+        计入矩阵的车辆数
+        """
+        return int(self.nonzero()[2].sum())
+
+    def merge(self, other: ODMatrix) -> ODMatrix:
+        """
+        累加出入口表相同的另一个矩阵，两者的存储方式可以不同
+
+        Args:
+            other (ODMatrix): 另一个矩阵
+
+        Returns:
+            ODMatrix: 本矩阵
+        """
+        if not (np.array_equal(self.origin_hex, other.origin_hex)
+                and np.array_equal(self.destination_hex, other.destination_hex)):
+            raise ValueError("cannot merge OD matrices with different entrances or exits")
+        rows, cols, counts = other.nonzero()
+        self.__add_flat(rows * self.shape[1] + cols, counts)
+        self.dropped += other.dropped
+        return self
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        导出非零的出入口对
+
+        Returns:
+            pd.DataFrame: 列为origin, destination, count
+        """
+        rows, cols, counts = self.nonzero()
+        return pd.DataFrame({
+            "origin": self.origin_hex[rows],
+            "destination": self.destination_hex[cols],
+            "count": counts,
+        })
+
+    def save(self, path: str) -> None:
+        """
+        导出为.npz文件，稀疏存储保存COO三元组(rows, cols, counts)，稠密存储保存matrix
+
+        Args:
+            path (str): 文件路径
+
+        Returns:
+
+        """
+        arrays = {"origin_hex": self.origin_hex, "destination_hex": self.destination_hex}
+        if self.sparse:
+            arrays["rows"], arrays["cols"], arrays["counts"] = self.nonzero()
+        else:
+            arrays["matrix"] = self.__matrix
+        with open(path, "wb") as file:
+            np.savez(file, **arrays)
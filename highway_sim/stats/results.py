@@ -0,0 +1,230 @@
+"""
+统计结果读写模块
+
+统计结果按固定的模式(SCHEMA)保存为NumPy数组，分析脚本(verify.py等)通过load_results读取，
+不再依赖日志的行号，也不需要eval。支持三种来源：
+
+    - .npz    : save_results写出的二进制结果文件，各数组按需读取
+    - 追踪文件 : StructTraceSink写出的二进制追踪(同目录下存在path + ".strings")，由逐条事件重建
+    - 文本日志 : StatsCollector.record输出的日志，逐行读取，只解析以"["或"{"开头的结果行，
+                 样本列表用np.fromstring在C中解析；出入口计数只有前10名
+
+使用示例::
+
+    save_results(env.stats, "../log/statistics.npz")
+    results = load_results("../log/statistics.npz")
+    results.gantry_time  # np.ndarray，门架通行时间样本（秒）
+"""
+
+from __future__ import annotations
+
+import ast
+import os
+from dataclasses import dataclass, field, fields
+from typing import TYPE_CHECKING, Dict, Iterator, List
+
+import numpy as np
+
+from highway_sim.stats import sink as stats_sink
+
+if TYPE_CHECKING:
+    from highway_sim.stats.default import StatsCollector
+
+RESULTS_VERSION = 1
+
+# 数组名 -> (类型, 说明)
+SCHEMA: Dict[str, tuple] = {
+    "gantry_time": (np.int64, "门架通行时间样本（秒），不保存样本时为空"),
+    "total_time": (np.int64, "总行程时间样本（秒），不保存样本时为空"),
+    "gantry_passed": (np.int64, "经过门架数样本，不保存样本时为空"),
+    "entry_hour": (np.int64, "各小时(0-23)进入的车辆数"),
+    "exit_hour": (np.int64, "各小时(0-23)离开的车辆数"),
+    "entry_hex": (np.str_, "入口编号"),
+    "entry_hex_count": (np.int64, "各入口进入的车辆数"),
+    "exit_hex": (np.str_, "出口编号"),
+    "exit_hex_count": (np.int64, "各出口离开的车辆数"),
+    "gantry_time_hist": (np.int64, "门架通行时间直方图，首尾为下溢/上溢桶"),
+    "gantry_time_edges": (np.float64, "门架通行时间直方图的桶边界（秒）"),
+    "total_time_hist": (np.int64, "总行程时间直方图，首尾为下溢/上溢桶"),
+    "total_time_edges": (np.float64, "总行程时间直方图的桶边界（秒）"),
+    "gantry_passed_hist": (np.int64, "经过门架数直方图，首尾为下溢/上溢桶"),
+    "gantry_passed_edges": (np.float64, "经过门架数直方图的桶边界"),
+}
+
+# 文本日志中结果行的顺序，见StatsCollector.record
+_LOG_LINES = ("entry_top", "exit_top", "gantry_time", "total_time", "gantry_passed", "entry_hour", "exit_hour")
+
+
+def _empty(name: str) -> np.ndarray:
+    return np.zeros(0, dtype=SCHEMA[name][0])
+
+
+@dataclass
+class Results:
+    """
+    一次仿真的统计结果，字段与SCHEMA一一对应，缺失的数组为空
+    """
+    gantry_time: np.ndarray = field(default_factory=lambda: _empty("gantry_time"))
+    total_time: np.ndarray = field(default_factory=lambda: _empty("total_time"))
+    gantry_passed: np.ndarray = field(default_factory=lambda: _empty("gantry_passed"))
+    entry_hour: np.ndarray = field(default_factory=lambda: np.zeros(24, dtype=np.int64))
+    exit_hour: np.ndarray = field(default_factory=lambda: np.zeros(24, dtype=np.int64))
+    entry_hex: np.ndarray = field(default_factory=lambda: _empty("entry_hex"))
+    entry_hex_count: np.ndarray = field(default_factory=lambda: _empty("entry_hex_count"))
+    exit_hex: np.ndarray = field(default_factory=lambda: _empty("exit_hex"))
+    exit_hex_count: np.ndarray = field(default_factory=lambda: _empty("exit_hex_count"))
+    gantry_time_hist: np.ndarray = field(default_factory=lambda: _empty("gantry_time_hist"))
+    gantry_time_edges: np.ndarray = field(default_factory=lambda: _empty("gantry_time_edges"))
+    total_time_hist: np.ndarray = field(default_factory=lambda: _empty("total_time_hist"))
+    total_time_edges: np.ndarray = field(default_factory=lambda: _empty("total_time_edges"))
+    gantry_passed_hist: np.ndarray = field(default_factory=lambda: _empty("gantry_passed_hist"))
+    gantry_passed_edges: np.ndarray = field(default_factory=lambda: _empty("gantry_passed_edges"))
+
+    def __post_init__(self):
+        for f in fields(self):
+            setattr(self, f.name, np.asarray(getattr(self, f.name), dtype=SCHEMA[f.name][0]))
+
+    @classmethod
+    def from_collector(cls, stats: StatsCollector) -> Results:
+        """
+        从统计收集器构建结果
+
+        Args:
+            stats (StatsCollector): 统计收集器
+
+        Returns:
+            Results: 统计结果
+        """
+        result = cls(
+            gantry_time=stats.gantry_time_used,
+            total_time=stats.total_time_used,
+            gantry_passed=stats.num_gantry_passed,
+            entry_hour=[stats.hour2entry_num[a] for a in range(24)],
+            exit_hour=[stats.hour2exit_num[a] for a in range(24)],
+            entry_hex=list(stats.entry_hex2num),
+            entry_hex_count=list(stats.entry_hex2num.values()),
+            exit_hex=list(stats.exit_hex2num),
+            exit_hex_count=list(stats.exit_hex2num.values()),
+        )
+        for name in ("gantry_time", "total_time", "gantry_passed"):
+            streaming = getattr(stats, name)
+            streaming.flush()
+            setattr(result, name + "_hist", streaming.histogram.counts.copy())
+            setattr(result, name + "_edges", streaming.histogram.edges)
+        return result
+
+    def save(self, path: str) -> None:
+        """
+        保存为.npz结果文件
+
+        Args:
+            path (str): 文件路径
+
+        Returns:
+
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        arrays = {f.name: getattr(self, f.name) for f in fields(self)}
+        with open(path, "wb") as file:
+            np.savez(file, version=np.int64(RESULTS_VERSION), **arrays)
+
+
+def save_results(stats: StatsCollector, path: str) -> None:
+    """
+    把统计收集器的结果保存为.npz结果文件
+
+    Args:
+        stats (StatsCollector): 统计收集器
+        path (str): 文件路径
+
+    Returns:
+
+    """
+    Results.from_collector(stats).save(path)
+
+
+def load_results(path: str) -> Results:
+    """
+    按文件类型读取统计结果
+
+    Args:
+        path (str): .npz结果文件、二进制追踪文件或文本日志
+
+    Returns:
+        Results: 统计结果
+    """
+    if path.endswith(".npz"):
+        return _load_npz(path)
+    if os.path.exists(path + ".strings"):
+        return _load_trace(path)
+    return _load_log(path)
+
+
+def _load_npz(path: str) -> Results:
+    with np.load(path) as data:
+        version = int(data["version"])
+        if version != RESULTS_VERSION:
+            raise ValueError(f"unsupported results version {version} in {path}")
+        return Results(**{name: data[name] for name in SCHEMA if name in data.files})
+
+
+def _load_trace(path: str) -> Results:
+    records, strings = stats_sink.read_trace(path)
+    kinds = records["kind"]
+    values = records["value"]
+    strings = np.asarray(strings, dtype=str)
+
+    def select(kind: str) -> np.ndarray:
+        return values[kinds == stats_sink.KINDS.index(kind)]
+
+    entry_hex, entry_hex_count = np.unique(select(stats_sink.ENTRY_HEX), return_counts=True)
+    exit_hex, exit_hex_count = np.unique(select(stats_sink.EXIT_HEX), return_counts=True)
+    return Results(
+        gantry_time=select(stats_sink.GANTRY_TIME),
+        total_time=select(stats_sink.TOTAL_TIME),
+        gantry_passed=select(stats_sink.NUM_PASSED),
+        entry_hour=np.bincount(select(stats_sink.ENTRY_HOUR), minlength=24),
+        exit_hour=np.bincount(select(stats_sink.EXIT_HOUR), minlength=24),
+        entry_hex=strings[entry_hex],
+        entry_hex_count=entry_hex_count,
+        exit_hex=strings[exit_hex],
+        exit_hex_count=exit_hex_count,
+    )
+
+
+def _result_lines(path: str) -> Iterator[str]:
+    # 逐行读取,跳过耗时、debug事件等非结果行
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith(("[", "{")):
+                yield line.strip()
+
+
+def _load_log(path: str) -> Results:
+    values: Dict[str, object] = {}
+    for name, line in zip(_LOG_LINES, _result_lines(path)):
+        if line.startswith("["):
+            values[name] = np.fromstring(line[1:-1], dtype=np.int64, sep=",")
+        elif name in ("gantry_time", "total_time", "gantry_passed"):
+            # 不保存样本时该行为流式统计汇总,没有样本
+            values[name] = _empty(name)
+        else:
+            values[name] = ast.literal_eval(line)
+    if len(values) < len(_LOG_LINES):
+        raise ValueError(f"{path} does not contain a complete statistics record")
+
+    hour_counts: Dict[str, List[int]] = {
+        name: [values[name].get(a, 0) for a in range(24)] for name in ("entry_hour", "exit_hour")
+    }
+    return Results(
+        gantry_time=values["gantry_time"],
+        total_time=values["total_time"],
+        gantry_passed=values["gantry_passed"],
+        entry_hex=list(values["entry_top"]),
+        entry_hex_count=list(values["entry_top"].values()),
+        exit_hex=list(values["exit_top"]),
+        exit_hex_count=list(values["exit_top"].values()),
+        **hour_counts,
+    )
@@ -0,0 +1,192 @@
+"""
+统计事件接收器模块
+
+StatsCollector在内存中累计统计结果的同时，把每条统计事件转发给注册的接收器(Sink)，
+接收器决定事件的去向(日志、文件等)，可按需组合
+
+    - LogSink        : 文本debug日志，日志级别在创建时确定一次，未启用debug时record为空操作
+    - StructTraceSink: 定长二进制记录(类型1字节 + 值8字节)，需要逐事件追踪时代替文本日志，
+                       可用read_trace直接读为NumPy结构化数组
+"""
+
+import logging
+import struct
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# 统计事件类型
+ENTRY_HOUR = "enterHour"
+EXIT_HOUR = "exitHour"
+NUM_PASSED = "passed"
+TOTAL_TIME = "totalTime"
+GANTRY_TIME = "thisTime"
+EXIT_HEX = "exitHex"
+ENTRY_HEX = "enterHex"
+
+# 二进制追踪中的类型编号为在KINDS中的下标
+KINDS = (ENTRY_HOUR, EXIT_HOUR, NUM_PASSED, TOTAL_TIME, GANTRY_TIME, EXIT_HEX, ENTRY_HEX)
+# 值为出入口编号的类型，追踪中记录编号在字符串表中的下标
+STRING_KINDS = (EXIT_HEX, ENTRY_HEX)
+
+TRACE_RECORD = struct.Struct("<Bq")
+TRACE_DTYPE = np.dtype([("kind", "u1"), ("value", "<i8")])
+
+
+def noop(*args) -> None:
+    """
+    空操作，用于绑定到不需要执行的回调
+    """
+
+
+def default_sinks() -> List["Sink"]:
+    """
+    默认接收器：本模块日志启用debug时为LogSink，否则为空，统计事件不产生任何额外开销
+
+    Returns:
+        List[Sink]: 接收器列表
+    """
+    log_sink = LogSink()
+    return [log_sink] if log_sink.enabled else []
+
+
+class Sink:
+    """
+    统计事件接收器基类，子类覆盖record即可，批量事件默认逐条转发
+    """
+
+    def record(self, kind: str, value: object) -> None:
+        """
+        接收一条统计事件
+
+        Args:
+            kind (str): 事件类型
+            value (object): 事件值
+
+        Returns:
+
+        """
+
+    def record_many(self, kind: str, values: Iterable[object]) -> None:
+        """
+        接收同一类型的一批统计事件
+
+        Args:
+            kind (str): 事件类型
+            values (Iterable[object]): 事件值
+
+        Returns:
+
+        """
+        for value in values:
+            self.record(kind, value)
+
+    def close(self) -> None:
+        """
+        释放接收器持有的资源
+
+        Returns:
+
+        """
+
+
+class LogSink(Sink):
+    """
+    以debug级别输出每条统计事件
+
+    Args:
+        logger (logging.Logger): 日志记录器
+    """
+
+    FORMATS = {
+        ENTRY_HOUR: "enterHour %d",
+        EXIT_HOUR: "exitHour %d",
+        NUM_PASSED: "passed %d gantry",
+        TOTAL_TIME: "totalTime %d s",
+        GANTRY_TIME: "thisTime %d s",
+        EXIT_HEX: "exitHex %s",
+        ENTRY_HEX: "enterHex %s",
+    }
+
+    def __init__(self, logger: logging.Logger = None):
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        # 日志级别只在创建时确定一次
+        self.enabled = self.logger.isEnabledFor(logging.DEBUG)
+        if not self.enabled:
+            self.record = noop
+            self.record_many = noop
+
+    def record(self, kind: str, value: object) -> None:
+        self.logger.debug(self.FORMATS[kind], value)
+
+
+class StructTraceSink(Sink):
+    """
+    把统计事件写为定长二进制记录，字符串值(出入口编号)写入字符串表，关闭时保存为path + ".strings"
+
+    Args:
+        path (str): 追踪文件路径
+        buffer_records (int): 缓冲的记录数，缓冲区满时写入文件
+    """
+
+    def __init__(self, path: str, buffer_records: int = 65536):
+        self.path = path
+        self.strings: Dict[str, int] = {}
+        self.__file = open(path, "wb")
+        self.__buffer = bytearray()
+        self.__limit = buffer_records * TRACE_RECORD.size
+        self.__codes = {kind: i for i, kind in enumerate(KINDS)}
+        self.__pack = TRACE_RECORD.pack
+
+    def __value(self, kind: str, value: object) -> int:
+        if kind in STRING_KINDS:
+            return self.strings.setdefault(value, len(self.strings))
+        return int(value)
+
+    def record(self, kind: str, value: object) -> None:
+        self.__buffer += self.__pack(self.__codes[kind], self.__value(kind, value))
+        if len(self.__buffer) >= self.__limit:
+            self.flush()
+
+    def record_many(self, kind: str, values: Iterable[object]) -> None:
+        values = [self.__value(kind, v) for v in values]
+        records = np.empty(len(values), dtype=TRACE_DTYPE)
+        records["kind"] = self.__codes[kind]
+        records["value"] = values
+        self.__buffer += records.tobytes()
+        if len(self.__buffer) >= self.__limit:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        把缓冲区写入文件
+
+        Returns:
+
+        """
+        self.__file.write(self.__buffer)
+        self.__buffer.clear()
+
+    def close(self) -> None:
+        if self.__file.closed:
+            return
+        self.flush()
+        self.__file.close()
+        with open(self.path + ".strings", "w", encoding="utf-8") as f:
+            f.writelines(s + "\n" for s in self.strings)
+
+
+def read_trace(path: str) -> Tuple[np.ndarray, List[str]]:
+    """
+    读取StructTraceSink写出的追踪文件
+
+    Args:
+        path (str): 追踪文件路径
+
+    Returns:
+        Tuple[np.ndarray, List[str]]: (kind/value结构化数组，kind为KINDS下标, 字符串表)
+    """
+    records = np.fromfile(path, dtype=TRACE_DTYPE)
+    with open(path + ".strings", "r", encoding="utf-8") as f:
+        strings = f.read().splitlines()
+    return records, strings
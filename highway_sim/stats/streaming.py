@@ -0,0 +1,384 @@
+"""
+流式统计模块
+
+全天多次重复仿真会产生数千万个样本，逐个保存在Python列表中既占内存，输出时也会写出巨大的列表。
+本模块提供内存固定、可合并的流式统计量，数据保存在NumPy数组中：
+
+    - RunningStats  : 样本数、均值、方差、最小值、最大值(Chan等人的并行合并公式)
+    - Histogram     : 固定区间等宽直方图，区间外的样本计入下溢/上溢桶
+    - QuantileSketch: 对数分桶的分位数草图(与DDSketch相同的思路)，分位数的相对误差不超过relative_accuracy，
+                      桶数只与数值范围的对数有关，可精确合并
+    - StreamingStats: 组合以上三者，样本先写入定长缓冲区，缓冲区满时整批更新，避免逐个样本调用NumPy
+
+使用示例::
+
+    s = StreamingStats(low=0, high=3600, bins=360)
+    for x in samples:
+        s.add(x)
+    s.summary()  # {"count": ..., "mean": ..., "std": ..., "min": ..., "max": ..., "p50": ..., ...}
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from typing import Dict, Iterable, Sequence
+
+import numpy as np
+
+
+class RunningStats:
+    """
+    样本数、均值、方差与极值的流式统计
+    """
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count: int = 0
+        self.mean: float = 0.0
+        # 与均值之差的平方和
+        self.m2: float = 0.0
+        self.min: float = math.inf
+        self.max: float = -math.inf
+
+    def add_many(self, values: np.ndarray) -> None:
+        """
+        批量加入样本
+
+        Args:
+            values (np.ndarray): 样本
+
+        Returns:
+
+        """
+        n = len(values)
+        if n == 0:
+            return
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        self.__combine(n, mean, m2, float(values.min()), float(values.max()))
+
+    def merge(self, other: RunningStats) -> None:
+        """
+        合并另一组统计
+
+        Args:
+            other (RunningStats): 另一组统计
+
+        Returns:
+
+        """
+        if other.count:
+            self.__combine(other.count, other.mean, other.m2, other.min, other.max)
+
+    def __combine(self, n: int, mean: float, m2: float, low: float, high: float) -> None:
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+
+    @property
+    def variance(self) -> float:
+        """
+        样本方差，样本数少于2时为nan
+        """
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self) -> float:
+        """
+        样本标准差
+        """
+        return math.sqrt(self.variance)
+
+
+class Histogram:
+    """
+    [low, high)上的等宽直方图，counts[0]为下溢桶，counts[-1]为上溢桶
+
+    Args:
+        low (float): 下界
+        high (float): 上界
+        bins (int): 桶数
+    """
+
+    def __init__(self, low: float, high: float, bins: int):
+        if bins <= 0 or high <= low:
+            raise ValueError(f"invalid histogram layout [{low}, {high}) with {bins} bins")
+        self.low = low
+        self.high = high
+        self.bins = bins
+        self.width = (high - low) / bins
+        self.counts = np.zeros(bins + 2, dtype=np.int64)
+
+    def add_many(self, values: np.ndarray) -> None:
+        """
+        批量加入样本
+
+        Args:
+            values (np.ndarray): 样本
+
+        Returns:
+
+        """
+        index = np.floor((values - self.low) / self.width).astype(np.int64) + 1
+        np.clip(index, 0, self.bins + 1, out=index)
+        self.counts += np.bincount(index, minlength=self.bins + 2)
+
+    def merge(self, other: Histogram) -> None:
+        """
+        合并桶划分相同的直方图
+
+        Args:
+            other (Histogram): 另一个直方图
+
+        Returns:
+
+        """
+        if (self.low, self.high, self.bins) != (other.low, other.high, other.bins):
+            raise ValueError("cannot merge histograms with different layouts")
+        self.counts += other.counts
+
+    @property
+    def edges(self) -> np.ndarray:
+        """
+        bins + 1个桶边界
+        """
+        return np.linspace(self.low, self.high, self.bins + 1)
+
+
+class QuantileSketch:
+    """
+    对数分桶的分位数草图，正数x落入编号ceil(log_gamma(x))的桶，非正数单独计数
+
+    Args:
+        relative_accuracy (float): 分位数的相对误差上限
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.__log_gamma = math.log(self.gamma)
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.zero_count = 0
+
+    @property
+    def count(self) -> int:
+        """
+        样本数
+        """
+        return int(self.counts.sum()) + self.zero_count
+
+    def add_many(self, values: np.ndarray) -> None:
+        """
+        批量加入样本
+
+        Args:
+            values (np.ndarray): 样本
+
+        Returns:
+
+        """
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        if len(positive) == 0:
+            return
+        keys = np.ceil(np.log(positive) / self.__log_gamma).astype(np.int64)
+        self.__add_counts(int(keys.min()), np.bincount(keys - keys.min()))
+
+    def merge(self, other: QuantileSketch) -> None:
+        """
+        合并相对误差相同的草图
+
+        Args:
+            other (QuantileSketch): 另一个草图
+
+        Returns:
+
+        """
+        if self.relative_accuracy != other.relative_accuracy:
+            raise ValueError("cannot merge sketches with different accuracy")
+        self.zero_count += other.zero_count
+        if len(other.counts):
+            self.__add_counts(other.offset, other.counts)
+
+    def __add_counts(self, offset: int, counts: np.ndarray) -> None:
+        if len(self.counts) == 0:
+            self.offset = offset
+            self.counts = counts.astype(np.int64)
+            return
+        low = min(self.offset, offset)
+        high = max(self.offset + len(self.counts), offset + len(counts))
+        if (low, high) != (self.offset, self.offset + len(self.counts)):
+            grown = np.zeros(high - low, dtype=np.int64)
+            grown[self.offset - low:self.offset - low + len(self.counts)] = self.counts
+            self.counts = grown
+            self.offset = low
+        self.counts[offset - self.offset:offset - self.offset + len(counts)] += counts
+
+    def quantile(self, q: float) -> float:
+        """
+        q分位数的估计
+
+        Args:
+            q (float): 分位点，0 <= q <= 1
+
+        Returns:
+            float: 估计值，无样本时为nan
+        """
+        total = self.count
+        if total == 0:
+            return math.nan
+        rank = q * (total - 1)
+        if rank < self.zero_count:
+            return 0.0
+        cumulative = np.cumsum(self.counts) + self.zero_count
+        key = self.offset + int(np.searchsorted(cumulative, rank, side="right"))
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+
+class StreamingStats:
+    """
+    单个指标的流式统计，组合RunningStats、Histogram与QuantileSketch
+
+    Args:
+        low (float): 直方图下界
+        high (float): 直方图上界
+        bins (int): 直方图桶数
+        relative_accuracy (float): 分位数的相对误差上限
+        buffer_size (int): 缓冲区样本数
+    """
+
+    QUANTILES: Sequence[float] = (0.5, 0.9, 0.99)
+
+    def __init__(
+            self,
+            low: float,
+            high: float,
+            bins: int,
+            relative_accuracy: float = 0.01,
+            buffer_size: int = 4096,
+    ):
+        self.running = RunningStats()
+        self.histogram = Histogram(low, high, bins)
+        self.sketch = QuantileSketch(relative_accuracy)
+        self.buffer_size = buffer_size
+        self.__buffer = array("d")
+
+    def add(self, value: float) -> None:
+        """
+        加入一个样本
+
+        Args:
+            value (float): 样本
+
+        Returns:
+
+        """
+        self.__buffer.append(value)
+        if len(self.__buffer) >= self.buffer_size:
+            self.flush()
+
+    def add_many(self, values: Iterable[float]) -> None:
+        """
+        批量加入样本
+
+        Args:
+            values (Iterable[float]): 样本
+
+        Returns:
+
+        """
+        self.flush()
+        self.__update(np.asarray(values, dtype=np.float64))
+
+    def flush(self) -> None:
+        """
+        把缓冲区中的样本计入统计
+
+        Returns:
+
+        """
+        if len(self.__buffer):
+            self.__update(np.frombuffer(self.__buffer, dtype=np.float64).copy())
+            self.__buffer = array("d")
+
+    def __update(self, values: np.ndarray) -> None:
+        if len(values) == 0:
+            return
+        self.running.add_many(values)
+        self.histogram.add_many(values)
+        self.sketch.add_many(values)
+
+    def merge(self, other: StreamingStats) -> None:
+        """
+        合并另一组流式统计
+
+        Args:
+            other (StreamingStats): 另一组流式统计
+
+        Returns:
+
+        """
+        self.flush()
+        other.flush()
+        self.running.merge(other.running)
+        self.histogram.merge(other.histogram)
+        self.sketch.merge(other.sketch)
+
+    def copy(self) -> StreamingStats:
+        """
+        复制当前统计
+
+        Returns:
+            StreamingStats: 副本
+        """
+        h = self.histogram
+        other = StreamingStats(h.low, h.high, h.bins, self.sketch.relative_accuracy, self.buffer_size)
+        other.merge(self)
+        return other
+
+    @property
+    def count(self) -> int:
+        """
+        样本数
+        """
+        return self.running.count + len(self.__buffer)
+
+    def quantile(self, q: float) -> float:
+        """
+        q分位数的估计
+
+        Args:
+            q (float): 分位点
+
+        Returns:
+            float: 估计值
+        """
+        self.flush()
+        return self.sketch.quantile(q)
+
+    def summary(self) -> Dict[str, float]:
+        """
+        紧凑汇总：样本数、均值、标准差、极值与常用分位数，无样本时均值等为nan
+
+        Returns:
+            Dict[str, float]: 汇总
+        """
+        self.flush()
+        r = self.running
+        result = {
+            "count": r.count,
+            "mean": r.mean if r.count else math.nan,
+            "std": r.std,
+            "min": r.min if r.count else math.nan,
+            "max": r.max if r.count else math.nan,
+        }
+        for q in self.QUANTILES:
+            result[f"p{round(q * 100)}"] = self.sketch.quantile(q)
+        return result
@@ -0,0 +1,225 @@
+"""
+逐段行程追踪模块
+
+文本日志只保存汇总结果，分析单车轨迹时需要逐段事件。本模块把每辆车的每一段行程
+(车辆编号、出发位置、进入时间、离开时间)写入类型固定的列缓冲区，缓冲区满时整块写入列式文件：
+
+    - npy    : 目录下每列一个.npy文件(car/node/enter_ms/exit_ms)，另有hex.npy保存节点编号表，
+               写入时不断追加数据，关闭时回写数组长度，可用np.load(..., mmap_mode="r")直接映射
+    - arrow  : Arrow IPC文件，node列为字典编码的出发位置编号，可用pyarrow.memory_map映射(需要pyarrow)
+    - parquet: Parquet文件，每块为一个row group(需要pyarrow)
+
+第i段为车辆从位置node出发到达下一位置，进入时间为经过node的时刻，离开时间为到达下一位置的时刻，
+node为Location.index，对应的出发位置编号为hex[node]
+
+使用示例::
+
+    writer = HopTraceWriter("../log/hops", rn.graph.hex_code)
+    writer.add(car_id, location.index, enter_ms, exit_ms)
+    writer.close()
+    hops = read_hops("../log/hops")  # {"car": ..., "node": ..., "enter_ms": ..., "exit_ms": ..., "hex": ...}
+"""
+
+import os
+from array import array
+from typing import Dict, Sequence
+
+import numpy as np
+
+# 列名 -> (NumPy类型, array类型码)
+COLUMNS: Dict[str, tuple] = {
+    "car": (np.int64, "q"),
+    "node": (np.int32, "i"),
+    "enter_ms": (np.float64, "d"),
+    "exit_ms": (np.float64, "d"),
+}
+FORMATS = ("npy", "arrow", "parquet")
+HEX_FILE = "hex.npy"
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("arrow/parquet hop traces require pyarrow")
+    return pyarrow
+
+
+def _npy_header(dtype: type, rows: int) -> dict:
+    return {"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)), "fortran_order": False, "shape": (rows,)}
+
+
+class HopTraceWriter:
+    """
+    逐段行程追踪写入器
+
+    Args:
+        path (str): 输出路径，npy格式为目录，其余格式为文件
+        hex_codes (Sequence[str]): 节点编号表，hex_codes[Location.index]为位置编号
+        fmt (str): 文件格式，见FORMATS
+        chunk_rows (int): 每块行数，缓冲区满时写入文件
+    """
+
+    def __init__(self, path: str, hex_codes: Sequence[str], fmt: str = "npy", chunk_rows: int = 65536):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown hop trace format: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self.__closed = False
+        self.__new_buffers()
+        hex_codes = np.asarray(hex_codes, dtype=str)
+        if fmt == "npy":
+            os.makedirs(path, exist_ok=True)
+            np.save(os.path.join(path, HEX_FILE), hex_codes)
+            self.__files = {}
+            for name, (dtype, _) in COLUMNS.items():
+                f = open(os.path.join(path, name + ".npy"), "wb")
+                np.lib.format.write_array_header_1_0(f, _npy_header(dtype, 0))
+                self.__files[name] = f
+        else:
+            self.__open_arrow(hex_codes)
+
+    def __open_arrow(self, hex_codes: np.ndarray) -> None:
+        pa = _import_pyarrow()
+        self.__hex = pa.array(hex_codes.tolist(), type=pa.string())
+        fields = [
+            pa.field(name, pa.dictionary(pa.int32(), pa.string()) if name == "node" else pa.from_numpy_dtype(dtype))
+            for name, (dtype, _) in COLUMNS.items()
+        ]
+        self.__schema = pa.schema(fields)
+        if self.fmt == "parquet":
+            import pyarrow.parquet as pq
+            self.__writer = pq.ParquetWriter(self.path, self.__schema)
+        else:
+            self.__writer = pa.ipc.new_file(self.path, self.__schema)
+
+    def __new_buffers(self) -> None:
+        self.__buffers = {name: array(code) for name, (_, code) in COLUMNS.items()}
+        self.__car = self.__buffers["car"].append
+        self.__node = self.__buffers["node"].append
+        self.__enter = self.__buffers["enter_ms"].append
+        self.__exit = self.__buffers["exit_ms"].append
+
+    def add(self, car: int, node: int, enter_ms: float, exit_ms: float) -> None:
+        """
+        追加一段行程
+
+        Args:
+            car (int): 车辆编号
+            node (int): 出发位置的Location.index
+            enter_ms (float): 进入时间（ms）
+            exit_ms (float): 离开时间（ms）
+
+        Returns:
+
+        """
+        self.__car(car)
+        self.__node(node)
+        self.__enter(enter_ms)
+        self.__exit(exit_ms)
+        if len(self.__buffers["car"]) >= self.chunk_rows:
+            self.flush()
+
+    def add_many(self, cars: np.ndarray, nodes: np.ndarray, enter_ms: np.ndarray, exit_ms: np.ndarray) -> None:
+        """
+        批量追加行程，数组按块直接写入文件
+
+        Args:
+            cars (np.ndarray): 车辆编号
+            nodes (np.ndarray): 出发位置的Location.index
+            enter_ms (np.ndarray): 进入时间（ms）
+            exit_ms (np.ndarray): 离开时间（ms）
+
+        Returns:
+
+        """
+        self.flush()
+        columns = dict(zip(COLUMNS, (cars, nodes, enter_ms, exit_ms)))
+        n = len(cars)
+        for begin in range(0, n, self.chunk_rows):
+            self.__write({
+                name: np.asarray(values[begin:begin + self.chunk_rows], dtype=COLUMNS[name][0])
+                for name, values in columns.items()
+            })
+
+    def flush(self) -> None:
+        """
+        把列缓冲区作为一块写入文件
+
+        Returns:
+
+        """
+        if len(self.__buffers["car"]) == 0:
+            return
+        self.__write({
+            name: np.frombuffer(buffer, dtype=COLUMNS[name][0]) for name, buffer in self.__buffers.items()
+        })
+        self.__new_buffers()
+
+    def __write(self, columns: Dict[str, np.ndarray]) -> None:
+        n = len(columns["car"])
+        if n == 0:
+            return
+        if self.fmt == "npy":
+            for name, values in columns.items():
+                self.__files[name].write(values.tobytes())
+        else:
+            pa = _import_pyarrow()
+            arrays = [
+                pa.DictionaryArray.from_arrays(pa.array(values), self.__hex) if name == "node" else pa.array(values)
+                for name, values in columns.items()
+            ]
+            self.__writer.write_batch(pa.record_batch(arrays, schema=self.__schema))
+        self.rows += n
+
+    def close(self) -> None:
+        """
+        写入剩余数据并关闭文件，npy格式回写各列的长度
+
+        Returns:
+
+        """
+        if self.__closed:
+            return
+        self.flush()
+        self.__closed = True
+        if self.fmt == "npy":
+            for name, f in self.__files.items():
+                f.seek(0)
+                np.lib.format.write_array_header_1_0(f, _npy_header(COLUMNS[name][0], self.rows))
+                f.close()
+        else:
+            self.__writer.close()
+
+
+def read_hops(path: str) -> Dict[str, np.ndarray]:
+    """
+    读取HopTraceWriter写出的追踪，npy格式的各列以只读内存映射返回
+
+    Args:
+        path (str): 追踪路径，目录为npy格式，.parquet为Parquet，其余为Arrow IPC
+
+    Returns:
+        Dict[str, np.ndarray]: 列名 -> 数组，另有"hex"为节点编号表
+    """
+    if os.path.isdir(path):
+        result = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r") for name in COLUMNS}
+        result["hex"] = np.load(os.path.join(path, HEX_FILE))
+        return result
+
+    pa = _import_pyarrow()
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+    else:
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    result = {}
+    for name in COLUMNS:
+        column = table.column(name).combine_chunks()
+        if name == "node":
+            result["hex"] = np.asarray(column.dictionary.to_pylist(), dtype=str)
+            column = column.indices
+        result[name] = column.to_numpy()
+    return result
@@ -0,0 +1,347 @@
+"""
+参数扫描模块
+
+功能概述：
+config/fitting_data.py中的分布常量(NEXT_GANTRY_GAMMA_ALPHA、NEXT_GANTRY_GAMMA_BETA、PROVINCE_ENTRANCE_RATION)
+需要通过与实测数据比较来标定。本模块对参数网格或拉丁超立方采样得到的参数点并行运行仿真，
+结果按参数哈希缓存，最终输出一张长格式(tidy)结果表，并可计算与hourly_entry_count.csv实测小时入口分布的误差
+
+实现要点：
+    1. 参数点：grid()生成笛卡尔积网格，latin_hypercube()在给定区间内分层采样
+    2. 并行：复用replication模块的进程池与路网共享方式，子进程在运行前把参数写入fitting_data
+    3. 随机数：所有参数点使用同一组由根种子派生的种子(公共随机数)，参数间的差异不受抽样噪声影响
+    4. 缓存：以参数值、运行设置(时长、引擎、种子、重复次数)与源数据签名的sha256为键，每个参数点保存一个json文件，
+       根种子固定时重复扫描只运行新增的参数点，路网或交通流量源文件变化后全部重新运行
+    5. 结果表：每行为(参数点哈希, 各参数值, 指标名, 指标值)，多次重复时指标取均值
+
+使用示例::
+
+    rn, traffic = headless.parse()
+    points = grid(NEXT_GANTRY_GAMMA_ALPHA=[1.5, 2.0, 2.5], PROVINCE_ENTRANCE_RATION=[0.15, 0.2])
+    table = run_sweep(rn, traffic, points, engine="vectorized", seed=2024, observed=load_observed_entries())
+    table.to_csv("../log/sweep.csv", index=False)
+
+    # 命令行
+    python sweep.py --engine vectorized --seed 2024 --sweep-grid NEXT_GANTRY_GAMMA_ALPHA=1.5,2.0,2.5
+    python sweep.py --engine vectorized --seed 2024 --sweep-lhs 64
+"""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import logging
+import math
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from highway_sim import headless
+from highway_sim import replication
+from highway_sim.config import args
+from highway_sim.config import common
+from highway_sim.config import fitting_data as fit
+from highway_sim.config import resources
+from highway_sim.data_parser import cache
+from highway_sim.data_parser.road_network import RoadNetwork, Parser as RoadNetworkParser
+from highway_sim.data_parser.traffic import Traffic, Parser as TrafficParser
+from highway_sim.util import parser
+
+logger = logging.getLogger(__name__)
+
+PARAMETERS = ("NEXT_GANTRY_GAMMA_ALPHA", "NEXT_GANTRY_GAMMA_BETA", "PROVINCE_ENTRANCE_RATION")
+
+# 结果结构变化时需要递增,使旧缓存失效
+SWEEP_VERSION = 2
+
+# hourly_entry_count.csv中小时与数量所在的列
+_OBSERVED_HOUR_INDEX = 1
+_OBSERVED_NUM_INDEX = 2
+
+
+def grid(**values: Sequence[float]) -> List[Dict[str, float]]:
+    """
+    生成参数网格，未给出的参数取fitting_data中的当前值
+
+    Args:
+        **values (Sequence[float]): 参数名 -> 取值列表
+
+    Returns:
+        List[Dict[str, float]]: 参数点
+    """
+    _check_names(values)
+    names = list(values)
+    return [_complete(dict(zip(names, combo))) for combo in itertools.product(*values.values())]
+
+
+def latin_hypercube(
+        bounds: Dict[str, Tuple[float, float]], n: int, seed: Optional[int] = None
+) -> List[Dict[str, float]]:
+    """
+    在给定区间内做拉丁超立方采样，每个参数的n个取值分别落在n等分区间的不同小区间内
+
+    Args:
+        bounds (Dict[str, Tuple[float, float]]): 参数名 -> (下界, 上界)
+        n (int): 采样点数
+        seed (Optional[int]): 随机种子
+
+    Returns:
+        List[Dict[str, float]]: 参数点
+    """
+    _check_names(bounds)
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, (low, high) in bounds.items():
+        u = (rng.permutation(n) + rng.random(n)) / n
+        columns[name] = low + u * (high - low)
+    return [_complete({name: float(columns[name][i]) for name in bounds}) for i in range(n)]
+
+
+def default_bounds(spread: float = 0.5) -> Dict[str, Tuple[float, float]]:
+    """
+    以fitting_data当前值为中心的参数区间，PROVINCE_ENTRANCE_RATION限制在[0, 1)内
+
+    Args:
+        spread (float): 相对半宽
+
+    Returns:
+        Dict[str, Tuple[float, float]]: 参数名 -> (下界, 上界)
+    """
+    bounds = {name: (getattr(fit, name) * (1 - spread), getattr(fit, name) * (1 + spread)) for name in PARAMETERS}
+    low, high = bounds["PROVINCE_ENTRANCE_RATION"]
+    bounds["PROVINCE_ENTRANCE_RATION"] = (max(low, 0.0), min(high, 0.99))
+    return bounds
+
+
+def param_hash(params: Dict[str, float], settings: Dict[str, object]) -> str:
+    """
+    计算参数点与运行设置的哈希，作为缓存键
+
+    Args:
+        params (Dict[str, float]): 参数点
+        settings (Dict[str, object]): 运行设置
+
+    Returns:
+        str: sha256十六进制串
+    """
+    key = json.dumps(
+        {"version": SWEEP_VERSION, "params": params, "settings": settings},
+        sort_keys=True,
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def data_signature() -> Dict[str, Optional[List]]:
+    """
+    路网与交通流量源文件的签名(大小, sha256)，加入缓存键后源数据变化会使已缓存的参数点失效
+    不包含修改时间，只复制或touch文件不会使缓存失效
+
+    Returns:
+        Dict[str, Optional[List]]: 源文件路径 -> [大小, sha256]，文件不存在时为None
+    """
+    paths = RoadNetworkParser(RoadNetwork()).sources() + TrafficParser(Traffic()).sources()
+    signature: Dict[str, Optional[List]] = {}
+    for path in paths:
+        if os.path.exists(path):
+            size, _, digest = cache.file_signature(path)
+            signature[path] = [size, digest]
+        else:
+            signature[path] = None
+    return signature
+
+
+def load_observed_entries(path: Optional[str] = None) -> np.ndarray:
+    """
+    读取实测入口流量，按小时汇总
+
+    Args:
+        path (Optional[str]): hourly_entry_count.csv路径，None表示当前省份的数据文件
+
+    Returns:
+        np.ndarray: 长度为24的各小时入口数量
+    """
+    if path is None:
+        path = resources.RESOURCE_PATH + rf"{resources.PROVINCE}/statisticalData/hourly_entry_count.csv"
+    hours, nums = parser.read_columns(path, {_OBSERVED_HOUR_INDEX: np.int64, _OBSERVED_NUM_INDEX: np.int64})
+    return np.bincount(hours % 24, weights=nums, minlength=24)
+
+
+def entry_profile_loss(metrics: Dict[str, float], observed: np.ndarray, duration_ms: float) -> float:
+    """
+    仿真与实测小时入口分布的均方根误差
+    两者都只取仿真覆盖的小时并归一化为占比，因此与实测数据的统计天数无关
+
+    Args:
+        metrics (Dict[str, float]): StatsCollector.summary()格式的指标
+        observed (np.ndarray): 各小时实测入口数量
+        duration_ms (float): 仿真时长（毫秒）
+
+    Returns:
+        float: 误差，任一方无数据时为nan
+    """
+    hours = min(24, math.ceil(duration_ms / common.HOUR_MILLISECOND))
+    simulated = np.array([metrics[f"entry_num_h{a:02d}"] for a in range(hours)])
+    observed = np.asarray(observed[:hours], dtype=np.float64)
+    if simulated.sum() <= 0 or observed.sum() <= 0:
+        return math.nan
+    return float(np.sqrt(np.mean((simulated / simulated.sum() - observed / observed.sum()) ** 2)))
+
+
+def _check_names(names) -> None:
+    unknown = [x for x in names if x not in PARAMETERS]
+    if unknown:
+        raise ValueError(f"unknown parameters {unknown}, expected some of {list(PARAMETERS)}")
+
+
+def _complete(params: Dict[str, float]) -> Dict[str, float]:
+    return {name: float(params.get(name, getattr(fit, name))) for name in PARAMETERS}
+
+
+def _evaluate(
+        params: Dict[str, float], seeds: List[int], duration_ms: float, engine: str, event_list: str
+) -> Dict[str, float]:
+    for name, value in params.items():
+        setattr(fit, name, value)
+    runs = [replication.replicate(s, duration_ms, engine, event_list) for s in seeds]
+    return {name: float(np.nanmean([r[name] for r in runs])) for name in runs[0]}
+
+
+def run_sweep(
+        rn: RoadNetwork,
+        traffic: Traffic,
+        points: List[Dict[str, float]],
+        duration_ms: float = common.DAY_MILLISECOND,
+        workers: Optional[int] = None,
+        seed: Optional[int] = None,
+        replications: int = 1,
+        engine: str = "vectorized",
+        event_list: str = "heap",
+        cache_dir: Optional[str] = "../log/sweep_cache",
+        observed: Optional[np.ndarray] = None,
+        use_cache: bool = True,
+) -> pd.DataFrame:
+    """
+    对全部参数点运行仿真并汇总为长格式结果表
+    workers为1时在当前进程中运行，结束后fitting_data恢复为运行前的值
+
+    Args:
+        rn (RoadNetwork): 已解析的路网，子进程只读共享
+        traffic (Traffic): 交通流量数据
+        points (List[Dict[str, float]]): 参数点，见grid()/latin_hypercube()
+        duration_ms (float): 每次仿真时长（毫秒）
+        workers (Optional[int]): 进程数，None表示CPU核数
+        seed (Optional[int]): 根种子，None表示随机(此时不会命中缓存)
+        replications (int): 每个参数点的重复次数
+        engine (str): 仿真引擎，"des"或"vectorized"
+        event_list (str): 未来事件列表实现，"heap"或"calendar"
+        cache_dir (Optional[str]): 缓存目录，None表示不缓存
+        observed (Optional[np.ndarray]): 各小时实测入口数量，给出时增加指标loss
+        use_cache (bool): 不支持fork的平台上，子进程解析路网时是否使用路网解析缓存
+
+    Returns:
+        pd.DataFrame: 列为hash、各参数名、metric、value
+    """
+    entropy, seeds = replication.spawn_seeds(replications, seed)
+    settings = {
+        "duration_ms": duration_ms,
+        "engine": engine,
+        "event_list": event_list,
+        "entropy": entropy,
+        "replications": replications,
+        "data": data_signature(),
+    }
+    points = [_complete(p) for p in points]
+    hashes = [param_hash(p, settings) for p in points]
+
+    metrics: Dict[str, Dict[str, float]] = {}
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        for h in hashes:
+            path = os.path.join(cache_dir, f"{h}.json")
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    metrics[h] = json.load(f)["metrics"]
+    todo = {h: p for h, p in zip(hashes, points) if h not in metrics}
+    logger.info("sweep: %d points, %d cached, %d to run", len(points), len(points) - len(todo), len(todo))
+
+    replication.share_network(rn, traffic)
+    workers = min(workers or os.cpu_count() or 1, max(len(todo), 1))
+    if workers == 1:
+        saved = {name: getattr(fit, name) for name in PARAMETERS}
+        try:
+            done = {h: _evaluate(p, seeds, duration_ms, engine, event_list) for h, p in todo.items()}
+        finally:
+            for name, value in saved.items():
+                setattr(fit, name, value)
+    else:
+        with replication.create_executor(workers, use_cache) as executor:
+            futures = {
+                h: executor.submit(_evaluate, p, seeds, duration_ms, engine, event_list) for h, p in todo.items()
+            }
+            done = {h: f.result() for h, f in futures.items()}
+
+    for h, m in done.items():
+        metrics[h] = m
+        if cache_dir is not None:
+            tmp_file = os.path.join(cache_dir, f"{h}.{os.getpid()}.tmp")
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump({"params": todo[h], "settings": settings, "metrics": m}, f)
+            os.replace(tmp_file, os.path.join(cache_dir, f"{h}.json"))
+
+    rows = []
+    for h, p in zip(hashes, points):
+        m = dict(metrics[h])
+        if observed is not None:
+            m["loss"] = entry_profile_loss(m, observed, duration_ms)
+        for name, value in m.items():
+            rows.append({"hash": h, **p, "metric": name, "value": value})
+    return pd.DataFrame(rows, columns=["hash", *PARAMETERS, "metric", "value"])
+
+
+def parse_grid(specs: List[str]) -> Dict[str, List[float]]:
+    """
+    解析命令行网格参数
+
+    Args:
+        specs (List[str]): 形如NAME=v1,v2,v3的字符串
+
+    Returns:
+        Dict[str, List[float]]: 参数名 -> 取值列表
+    """
+    values = {}
+    for spec in specs:
+        name, _, text = spec.partition("=")
+        values[name.strip()] = [float(x) for x in text.split(",") if x.strip()]
+    return values
+
+
+if __name__ == "__main__":
+    args.Parser()
+
+    headless.init_logger(args.ENABLE_LOG)
+
+    road_network, traffic_data = headless.parse(args.ENABLE_CACHE)
+    if args.SWEEP_LHS:
+        sweep_points = latin_hypercube(default_bounds(), args.SWEEP_LHS, args.SEED)
+    else:
+        sweep_points = grid(**parse_grid(args.SWEEP_GRID))
+    table = run_sweep(
+        road_network,
+        traffic_data,
+        sweep_points,
+        workers=args.WORKERS,
+        seed=args.SEED,
+        replications=args.REPLICATIONS,
+        engine=args.ENGINE,
+        event_list=args.EVENT_LIST,
+        observed=load_observed_entries(),
+        use_cache=args.ENABLE_CACHE,
+    )
+    os.makedirs(os.path.dirname(args.SWEEP_OUTPUT) or ".", exist_ok=True)
+    table.to_csv(args.SWEEP_OUTPUT, index=False)
+    if args.ENABLE_LOG:
+        losses = table[table["metric"] == "loss"].sort_values("value")
+        headless.logger.info(losses.head(10).to_string(index=False))
@@ -0,0 +1,77 @@
+"""
+别名表(Walker/Vose alias method)工具模块
+
+对固定的离散分布构建一次别名表后，每次抽样只需一个随机数，时间复杂度O(1)
+"""
+
+import random
+from typing import List, Sequence
+
+
+class AliasTable:
+    """
+    离散分布的别名表，权重在构建时归一化
+
+    Args:
+        weights (Sequence[float]): 非负权重，不要求和为1
+    """
+
+    __slots__ = ("prob", "alias", "n")
+
+    def __init__(self, weights: Sequence[float]):
+        n = len(weights)
+        total = float(sum(weights))
+        if n == 0 or total <= 0:
+            raise ValueError("alias table requires at least one positive weight")
+        self.n: int = n
+        self.prob: List[float] = [0.0] * n
+        self.alias: List[int] = list(range(n))
+
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+        # 剩余的概率只受浮点误差影响,视为1
+        for i in large + small:
+            self.prob[i] = 1.0
+
+    def sample(self) -> int:
+        """
+        按分布抽取一个下标
+
+        Returns:
+            int: 下标
+        """
+        u = random.random() * self.n
+        i = int(u)
+        return i if u - i < self.prob[i] else self.alias[i]
+
+    def sample_n(self, k: int) -> List[int]:
+        """
+        按分布抽取k个下标
+
+        Args:
+            k (int): 抽样个数
+
+        Returns:
+            List[int]: 下标列表
+        """
+        n = self.n
+        prob = self.prob
+        alias = self.alias
+        rand = random.random
+        result = []
+        for _ in range(k):
+            u = rand() * n
+            i = int(u)
+            result.append(i if u - i < prob[i] else alias[i])
+        return result
@@ -2,8 +2,13 @@
 数据处理工具模块
 """
 
+from typing import Dict, List
+
+import numpy as np
 import pandas as pd
 
+NULL_CELLS = ["", "(null)", "null", "nan", "none"]
+
 
 def is_null_cell(cell: object) -> bool:
     """
@@ -15,4 +20,51 @@ def is_null_cell(cell: object) -> bool:
     Returns:
         bool: 是否为空
     """
-    return pd.isnull(cell) or cell in ["", "(null)", "null", "nan", "none"]
+    return pd.isnull(cell) or cell in NULL_CELLS
+
+
+def null_mask(column: np.ndarray) -> np.ndarray:
+    """
+    按列判断单元格是否为空，与is_null_cell口径一致
+
+    Args:
+        column (np.ndarray): 字符串列
+
+    Returns:
+        np.ndarray: 布尔数组
+    """
+    return pd.Series(column, dtype=object).isin(NULL_CELLS).to_numpy()
+
+
+def read_columns(path: str, columns: Dict[int, type]) -> List[np.ndarray]:
+    """
+    按列位置只读取需要的列，并按指定类型转换为整列数组
+    字符串列去除首尾空白；csv由解析器直接按类型解析数值列(round_trip精度，与float(str)逐位一致)，
+    excel读为字符串后整列转换
+
+    Args:
+        path (str): csv或excel文件路径
+        columns (Dict[int, type]): 列位置到类型(str/int/float)的映射
+
+    Returns:
+        List[np.ndarray]: 与columns顺序一致的列数组
+    """
+    usecols = sorted(columns)
+    if path.endswith((".xlsx", ".xls")):
+        # read_excel按位置指定dtype时与usecols不兼容,统一读为字符串
+        df = pd.read_excel(path, usecols=usecols, dtype=str, na_filter=False)
+    else:
+        df = pd.read_csv(
+            path, usecols=usecols, dtype=dict(columns), na_filter=False, float_precision="round_trip"
+        )
+
+    result = []
+    for i, t in columns.items():
+        col = df.iloc[:, usecols.index(i)]
+        if t is str:
+            result.append(col.str.strip().to_numpy(dtype=object))
+        elif pd.api.types.is_numeric_dtype(col):
+            result.append(col.to_numpy(dtype=t))
+        else:
+            result.append(col.to_numpy(dtype=object).astype(t))
+    return result
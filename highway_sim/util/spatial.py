@@ -0,0 +1,178 @@
+"""
+均匀网格空间索引工具模块
+
+把平面划分为边长为cell_size的正方形网格，每个对象按外接矩形登记到覆盖的网格中：
+
+    - 插入、移动、删除只更新对象覆盖的网格，移动后覆盖的网格不变时不做任何操作
+    - 矩形查询只访问与矩形相交的网格，耗时与网格数和结果数k成正比，与对象总数无关
+
+坐标为RoadNetwork.lon2x/lat2y空间(y轴向上)，行驶中的车辆以所在路段的外接矩形登记
+
+使用示例::
+
+    index = GridIndex(cell_size=200)
+    index.insert(car_id, x0, y0, x1, y1)
+    index.query(0, 0, 1000, 1000)  # 与矩形相交的对象
+    index.remove(car_id)
+"""
+
+import math
+from typing import Dict, Hashable, List, Set, Tuple
+
+
+class GridIndex:
+    """
+    均匀网格空间索引，对象以任意可哈希的键标识
+
+    Args:
+        cell_size (float): 网格边长，取与常见对象尺寸或查询范围同一量级的值
+    """
+
+    def __init__(self, cell_size: float):
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = cell_size
+        self.__cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        # 键 -> (外接矩形, 覆盖的网格范围)
+        self.__items: Dict[Hashable, Tuple[Tuple[float, float, float, float], Tuple[int, int, int, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.__items
+
+    def __cell_range(self, x0: float, y0: float, x1: float, y1: float) -> Tuple[int, int, int, int]:
+        size = self.cell_size
+        return (
+            math.floor(x0 / size),
+            math.floor(y0 / size),
+            math.floor(x1 / size),
+            math.floor(y1 / size),
+        )
+
+    def insert(self, key: Hashable, x0: float, y0: float, x1: float = None, y1: float = None) -> None:
+        """
+        插入对象，键已存在时移动到新位置；不给出x1/y1时对象为点(x0, y0)
+
+        Args:
+            key (Hashable): 对象的键
+            x0 (float): 外接矩形一角的x坐标
+            y0 (float): 外接矩形一角的y坐标
+            x1 (float): 外接矩形对角的x坐标
+            y1 (float): 外接矩形对角的y坐标
+
+        Returns:
+
+        """
+        if x1 is None:
+            x1, y1 = x0, y0
+        if x0 > x1:
+            x0, x1 = x1, x0
+        if y0 > y1:
+            y0, y1 = y1, y0
+        cells = self.__cell_range(x0, y0, x1, y1)
+        old = self.__items.get(key)
+        self.__items[key] = ((x0, y0, x1, y1), cells)
+        if old is not None:
+            if old[1] == cells:
+                return
+            self.__unlink(key, old[1])
+        cx0, cy0, cx1, cy1 = cells
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = self.__cells.get((cx, cy))
+                if cell is None:
+                    self.__cells[(cx, cy)] = {key}
+                else:
+                    cell.add(key)
+
+    move = insert
+
+    def remove(self, key: Hashable) -> None:
+        """
+        删除对象，键不存在时不做任何操作
+
+        Args:
+            key (Hashable): 对象的键
+
+        Returns:
+
+        """
+        old = self.__items.pop(key, None)
+        if old is not None:
+            self.__unlink(key, old[1])
+
+    def __unlink(self, key: Hashable, cells: Tuple[int, int, int, int]) -> None:
+        cx0, cy0, cx1, cy1 = cells
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = self.__cells[(cx, cy)]
+                cell.discard(key)
+                if not cell:
+                    del self.__cells[(cx, cy)]
+
+    def bounds(self, key: Hashable) -> Tuple[float, float, float, float]:
+        """
+        对象的外接矩形
+
+        Args:
+            key (Hashable): 对象的键
+
+        Returns:
+            Tuple[float, float, float, float]: (x0, y0, x1, y1)，x0 <= x1，y0 <= y1
+        """
+        return self.__items[key][0]
+
+    def query(self, x0: float, y0: float, x1: float, y1: float) -> List[Hashable]:
+        """
+        与矩形相交(含边界)的全部对象，每个对象只出现一次
+
+        Args:
+            x0 (float): 矩形一角的x坐标
+            y0 (float): 矩形一角的y坐标
+            x1 (float): 矩形对角的x坐标
+            y1 (float): 矩形对角的y坐标
+
+        Returns:
+            List[Hashable]: 对象的键
+        """
+        if x0 > x1:
+            x0, x1 = x1, x0
+        if y0 > y1:
+            y0, y1 = y1, y0
+        cx0, cy0, cx1, cy1 = self.__cell_range(x0, y0, x1, y1)
+        cells = self.__cells
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(cells):
+            # 查询范围大于已占用的网格数时,直接遍历已占用的网格
+            candidates = [cell for (cx, cy), cell in cells.items() if cx0 <= cx <= cx1 and cy0 <= cy <= cy1]
+        else:
+            candidates = [
+                cells[(cx, cy)]
+                for cx in range(cx0, cx1 + 1)
+                for cy in range(cy0, cy1 + 1)
+                if (cx, cy) in cells
+            ]
+
+        result: List[Hashable] = []
+        seen: Set[Hashable] = set()
+        items = self.__items
+        for cell in candidates:
+            for key in cell:
+                if key in seen:
+                    continue
+                seen.add(key)
+                bx0, by0, bx1, by1 = items[key][0]
+                if bx0 <= x1 and x0 <= bx1 and by0 <= y1 and y0 <= by1:
+                    result.append(key)
+        return result
+
+    def clear(self) -> None:
+        """
+        删除全部对象
+
+        Returns:
+
+        """
+        self.__cells.clear()
+        self.__items.clear()
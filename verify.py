@@ -1,30 +1,70 @@
+"""
+统计结果绘图脚本
+
+通过highway_sim.stats.results读取统计结果(.npz结果文件、二进制追踪或文本日志)，
+直方图用NumPy分桶后绘制，全天仿真的结果也能在数秒内出图
+
+使用示例::
+
+    python verify.py ../log/statistics.npz
+    python verify.py statistics.log --output verify.png
+"""
+
+import argparse
+
 import matplotlib
+import numpy as np
 
-matplotlib.use("TkAgg")  # 或者 'Agg', 'Qt5Agg', 'Qt4Agg', 'GTK3Agg', 等等
+from highway_sim.stats.results import load_results
+
+parser = argparse.ArgumentParser(description="Plot highway simulation statistics")
+parser.add_argument("path", nargs="?", default="statistics.log", help="Results .npz, binary trace or text log")
+parser.add_argument("--output", type=str, default=None, help="Save the figure instead of showing it")
+options = parser.parse_args()
+
+matplotlib.use("Agg" if options.output else "TkAgg")  # 或者 'Qt5Agg', 'GTK3Agg', 等等
 
 import matplotlib.pyplot as plt
 import seaborn as sns
 
 hours = list(range(1, 24))
 
-# 假设你的数据文件名为 'data.txt'
-filename = "statistics.log"
-
-# 读取文件并解析数据
-with open(filename, "r") as file:
-    lines = file.readlines()
-    this_used_values = eval(lines[3])
-    # 注意,这里需要用float,不能用int,因为有很多值比较小,容易引起舍入问题
-    this_used_values = [float(x) / 50 for x in this_used_values]
-    total_used_values = eval(lines[4])
-    total_used_values = [float(x) / 60 / 15 for x in total_used_values]
-    passed_values = eval(lines[5])
-    passed_values = [int(x) for x in passed_values]
-    enter_hour_nums = eval(lines[6])
-    exit_hour_nums = eval(lines[7])
-
-enter_nums = [int(enter_hour_nums[x]) for x in hours]
-exit_nums = [int(exit_hour_nums[x]) for x in hours]
+
+def probability_hist(samples: np.ndarray, hist: np.ndarray, edges: np.ndarray, scale: float, color: str) -> None:
+    """
+    绘制宽度为1的区间概率图，没有逐个样本时使用流式统计的直方图(去掉下溢/上溢桶)，
+    按桶左边界除以scale后所在的整数区间重新合并为宽度为1的桶
+
+    Args:
+        samples (np.ndarray): 样本
+        hist (np.ndarray): 流式统计直方图
+        edges (np.ndarray): 直方图桶边界
+        scale (float): 样本除以scale后分桶
+        color (str): 颜色
+
+    Returns:
+
+    """
+    if len(samples):
+        # 注意,这里需要用float,不能用int,因为有很多值比较小,容易引起舍入问题
+        values = samples.astype(np.float64) / scale
+        edges = np.arange(np.floor(values.min()), np.floor(values.max()) + 2)
+        counts, _ = np.histogram(values, edges)
+    elif len(hist):
+        # 流式统计的桶宽与scale无关,直接除以scale会得到更窄的桶,每个桶的概率随之变小
+        group = np.floor(edges[:-1] / scale).astype(np.int64)
+        counts = np.bincount(group - group[0], weights=hist[1:-1])
+        edges = np.arange(group[0], group[-1] + 2)
+    else:
+        return
+    total = counts.sum()
+    plt.stairs(counts / total if total else counts, edges, fill=True, color=color)
+
+
+results = load_results(options.path)
+
+enter_nums = results.entry_hour[hours]
+exit_nums = results.exit_hour[hours]
 # 使用 seaborn 设置图形样式
 sns.set_theme(style="whitegrid")
 
@@ -33,36 +73,34 @@ plt.figure(figsize=(12, 6))
 
 # 创建 passed 的区间概率图（直方图）
 plt.subplot(3, 2, 1)
-sns.histplot(passed_values, color="blue", stat="probability", binwidth=1)
+probability_hist(results.gantry_passed, results.gantry_passed_hist, results.gantry_passed_edges, 1, "blue")
 plt.title("Distribution of Passed Values")
 plt.xlabel("Passed Value")
 plt.ylabel("probability")
 
 # 创建 used 的区间概率图（直方图）
 plt.subplot(3, 2, 2)
-sns.histplot(total_used_values, color="green", stat="probability", binwidth=1)
+probability_hist(results.total_time, results.total_time_hist, results.total_time_edges, 60 * 15, "green")
 plt.title("Distribution of Used Time (15 min)")
 plt.xlabel("total Used Time")
 plt.ylabel("probability")
 
 plt.subplot(3, 2, 3)
-sns.histplot(this_used_values, color="brown", stat="probability", binwidth=1)
+probability_hist(results.gantry_time, results.gantry_time_hist, results.gantry_time_edges, 50, "brown")
 plt.title("Distribution of Used Time (50 s)")
 plt.xlabel("this Used Time")
 plt.ylabel("probability")
 
 plt.subplot(3, 2, 4)
-sns.lineplot(x=hours, y=enter_nums, color="green")
-plt.title("enter")
-plt.xlabel("hour")
-plt.ylabel("num")
-
-plt.subplot(3, 2, 4)
-sns.lineplot(x=hours, y=exit_nums, color="red")
-plt.title("exit")
+sns.lineplot(x=hours, y=enter_nums, color="green", label="enter")
+sns.lineplot(x=hours, y=exit_nums, color="red", label="exit")
+plt.title("enter / exit")
 plt.xlabel("hour")
 plt.ylabel("num")
 
 # 显示图形
 plt.tight_layout()
-plt.show()
+if options.output:
+    plt.savefig(options.output)
+else:
+    plt.show()